@@ -18,7 +18,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from models import db
 
 # Import all model classes to ensure they're registered with SQLAlchemy
-from models import Article, Day, DayArticle
+from models import Article, Day, DayArticle, SummaryCache, IngestRun, DayDigest
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -40,6 +40,16 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = db.metadata
 
+# Full-text search tables are created by migrations and maintained by
+# search_index.py; they are not models, so keep autogenerate from dropping them.
+SEARCH_TABLE_PREFIXES = ('articles_fts', 'article_search')
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == 'table' and reflected and compare_to is None and name.startswith(SEARCH_TABLE_PREFIXES):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -64,6 +74,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -85,7 +96,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,63 @@
+"""Add full-text search index for articles
+
+Revision ID: 0cc458fc320f
+Revises: fef5e64a8bc0
+Create Date: 2026-10-17 11:42:06.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0cc458fc320f'
+down_revision: Union[str, Sequence[str], None] = 'fef5e64a8bc0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in sync by the application (search_index.index_articles), not by triggers.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE articles_fts USING fts5("
+            "title, description, content, tokenize='porter unicode61')"
+        )
+        op.execute(
+            "INSERT INTO articles_fts (rowid, title, description, content) "
+            "SELECT id, coalesce(title, ''), coalesce(description, ''), coalesce(content, '') FROM articles"
+        )
+    elif dialect == 'postgresql':
+        op.create_table(
+            'article_search',
+            sa.Column('article_id', sa.Integer(), nullable=False),
+            sa.Column('document', postgresql.TSVECTOR(), nullable=False),
+            sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('article_id')
+        )
+        op.execute(
+            "INSERT INTO article_search (article_id, document) "
+            "SELECT id, "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'C') "
+            "FROM articles"
+        )
+        # built after the backfill; much faster than maintaining it row by row
+        op.create_index('ix_article_search_document', 'article_search', ['document'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE articles_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_article_search_document', table_name='article_search')
+        op.drop_table('article_search')
@@ -0,0 +1,125 @@
+"""Store article timestamps as typed UTC datetimes; composite day_articles indexes
+
+Revision ID: 1417db7fc01c
+Revises: b3f599b06bdd
+Create Date: 2026-10-17 15:02:11.384529
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1417db7fc01c'
+down_revision: Union[str, Sequence[str], None] = 'b3f599b06bdd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = ('published_at', 'fetched_at', 'inserted_at', 'updated_at')
+CHUNK_SIZE = 1000
+
+
+def _parse(value, naive):
+    """ISO-8601 text (NewsAPI's trailing "Z" included) -> UTC datetime, or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    parsed = parsed.astimezone(timezone.utc)
+    # SQLite keeps no offset: store naive UTC, as the model's UtcDateTime does
+    return parsed.replace(tzinfo=None) if naive else parsed
+
+
+def _copy_columns(bind, target_type, convert):
+    """Fill each `<name>_new` column with `convert(<name>)`, in id chunks."""
+    articles = sa.table(
+        'articles',
+        sa.column('id', sa.Integer()),
+        *[sa.column(f'{name}_new', target_type) for name in TIMESTAMP_COLUMNS],
+    )
+    select = sa.text(
+        'SELECT id, ' + ', '.join(TIMESTAMP_COLUMNS)
+        + ' FROM articles WHERE id > :after ORDER BY id LIMIT :limit'
+    )
+    update = articles.update().where(articles.c.id == sa.bindparam('_id')).values(
+        {f'{name}_new': sa.bindparam(f'_{name}') for name in TIMESTAMP_COLUMNS}
+    )
+    after = 0
+    while True:
+        rows = bind.execute(select, {'after': after, 'limit': CHUNK_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(update, [
+            dict({'_id': row[0]}, **{f'_{name}': convert(value) for name, value in zip(TIMESTAMP_COLUMNS, row[1:])})
+            for row in rows
+        ])
+        after = rows[-1][0]
+
+
+def _swap_columns(new_type):
+    """Replace each timestamp column with its `_new` twin of `new_type`."""
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_articles_published_at'))
+        for name in TIMESTAMP_COLUMNS:
+            batch_op.drop_column(name)
+    with op.batch_alter_table('articles') as batch_op:
+        for name in TIMESTAMP_COLUMNS:
+            batch_op.alter_column(f'{name}_new', new_column_name=name, existing_type=new_type)
+    op.create_index(op.f('ix_articles_published_at'), 'articles', ['published_at'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    naive = bind.dialect.name == 'sqlite'
+    with op.batch_alter_table('articles') as batch_op:
+        for name in TIMESTAMP_COLUMNS:
+            batch_op.add_column(sa.Column(f'{name}_new', sa.DateTime(timezone=True), nullable=True))
+    _copy_columns(bind, sa.DateTime(timezone=True), lambda value: _parse(value, naive))
+    _swap_columns(sa.DateTime(timezone=True))
+
+    # a day lists each article once; keep the first row of any duplicates
+    op.execute(
+        'DELETE FROM day_articles WHERE id NOT IN '
+        '(SELECT MIN(id) FROM day_articles GROUP BY day_id, article_id)'
+    )
+    with op.batch_alter_table('day_articles') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_day_articles_day_id'))
+        batch_op.create_index('ix_day_articles_day_id_rank', ['day_id', 'rank'], unique=False)
+        batch_op.create_index('ix_day_articles_day_id_category_rank', ['day_id', 'category', 'rank'], unique=False)
+        batch_op.create_index('uq_day_articles_day_id_article_id', ['day_id', 'article_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('day_articles') as batch_op:
+        batch_op.drop_index('uq_day_articles_day_id_article_id')
+        batch_op.drop_index('ix_day_articles_day_id_category_rank')
+        batch_op.drop_index('ix_day_articles_day_id_rank')
+        batch_op.create_index(batch_op.f('ix_day_articles_day_id'), ['day_id'], unique=False)
+
+    bind = op.get_bind()
+
+    def to_text(value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = _parse(value, naive=False)
+            if value is None:
+                return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    with op.batch_alter_table('articles') as batch_op:
+        for name in TIMESTAMP_COLUMNS:
+            batch_op.add_column(sa.Column(f'{name}_new', sa.Text(), nullable=True))
+    _copy_columns(bind, sa.Text(), to_text)
+    _swap_columns(sa.Text())
@@ -0,0 +1,95 @@
+"""Move article bodies into a compressed article_contents table
+
+Revision ID: 38b9260f86e5
+Revises: 1417db7fc01c
+Create Date: 2026-10-17 16:41:27.519306
+
+"""
+import hashlib
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '38b9260f86e5'
+down_revision: Union[str, Sequence[str], None] = '1417db7fc01c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 500
+
+
+def _compress(text):
+    """Same tagged format as models.compress_text; zlib is always available."""
+    data = text.encode('utf-8')
+    packed = zlib.compress(data, 6)
+    return b'z' + packed if len(packed) < len(data) else b'r' + data
+
+
+def _decompress(value):
+    tag, packed = value[:1], value[1:]
+    if tag == b'z':
+        packed = zlib.decompress(packed)
+    elif tag == b's':
+        import zstandard
+        packed = zstandard.ZstdDecompressor().decompress(packed)
+    return packed.decode('utf-8')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'article_contents',
+        sa.Column('article_id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.LargeBinary(), nullable=False),
+        sa.Column('digest', sa.String(length=40), nullable=False),
+        sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('article_id'),
+    )
+    bind = op.get_bind()
+    contents = sa.table(
+        'article_contents',
+        sa.column('article_id', sa.Integer()),
+        sa.column('content', sa.LargeBinary()),
+        sa.column('digest', sa.String()),
+    )
+    select = sa.text(
+        "SELECT id, content FROM articles WHERE id > :after AND content IS NOT NULL AND content != '' "
+        'ORDER BY id LIMIT :limit'
+    )
+    after = 0
+    while True:
+        rows = bind.execute(select, {'after': after, 'limit': CHUNK_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(contents.insert(), [
+            {'article_id': id_, 'content': _compress(text), 'digest': hashlib.sha1(text.encode('utf-8')).hexdigest()}
+            for id_, text in rows
+        ])
+        after = rows[-1][0]
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.drop_column('content')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.add_column(sa.Column('content', sa.Text(), nullable=True))
+    bind = op.get_bind()
+    articles = sa.table('articles', sa.column('id', sa.Integer()), sa.column('content', sa.Text()))
+    select = sa.text(
+        'SELECT article_id, content FROM article_contents WHERE article_id > :after '
+        'ORDER BY article_id LIMIT :limit'
+    )
+    update = articles.update().where(articles.c.id == sa.bindparam('_id')).values(content=sa.bindparam('_content'))
+    after = 0
+    while True:
+        rows = bind.execute(select, {'after': after, 'limit': CHUNK_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(update, [{'_id': id_, '_content': _decompress(bytes(value))} for id_, value in rows])
+        after = rows[-1][0]
+    op.drop_table('article_contents')
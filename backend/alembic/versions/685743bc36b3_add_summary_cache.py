@@ -0,0 +1,36 @@
+"""Add summary_cache table
+
+Revision ID: 685743bc36b3
+Revises: 8a8aededeaa1
+Create Date: 2026-10-17 09:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '685743bc36b3'
+down_revision: Union[str, Sequence[str], None] = '8a8aededeaa1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'summary_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.Text(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('input_chars', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('summary_cache')
@@ -0,0 +1,37 @@
+"""Add near-duplicate clustering columns to articles
+
+Revision ID: b3f599b06bdd
+Revises: 0cc458fc320f
+Create Date: 2026-10-17 13:15:47.902611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f599b06bdd'
+down_revision: Union[str, Sequence[str], None] = '0cc458fc320f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # signatures are computed by the next pushnews run for articles in its window
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.add_column(sa.Column('canonical_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('minhash', sa.LargeBinary(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_articles_canonical_id'), ['canonical_id'], unique=False)
+        batch_op.create_foreign_key('fk_articles_canonical_id_articles', 'articles', ['canonical_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.drop_constraint('fk_articles_canonical_id_articles', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_articles_canonical_id'))
+        batch_op.drop_column('minhash')
+        batch_op.drop_column('canonical_id')
@@ -0,0 +1,58 @@
+"""Add ingest_runs and day_digests
+
+Revision ID: fef5e64a8bc0
+Revises: 685743bc36b3
+Create Date: 2026-10-17 10:03:18.550127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fef5e64a8bc0'
+down_revision: Union[str, Sequence[str], None] = '685743bc36b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ingest_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('article_count', sa.Integer(), nullable=True),
+        sa.Column('started_at', sa.Text(), nullable=True),
+        sa.Column('finished_at', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingest_runs_day'), 'ingest_runs', ['day'], unique=False)
+
+    op.add_column('days', sa.Column('ingest_run_id', sa.Integer(), nullable=True))
+
+    op.create_table(
+        'day_digests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day_id', sa.Integer(), nullable=False),
+        sa.Column('ingest_run_id', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('summary_source', sa.Text(), nullable=True),
+        sa.Column('article_count', sa.Integer(), nullable=True),
+        sa.Column('categories', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['day_id'], ['days.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('day_digests')
+    with op.batch_alter_table('days') as batch_op:
+        batch_op.drop_column('ingest_run_id')
+    op.drop_index(op.f('ix_ingest_runs_day'), table_name='ingest_runs')
+    op.drop_table('ingest_runs')
@@ -0,0 +1,658 @@
+"""Micro-benchmarks for the backend's hot paths.
+
+Each benchmark builds its own throwaway data (an in-memory SQLite database
+where a DB is needed) so it can be run anywhere without touching `today.db`.
+
+Usage (from the `backend/` folder):
+  python bench.py day_articles [--sizes 100,1000] [--repeat 20]
+  python bench.py category_index [--sizes 20,1000,50000] [--repeat 20]
+  python bench.py summarize_batch [--articles 20] [--latency-ms 300]
+  python bench.py extractive [--database-url sqlite:///today.db] [--synthetic 200]
+  python bench.py model_client [--calls 40] [--threads 8]
+  python bench.py search [--articles 100000] [--repeat 20]
+  python bench.py retrieval [--articles 500000] [--embed-dim 0]
+  python bench.py dedupe [--stories 2000] [--copies 3]
+  python bench.py storage [--articles 5000] [--repeat 10]
+  python bench.py stub_server [--port 8001] [--latency-ms 300] [--fail-rate 0] [--fail-status 500]
+
+`stub_server` runs a fake OpenAI-compatible chat completions endpoint; point
+the app at it with `OPENAI_API_BASE=http://127.0.0.1:8001/v1` and any
+`OPENAI_API_KEY` to exercise the model code paths without network access.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date
+
+from flask import Flask
+from sqlalchemy import event
+
+import models
+import db_ops
+import helpers
+import search_index
+import retrieval
+import dedupe
+from categories import CATEGORY_KEYWORDS
+from category_index import HeadlineIndex
+
+
+def _make_app(database_url: str = "sqlite://"):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    models.db.init_app(app)
+    return app
+
+
+class _QueryCounter:
+    """Count SQL statements sent to the engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def _timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def _seed_day(session, day, n: int):
+    body = "Lorem ipsum dolor sit amet. " * 200
+    articles = [
+        models.Article(
+            url=f"https://example.com/{day.isoformat()}/{i}",
+            title=f"Headline {i}",
+            description=f"Description for story {i}",
+            content=body,
+            source_name="Example",
+            published_at="2025-12-07T10:00:00Z",
+        )
+        for i in range(n)
+    ]
+    session.add_all(articles)
+    day_row = models.Day(date=day)
+    session.add(day_row)
+    session.flush()
+    session.add_all(
+        models.DayArticle(day_id=day_row.id, article_id=a.id, rank=i + 1, category="general")
+        for i, a in enumerate(articles)
+    )
+    session.commit()
+
+
+def _legacy_get_day_articles(session, day):
+    """The pre-join implementation: Day lookup, DayArticle list, lazy article per row."""
+    day_row = session.query(models.Day).filter_by(date=day).first()
+    results = (
+        session.query(models.DayArticle)
+        .filter_by(day_id=day_row.id)
+        .order_by(models.DayArticle.rank.asc())
+        .all()
+    )
+    return [
+        {"rank": da.rank, "category": da.category, "article": da.article.to_dict() if da.article else None}
+        for da in results
+    ]
+
+
+def bench_day_articles(sizes, repeat: int):
+    app = _make_app()
+    with app.app_context():
+        models.db.create_all()
+        session = models.db.session
+        engine = models.db.engine
+        print(f"{'articles':>8} {'variant':<24} {'queries':>7} {'median ms':>10}")
+        for i, n in enumerate(sizes):
+            day = date(2025, 1, 1 + i)
+            _seed_day(session, day, n)
+            variants = [
+                ("legacy (N+1)", lambda: _legacy_get_day_articles(session, day)),
+                ("joined", lambda: db_ops.get_day_articles(session=session, day=day)),
+                ("joined + content", lambda: db_ops.get_day_articles(session=session, day=day, include_content=True)),
+                ("joined, tuples", lambda: db_ops.get_day_articles(session=session, day=day, as_tuples=True)),
+            ]
+            for name, fn in variants:
+                # expire the identity map so every run really hits the DB
+                session.expire_all()
+                with _QueryCounter(engine) as counter:
+                    fn()
+                session.expire_all()
+                ms = _timed(lambda: (session.expire_all(), fn()), repeat)
+                print(f"{n:>8} {name:<24} {counter.count:>7} {ms:>10.2f}")
+
+
+def _fake_headlines(n: int, seed: int = 7, keyword_rate: float = 0.05):
+    """Random headlines; about `keyword_rate` of them mention a category keyword."""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    filler = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    keywords = [kw for kws in CATEGORY_KEYWORDS.values() for kw in kws]
+
+    def sentence(k):
+        words = [rng.choice(filler) for _ in range(k)]
+        if rng.random() < keyword_rate:
+            words[rng.randrange(k)] = rng.choice(keywords)
+        return " ".join(words)
+
+    return [
+        {
+            "title": sentence(8).capitalize(),
+            "description": sentence(25),
+            "url": f"https://example.com/{i}",
+            "publishedAt": f"2025-12-{1 + rng.randrange(28):02d}T{rng.randrange(24):02d}:00:00Z",
+        }
+        for i in range(n)
+    ]
+
+
+def _legacy_find_top_matches(headlines, keywords, limit=3):
+    """The pre-index lookup: substring-scan every headline, newest first."""
+    kws = [k.lower() for k in keywords]
+    matches = [
+        a for a in headlines
+        if any(kw in (a.get("title") or "").lower() or kw in (a.get("description") or "").lower() for kw in kws)
+    ]
+    matches.sort(key=lambda a: a.get("publishedAt") or "", reverse=True)
+    return matches[:limit]
+
+
+def bench_category_index(sizes, repeat: int):
+    print(f"{'headlines':>9} {'category':<9} {'scan ms':>9} {'index ms':>9} {'build ms':>9} {'matches':>8}")
+    for n in sizes:
+        headlines = _fake_headlines(n)
+        t0 = time.perf_counter()
+        index = HeadlineIndex(headlines)
+        build_ms = (time.perf_counter() - t0) * 1000
+        for cat, keywords in CATEGORY_KEYWORDS.items():
+            scan = _timed(lambda: _legacy_find_top_matches(headlines, keywords, limit=3), repeat)
+            indexed = _timed(lambda: index.top_n(keywords, limit=3), repeat)
+            print(f"{n:>9} {cat:<9} {scan:>9.3f} {indexed:>9.3f} {build_ms:>9.1f} {len(index.match(keywords)):>8}")
+
+
+class _StubModelHandler(BaseHTTPRequestHandler):
+    """Answers `POST /v1/chat/completions` like a (very fast-reading) model.
+
+    Latency is `latency_ms` per call plus `ms_per_token` per output token.
+    A prompt asking for a JSON array of N strings gets N summaries back
+    (`batch_reply = "short"` drops the last one, `"malformed"` answers with
+    text that isn't JSON). `"stream": true` requests are answered as
+    server-sent event chunks, and a `fail_rate` share of calls get a
+    `fail_status` error (500 by default).
+    Each prompt is appended to `prompts`.
+    """
+
+    latency_ms = 300.0
+    ms_per_token = 0.0
+    fail_rate = 0.0
+    fail_status = 500
+    batch_reply = "ok"
+    calls = 0
+    prompts = []
+    _rng = random.Random(5)
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        prompt = (body.get("messages") or [{}])[-1].get("content", "")
+        m = re.search(r"JSON array of (\d+) strings", prompt)
+        if m and self.batch_reply == "malformed":
+            content = "[Here are your summaries: Stub summary 1. Stub summary 2.]"
+        elif m:
+            n = int(m.group(1)) - (1 if self.batch_reply == "short" else 0)
+            content = json.dumps([f"Stub summary {i + 1}." for i in range(n)])
+        else:
+            content = "Stub summary of the news in a few short and friendly words."
+        with _StubModelHandler._lock:
+            _StubModelHandler.calls += 1
+            _StubModelHandler.prompts.append(prompt)
+            fail = _StubModelHandler._rng.random() < self.fail_rate
+        if fail:
+            kind = "server_error" if self.fail_status >= 500 else "invalid_request_error"
+            payload = json.dumps({"error": {"message": "stub failure", "type": kind}}).encode("utf-8")
+            self.send_response(self.fail_status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        if body.get("stream"):
+            self._stream(content, body.get("model", "stub"))
+            return
+        time.sleep((self.latency_ms + self.ms_per_token * len(content) / 4) / 1000)
+        payload = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+    def _stream(self, content, model):
+        # first token after `latency_ms`, then one word every `ms_per_token`
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        time.sleep(self.latency_ms / 1000)
+        for word in re.findall(r"\S+\s*", content):
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.ms_per_token / 1000)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_stub_model_server(port: int = 0, latency_ms: float = 300.0, ms_per_token: float = 0.0, fail_rate: float = 0.0,
+                            fail_status: int = 500):
+    """Serve the stub model on a background thread; returns the server.
+
+    The base URL for `OPENAI_API_BASE` is `http://127.0.0.1:<port>/v1`.
+    """
+    _StubModelHandler.latency_ms = latency_ms
+    _StubModelHandler.ms_per_token = ms_per_token
+    _StubModelHandler.fail_rate = fail_rate
+    _StubModelHandler.fail_status = fail_status
+    server = _StubServer(("127.0.0.1", port), _StubModelHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _fake_articles(n: int, seed: int = 11, sentences: int = 30):
+    rng = random.Random(seed)
+    words = ["market", "city", "council", "health", "report", "officials", "said", "new", "plan", "week",
+             "people", "state", "school", "local", "weather", "budget", "vote", "hospital", "team", "season"]
+    return [
+        " ".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(sentences)
+        ) + f" Story {i}."
+        for i in range(n)
+    ]
+
+
+def _legacy_naive_summarize(text: str, max_chars: int = 400) -> str:
+    """The pre-extractive fallback: regex compiled per call, leading sentences only."""
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    out = ""
+    for s in sentences:
+        if len(out) + len(s) + 1 > max_chars:
+            break
+        out += (s + " ")
+    if not out:
+        out = text[:max_chars].rsplit(" ", 1)[0] + "..."
+    return out.strip()
+
+
+def _stored_contents(database_url: str, limit: int):
+    """Article bodies from an existing database (empty if unreachable)."""
+    app = _make_app(database_url)
+    try:
+        with app.app_context():
+            rows = models.db.session.query(models.ArticleContent.content).limit(limit).all()
+            return [r[0] for r in rows if r[0] and len(r[0]) > 400]
+    except Exception as e:
+        print(f"(could not read {database_url}: {e})")
+        return []
+
+
+def bench_extractive(database_url: str, limit: int, synthetic: int, repeat: int):
+    corpus = _stored_contents(database_url, limit)
+    stored = len(corpus)
+    if len(corpus) < synthetic:
+        corpus += _fake_articles(synthetic - len(corpus), seed=3, sentences=40)
+    print(f"corpus: {stored} stored articles + {len(corpus) - stored} synthetic, "
+          f"median {statistics.median(len(t) for t in corpus)} chars")
+    print(f"{'variant':<22} {'median us':>9} {'p95 us':>8} {'max us':>8} {'avg chars':>9} {'differs from lead':>17}")
+    lead = [_legacy_naive_summarize(t) for t in corpus]
+    for name, fn in (("legacy lead sentences", _legacy_naive_summarize), ("extractive tf-idf", helpers._naive_summarize)):
+        per_article = []
+        for text in corpus:
+            per_article.append(_timed(lambda: fn(text), repeat) * 1000)
+        per_article.sort()
+        outputs = [fn(t) for t in corpus]
+        differs = sum(1 for a, b in zip(outputs, lead) if a != b) / len(corpus)
+        print(f"{name:<22} {statistics.median(per_article):>9.1f} {per_article[int(len(per_article) * 0.95) - 1]:>8.1f} "
+              f"{per_article[-1]:>8.1f} {statistics.mean(len(o) for o in outputs):>9.0f} {differs:>17.0%}")
+
+
+def bench_summarize_batch(n: int, latency_ms: float, ms_per_token: float):
+    server = start_stub_model_server(latency_ms=latency_ms, ms_per_token=ms_per_token)
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    app = _make_app()
+    with app.app_context():
+        models.db.create_all()
+        print(f"{'articles':>8} {'variant':<14} {'model calls':>11} {'ms':>9}")
+        for seed, (name, fn) in enumerate([
+            ("one at a time", lambda texts: [helpers._summarize(t) for t in texts]),
+            ("batched", helpers._summarize_batch),
+        ]):
+            # fresh texts per variant so the summary cache can't help
+            texts = _fake_articles(n, seed=seed)
+            _StubModelHandler.calls = 0
+            t0 = time.perf_counter()
+            results = fn(texts)
+            ms = (time.perf_counter() - t0) * 1000
+            sources = {src for _, src in results}
+            print(f"{n:>8} {name:<14} {_StubModelHandler.calls:>11} {ms:>9.1f}  sources={sorted(sources)}")
+        naive = _fake_articles(n, seed=99)
+        ms = _timed(lambda: helpers._naive_summarize_batch(naive), 5)
+        print(f"{n:>8} {'naive batch':<14} {0:>11} {ms:>9.1f}")
+    server.shutdown()
+
+
+def bench_model_client(calls: int, threads: int):
+    """Healthy vs. hung model: per-call latency with deadlines and the breaker."""
+    from concurrent.futures import ThreadPoolExecutor
+    from model_client import CircuitBreaker, ModelClient
+
+    server = start_stub_model_server(latency_ms=100)
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    client = ModelClient(timeout=0.5, max_concurrency=threads, breaker=CircuitBreaker(window=10, cooldown=60))
+    messages = [{"role": "user", "content": "Summarize: hello"}]
+
+    def one(_):
+        t0 = time.perf_counter()
+        try:
+            client.chat(messages, op="bench")
+            outcome = "ok"
+        except Exception as e:
+            outcome = type(e).__name__
+        return outcome, (time.perf_counter() - t0) * 1000
+
+    print(f"{'phase':<22} {'calls':>5} {'outcomes':<44} {'median ms':>9} {'max ms':>8}")
+    for phase, latency_ms in (("healthy (100 ms)", 100), ("hung (5 s > 0.5 s)", 5000)):
+        _StubModelHandler.latency_ms = latency_ms
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(one, range(calls)))
+        outcomes = {}
+        for outcome, _ in results:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        times = [ms for _, ms in results]
+        print(f"{phase:<22} {calls:>5} {json.dumps(outcomes):<44} {statistics.median(times):>9.1f} {max(times):>8.1f}")
+    stats = client.stats()
+    print("breaker:", stats["breaker"])
+    print("latency:", {op: {k: v for k, v in h.items() if k != "buckets"} for op, h in stats["latency"].items()})
+    server.shutdown()
+
+
+def bench_search(n: int, repeat: int):
+    """Full-text index build cost and query latency vs scanning rows in Python."""
+    rng = random.Random(5)
+    common = ["market", "city", "council", "health", "report", "officials", "plan", "week", "school", "budget"]
+    # a long tail of rarer terms, like names and places in real news
+    rare = [f"topic{k}" for k in range(5000)]
+
+    def words(k):
+        return " ".join(rng.choice(common) if rng.random() < 0.7 else rng.choice(rare) for _ in range(k))
+
+    app = _make_app()
+    with app.app_context():
+        models.db.create_all()
+        session = models.db.session
+        search_index.ensure_search_schema(session)
+        t0 = time.perf_counter()
+        for start in range(0, n, 5000):
+            items = [
+                {"url": f"https://example.com/{i}", "title": words(8), "description": words(20), "content": words(150)}
+                for i in range(start, min(n, start + 5000))
+            ]
+            db_ops.bulk_upsert_articles(session=session, items=items)
+        print(f"upserted + indexed {n} articles in {time.perf_counter() - t0:.1f}s")
+
+        def scan(terms):
+            rows = (
+                session.query(models.Article.id, models.Article.title, models.Article.description, models.ArticleContent.content)
+                .outerjoin(models.ArticleContent, models.ArticleContent.article_id == models.Article.id)
+            )
+            return [r[0] for r in rows if all(t in " ".join(filter(None, r[1:])).lower() for t in terms)][:20]
+
+        print(f"{'query':<22} {'variant':<10} {'median ms':>10}")
+        for q in ("budget", "topic42", "council topic1234", "topic77 topic78"):
+            ms = _timed(lambda: search_index.search_articles(session=session, q=q), repeat)
+            print(f"{q:<22} {'fts':<10} {ms:>10.2f}")
+            ms = _timed(lambda: scan(q.split()), 1)
+            print(f"{q:<22} {'scan':<10} {ms:>10.2f}")
+
+
+def bench_retrieval(n: int, embed_dim: int, repeat: int):
+    """Build time, memory and query latency of the /ask retrieval index."""
+    rng = random.Random(9)
+    common = ["market", "city", "council", "health", "report", "officials", "plan", "week", "school", "budget"]
+    # random words stand in for names and places (distinct within the 6-letter stem)
+    rare = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(7)) for _ in range(20000)]
+
+    def words(k):
+        return " ".join(rng.choice(common) if rng.random() < 0.5 else rng.choice(rare) for _ in range(k))
+
+    rows = ((i, date(2025, 1, 1 + i % 28), words(8), words(20), words(60)) for i in range(n))
+    t0 = time.perf_counter()
+    index = retrieval.PassageIndex.build(rows, embed_dim=embed_dim)
+    print(f"indexed {n} articles ({index.size} passages, {len(index.vocab)} terms) in {time.perf_counter() - t0:.1f}s, "
+          f"{index.nbytes() / 1e6:.0f} MB of arrays")
+    print(f"{'query':<40} {'median ms':>10}")
+    queries = [
+        f"what did the council say about {rare[42]}",
+        f"{rare[7]} {rare[8]} {rare[9]}",
+        "budget plan for the school week",
+        "health report officials market city",
+    ]
+    for q in queries:
+        ms = _timed(lambda: index.search(q, k=16), repeat)
+        print(f"{q:<40} {ms:>10.2f}")
+    ms = _timed(lambda: index.search(queries[0], k=16, day="2025-01-05"), repeat)
+    print(f"{'first query, one day':<40} {ms:>10.2f}")
+
+
+def bench_dedupe(stories: int, copies: int):
+    """MinHash/LSH clustering speed and accuracy on reworded copies of stories."""
+    rng = random.Random(3)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    outlets = ["CNN", "Reuters", "AP", "BBC News", "Fox News", "NPR"]
+    articles = []  # (id, story, title, description, source)
+    for story in range(stories):
+        title = " ".join(rng.choice(vocab) for _ in range(10))
+        desc = [rng.choice(vocab) for _ in range(30)]
+        for copy in range(copies):
+            words = list(desc)
+            # each outlet rewords a couple of words
+            for _ in range(2 if copy else 0):
+                words[rng.randrange(len(words))] = rng.choice(vocab)
+            source = outlets[copy % len(outlets)]
+            articles.append((len(articles) + 1, story, f"{title} - {source}", " ".join(words), source))
+    rng.shuffle(articles)
+
+    t0 = time.perf_counter()
+    sigs = [(a[0], dedupe.signature(a[2], a[3], None, a[4])) for a in articles]
+    t1 = time.perf_counter()
+    canonical = dedupe.cluster([], sigs)
+    t2 = time.perf_counter()
+
+    story_of = {a[0]: a[1] for a in articles}
+    roots = {i: c or i for i, c in canonical.items()}
+    clusters = len(set(roots.values()))
+    wrong = sum(1 for i, r in roots.items() if story_of[i] != story_of[r])
+    print(f"{len(articles)} articles ({stories} stories x {copies} copies)")
+    print(f"signatures {((t1 - t0) * 1000 / len(articles)):.3f} ms/article, clustering {(t2 - t1) * 1000:.1f} ms total")
+    print(f"clusters {clusters} (ideal {stories}), articles merged into another story: {wrong}")
+
+
+def bench_storage(n: int, repeat: int):
+    """Table size, list-read latency and /today payload with bodies stored
+    inline in `articles` (the old layout) vs compressed in `article_contents`."""
+    rng = random.Random(5)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9))) for _ in range(3000)]
+
+    def sentence():
+        return " ".join(rng.choice(vocab) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+    app = _make_app()
+    with app.app_context():
+        models.db.create_all()
+        session = models.db.session
+        day = date(2025, 1, 1)
+        bodies = {}
+        for start in range(0, n, 1000):
+            items = []
+            for i in range(start, min(n, start + 1000)):
+                # a ~4 KB article that repeats phrases the way wire copy does
+                paragraphs = [" ".join(sentence() for _ in range(5)) for _ in range(4)]
+                bodies[f"https://example.com/{i}"] = "\n\n".join(paragraphs + paragraphs[:2])
+                items.append({"url": f"https://example.com/{i}", "title": sentence(), "description": sentence(),
+                              "content": bodies[f"https://example.com/{i}"], "published_at": "2025-01-01T10:00:00Z"})
+            db_ops.bulk_upsert_articles(session=session, items=items)
+        ids = db_ops.get_article_ids(session=session, urls=list(bodies))
+        day_row = db_ops.ensure_day(session=session, day=day)
+        db_ops.reconcile_day_articles(
+            session=session, day_row=day_row,
+            entries=[{"article_id": ids[url], "rank": r + 1, "category": "general"} for r, url in enumerate(bodies)],
+        )
+
+        # the old layout: the same rows with the body inline
+        conn = session.connection()
+        conn.exec_driver_sql("CREATE TABLE inline_articles AS SELECT * FROM articles")
+        conn.exec_driver_sql("ALTER TABLE inline_articles ADD COLUMN content TEXT")
+        conn.exec_driver_sql(
+            "UPDATE inline_articles SET content = ? WHERE url = ?", [(body, url) for url, body in bodies.items()]
+        )
+        session.commit()
+
+        conn = session.connection()
+        sizes = dict(conn.exec_driver_sql("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+        raw = sum(len(b.encode("utf-8")) for b in bodies.values())
+        print(f"{n} articles, bodies {raw / 1e6:.1f} MB raw, codec {models.CONTENT_CODEC}")
+        print(f"{'table':<20} {'MB':>8}")
+        for name in ("inline_articles", "articles", "article_contents"):
+            print(f"{name:<20} {sizes.get(name, 0) / 1e6:>8.1f}")
+
+        list_columns = ", ".join(db_ops.ARTICLE_LIST_COLUMNS)
+        print(f"{'read':<34} {'median ms':>10}")
+        for name, table in (("list columns, inline table", "inline_articles"), ("list columns, split table", "articles")):
+            ms = _timed(lambda: conn.exec_driver_sql(f"SELECT {list_columns} FROM {table}").fetchall(), repeat)
+            print(f"{name:<34} {ms:>10.2f}")
+        ms = _timed(lambda: db_ops.get_day_headlines(session=session, day=day), repeat)
+        print(f"{'get_day_headlines':<34} {ms:>10.2f}")
+        ms = _timed(lambda: db_ops.get_day_headlines(session=session, day=day, include_content=True), repeat)
+        print(f"{'get_day_headlines + content':<34} {ms:>10.2f}")
+        url = next(iter(bodies))
+        ms = _timed(lambda: db_ops.get_article_content(session=session, url=url), repeat)
+        print(f"{'get_article_content (one body)':<34} {ms:>10.3f}")
+
+        lean = len(json.dumps(db_ops.get_day_headlines(session=session, day=day)))
+        full = len(json.dumps(db_ops.get_day_headlines(session=session, day=day, include_content=True)))
+        print(f"/today payload: {full / 1e3:.0f} KB with bodies, {lean / 1e3:.0f} KB without")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("day_articles", help="db_ops.get_day_articles query count and latency")
+    p.add_argument("--sizes", default="100,1000")
+    p.add_argument("--repeat", type=int, default=20)
+    p = sub.add_parser("category_index", help="keyword scan vs HeadlineIndex for category top-N")
+    p.add_argument("--sizes", default="20,1000,50000")
+    p.add_argument("--repeat", type=int, default=20)
+    p = sub.add_parser("summarize_batch", help="per-article vs batched summarization against the stub model")
+    p.add_argument("--articles", type=int, default=20)
+    p.add_argument("--latency-ms", type=float, default=300.0)
+    p.add_argument("--ms-per-token", type=float, default=2.0)
+    p = sub.add_parser("extractive", help="extractive fallback summarizer vs the old lead-sentence one")
+    p.add_argument("--database-url", default=os.getenv("DATABASE_URL") or "sqlite:///" + os.path.abspath("today.db"))
+    p.add_argument("--limit", type=int, default=2000)
+    p.add_argument("--synthetic", type=int, default=200, help="pad the corpus with fake articles up to this size")
+    p.add_argument("--repeat", type=int, default=5)
+    p = sub.add_parser("model_client", help="model_client deadlines and circuit breaker against the stub model")
+    p.add_argument("--calls", type=int, default=40)
+    p.add_argument("--threads", type=int, default=8)
+    p = sub.add_parser("search", help="full-text search index vs a Python scan")
+    p.add_argument("--articles", type=int, default=100000)
+    p.add_argument("--repeat", type=int, default=20)
+    p = sub.add_parser("retrieval", help="BM25 / hashed-embedding passage index for /ask")
+    p.add_argument("--articles", type=int, default=500000)
+    p.add_argument("--embed-dim", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=20)
+    p = sub.add_parser("dedupe", help="near-duplicate clustering speed and accuracy")
+    p.add_argument("--stories", type=int, default=2000)
+    p.add_argument("--copies", type=int, default=3)
+    p = sub.add_parser("storage", help="article table size and /today payload, inline vs compressed bodies")
+    p.add_argument("--articles", type=int, default=5000)
+    p.add_argument("--repeat", type=int, default=10)
+    p = sub.add_parser("stub_server", help="run the stub OpenAI-compatible model server")
+    p.add_argument("--port", type=int, default=8001)
+    p.add_argument("--latency-ms", type=float, default=300.0)
+    p.add_argument("--ms-per-token", type=float, default=0.0)
+    p.add_argument("--fail-rate", type=float, default=0.0)
+    p.add_argument("--fail-status", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.bench == "day_articles":
+        bench_day_articles([int(x) for x in args.sizes.split(",")], args.repeat)
+    elif args.bench == "category_index":
+        bench_category_index([int(x) for x in args.sizes.split(",")], args.repeat)
+    elif args.bench == "summarize_batch":
+        bench_summarize_batch(args.articles, args.latency_ms, args.ms_per_token)
+    elif args.bench == "extractive":
+        bench_extractive(args.database_url, args.limit, args.synthetic, args.repeat)
+    elif args.bench == "model_client":
+        bench_model_client(args.calls, args.threads)
+    elif args.bench == "search":
+        bench_search(args.articles, args.repeat)
+    elif args.bench == "retrieval":
+        bench_retrieval(args.articles, args.embed_dim, args.repeat)
+    elif args.bench == "dedupe":
+        bench_dedupe(args.stories, args.copies)
+    elif args.bench == "storage":
+        bench_storage(args.articles, args.repeat)
+    elif args.bench == "stub_server":
+        server = start_stub_model_server(args.port, args.latency_ms, args.ms_per_token, args.fail_rate, args.fail_status)
+        print(f"stub model listening on http://127.0.0.1:{server.server_address[1]}/v1")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
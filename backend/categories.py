@@ -0,0 +1,67 @@
+"""Single source of truth for headline categories.
+
+`CATEGORY_KEYWORDS` is compiled into one case-insensitive regex, so
+`classify()` finds every keyword hit for every category in a single pass over
+the text. `pushnews` stores `primary_category()` on each `DayArticle` at
+ingest time and the `/today/<category>` routes filter on that stored value.
+
+Keywords match at the start of a word ("econom" matches "economy"), the same
+rule `category_index.HeadlineIndex` uses.
+"""
+import re
+
+CATEGORY_KEYWORDS = {
+	"economy": [
+		"econom", "inflation", "stock", "market", "dow", "s&p", "jobs", "unemployment",
+		"fed", "interest", "rate", "gdp", "recession", "business", "finance", "bank", "stocks",
+		"trade",
+	],
+	"health": [
+		"health", "covid", "vaccine", "hospital", "doctor", "medical", "disease", "illness", "flu", "mental",
+	],
+	"defense": [
+		"war", "attack", "military", "troop", "invasion", "missile", "airstrike", "conflict", "battle", "casualties",
+		"russia", "ukraine", "israel", "gaza", "palestine", "taliban", "afghanistan",
+		"defense", "army", "navy", "air force",
+	],
+}
+
+# Order used to break ties between equally scored categories.
+CATEGORY_ORDER = tuple(CATEGORY_KEYWORDS)
+
+_KEYWORD_CATEGORY = {kw: cat for cat, kws in CATEGORY_KEYWORDS.items() for kw in kws}
+
+# Longest keywords first so "stocks" wins over "stock" at the same position.
+_PATTERN = re.compile(
+	r"\b(?:"
+	+ "|".join(
+		r"\s+".join(re.escape(part) for part in kw.split())
+		for kw in sorted(_KEYWORD_CATEGORY, key=len, reverse=True)
+	)
+	+ ")",
+	re.IGNORECASE,
+)
+_WS = re.compile(r"\s+")
+
+
+def classify(title: str = None, description: str = None) -> dict:
+	"""Return `{category: score}` for every category with at least one hit.
+
+	Each keyword hit scores 1; hits in the title score 2.
+	"""
+	scores = {}
+	for text, weight in ((title, 2), (description, 1)):
+		if not text:
+			continue
+		for m in _PATTERN.finditer(text):
+			cat = _KEYWORD_CATEGORY[_WS.sub(" ", m.group(0).lower())]
+			scores[cat] = scores.get(cat, 0) + weight
+	return scores
+
+
+def primary_category(title: str = None, description: str = None) -> str:
+	"""Return the best-scoring category for a headline, or "general"."""
+	scores = classify(title, description)
+	if not scores:
+		return "general"
+	return max(CATEGORY_ORDER, key=lambda cat: (scores.get(cat, 0), -CATEGORY_ORDER.index(cat)))
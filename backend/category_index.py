@@ -0,0 +1,119 @@
+"""Per-day inverted index over headline titles and descriptions.
+
+The `/today/<category>` endpoints used to lowercase and substring-scan every
+headline for every keyword on every request. `HeadlineIndex` tokenizes the
+day's headlines once and keeps a sorted vocabulary, so a keyword lookup is a
+binary search for the tokens starting with it plus a union of their posting
+lists; the cost depends on the number of matches, not the number of
+headlines.
+
+Keywords match at the start of a word: "econom" matches "economy" and
+"economic", "war" matches "war" and "warplanes" but not "award". Multi-word
+keywords ("mental health") are matched as phrases.
+
+Headlines that carry a stored `category` (assigned at ingest by
+`categories.primary_category`) can also be looked up by that category.
+"""
+import heapq
+import re
+from bisect import bisect_left
+from datetime import datetime
+
+_TOKEN = re.compile(r"[a-z0-9&]+")
+
+
+def _published_at(item):
+	ts = item.get("publishedAt") if isinstance(item, dict) else None
+	if not ts:
+		return None
+	try:
+		return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+	except Exception:
+		return None
+
+
+class HeadlineIndex:
+	"""Token index over a list of headline dicts (title + description)."""
+
+	def __init__(self, headlines, newest_first=None):
+		self.headlines = headlines if isinstance(headlines, list) else []
+		postings = {}
+		self._texts = []
+		self._categories = {}
+		for pos, a in enumerate(self.headlines):
+			if a.get("category"):
+				self._categories.setdefault(a["category"], []).append(pos)
+			toks = _TOKEN.findall(f"{a.get('title') or ''} {a.get('description') or ''}".lower())
+			# normalized text, kept to verify multi-word keywords
+			self._texts.append(" " + " ".join(toks))
+			for tok in set(toks):
+				postings.setdefault(tok, []).append(pos)
+		self._vocab = sorted(postings)
+		self._postings = [postings[t] for t in self._vocab]
+
+		# Position of each headline when ordered newest first (undated last,
+		# ties keep rank order); used to rank top-N matches. `newest_first`
+		# (urls, as sorted by the database) saves parsing the timestamps.
+		if newest_first is not None:
+			position = {}
+			for p, a in enumerate(self.headlines):
+				position.setdefault(a.get("url"), p)
+			order = [position[u] for u in dict.fromkeys(newest_first) if u in position]
+		else:
+			dated = [(p, d) for p, d in ((p, _published_at(a)) for p, a in enumerate(self.headlines)) if d is not None]
+			try:
+				dated.sort(key=lambda x: x[1], reverse=True)
+			except TypeError:
+				# mix of naive and aware timestamps: keep rank order
+				pass
+			order = [p for p, _ in dated]
+		seen = set(order)
+		order += [p for p in range(len(self.headlines)) if p not in seen]
+		self._recency = [0] * len(self.headlines)
+		for i, p in enumerate(order):
+			self._recency[p] = i
+
+	def _prefix(self, prefix: str) -> set:
+		"""Positions of headlines containing a token that starts with `prefix`."""
+		out = set()
+		i = bisect_left(self._vocab, prefix)
+		while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+			out.update(self._postings[i])
+			i += 1
+		return out
+
+	def match(self, keywords) -> set:
+		"""Return positions of headlines matching any of `keywords`."""
+		found = set()
+		for kw in keywords:
+			toks = _TOKEN.findall(kw.lower())
+			if not toks:
+				continue
+			candidates = self._prefix(toks[0])
+			for tok in toks[1:]:
+				candidates &= self._prefix(tok)
+			if len(toks) > 1:
+				phrase = " " + " ".join(toks)
+				candidates = {p for p in candidates if phrase in self._texts[p]}
+			found |= candidates
+		return found
+
+	def top(self, keywords):
+		"""Return the highest-ranked (first) headline matching `keywords`, or None."""
+		found = self.match(keywords)
+		return self.headlines[min(found)] if found else None
+
+	def top_n(self, keywords, limit: int = 3) -> list:
+		"""Return up to `limit` matching headlines, most recent first."""
+		found = self.match(keywords)
+		return [self.headlines[p] for p in heapq.nsmallest(limit, found, key=self._recency.__getitem__)]
+
+	def category_top(self, category: str):
+		"""Return the highest-ranked headline stored under `category`, or None."""
+		found = self._categories.get(category)
+		return self.headlines[found[0]] if found else None
+
+	def category_top_n(self, category: str, limit: int = 3) -> list:
+		"""Return up to `limit` headlines stored under `category`, most recent first."""
+		found = self._categories.get(category) or []
+		return [self.headlines[p] for p in heapq.nsmallest(limit, found, key=self._recency.__getitem__)]
@@ -0,0 +1,114 @@
+"""Token-aware text chunking for the summarizer.
+
+Token counts come from `tiktoken` when it is installed (using the encoding of
+`OPENAI_MODEL`, falling back to cl100k_base) and from a ~4 characters per
+token estimate otherwise, which is close enough for English news text.
+
+`chunk_text()` packs whole paragraphs, then whole sentences, then (for a
+single runaway sentence) words into chunks of at most `max_tokens`, so chunk
+boundaries fall where a reader would pause.
+"""
+import os
+import re
+import threading
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+	global _encoder, _encoder_loaded
+	if _encoder_loaded:
+		return _encoder
+	with _encoder_lock:
+		if not _encoder_loaded:
+			try:
+				import tiktoken
+
+				try:
+					_encoder = tiktoken.encoding_for_model(os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"))
+				except KeyError:
+					_encoder = tiktoken.get_encoding("cl100k_base")
+			except Exception:
+				_encoder = None
+			_encoder_loaded = True
+	return _encoder
+
+
+def count_tokens(text: str) -> int:
+	"""Return the number of model tokens in `text` (estimated without tiktoken)."""
+	if not text:
+		return 0
+	encoder = _get_encoder()
+	if encoder is not None:
+		return len(encoder.encode(text, disallowed_special=()))
+	return len(text) // 4 + 1
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+	"""Cut `text` to at most `max_tokens`, at a word boundary."""
+	if count_tokens(text) <= max_tokens:
+		return text
+	return chunk_text(text, max_tokens)[0].rstrip() + "..."
+
+
+def _split_words(text: str, max_tokens: int) -> list:
+	chunks, current, used = [], [], 0
+	for word in text.split():
+		tokens = count_tokens(" " + word)
+		if current and used + tokens > max_tokens:
+			chunks.append(" ".join(current))
+			current, used = [], 0
+		current.append(word)
+		used += tokens
+	if current:
+		chunks.append(" ".join(current))
+	return chunks
+
+
+def chunk_text(text: str, max_tokens: int) -> list:
+	"""Split `text` into chunks of at most `max_tokens` tokens.
+
+	Paragraphs are kept together when they fit; longer paragraphs are split
+	between sentences, and only a single sentence longer than `max_tokens` is
+	split between words.
+	"""
+	text = (text or "").strip()
+	if not text:
+		return []
+	if count_tokens(text) <= max_tokens:
+		return [text]
+
+	pieces = []  # (text, tokens, separator before it)
+	for para in _PARAGRAPH.split(text):
+		para = para.strip()
+		if not para:
+			continue
+		tokens = count_tokens(para)
+		if tokens <= max_tokens:
+			pieces.append((para, tokens, "\n\n"))
+			continue
+		for i, sentence in enumerate(_SENTENCE.split(para)):
+			sep = "\n\n" if i == 0 else " "
+			tokens = count_tokens(sentence)
+			if tokens <= max_tokens:
+				pieces.append((sentence, tokens, sep))
+			else:
+				for j, part in enumerate(_split_words(sentence, max_tokens)):
+					pieces.append((part, count_tokens(part), sep if j == 0 else " "))
+
+	chunks, current, used = [], "", 0
+	for piece, tokens, sep in pieces:
+		# +1 approximates the joining whitespace
+		if current and used + tokens + 1 > max_tokens:
+			chunks.append(current)
+			current, used = "", 0
+		current = f"{current}{sep}{piece}" if current else piece
+		used += tokens + (1 if used else 0)
+	if current:
+		chunks.append(current)
+	return chunks
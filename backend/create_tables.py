@@ -5,12 +5,16 @@ Run from the `backend` folder with the same Python environment used by the app:
 PowerShell:
     python .\create_tables.py
 
-This will use `DATABASE_URL` if set, otherwise the default sqlite file configured in `main.py`.
+It also creates the full-text search index (see `search_index.py`) if it is
+missing. This will use `DATABASE_URL` if set, otherwise the default sqlite file configured in `main.py`.
 """
 from main import app
 from models import db
+from search_index import ensure_search_schema
 
 with app.app_context():
     print("Creating tables (if missing) using SQLALCHEMY_DATABASE_URI=", app.config.get("SQLALCHEMY_DATABASE_URI"))
     db.create_all()
     print("Tables created (or already exist).")
+    if ensure_search_schema(db.session):
+        print("Full-text search index created.")
@@ -8,10 +8,15 @@ All functions accept an optional `session` argument (a SQLAlchemy session).
 If not provided, `models.db.session` is used. By default operations commit at
 the end; pass `commit=False` to batch multiple operations before committing.
 """
+import json
 from typing import List, Dict, Optional, Any
 from datetime import datetime, date as _date
 
+from sqlalchemy import case, func, insert, update
+from sqlalchemy.orm import aliased
+
 import models
+import search_index
 
 
 def _to_date(d: Any) -> _date:
@@ -43,6 +48,8 @@ def upsert_article(
 
     If `session` is None the default `models.db.session` is used. By default
     the function will commit the session; pass `commit=False` to defer.
+    Setting `title`, `description` or `content` reindexes the article for
+    full-text search.
     """
     if session is None:
         session = models.db.session
@@ -51,6 +58,12 @@ def upsert_article(
 
     article = session.query(models.Article).filter_by(url=url).first()
     if article:
+        # stored summaries describe the old body; drop them when it changes
+        if content is not None and models.content_digest(content) != (article.body.digest if article.body else None):
+            article.summary_short = None
+            article.summary_long = None
+            article.summary_model = None
+            article.summary_updated_at = None
         # update fields when provided
         if title is not None:
             article.title = title
@@ -88,10 +101,11 @@ def upsert_article(
         )
         session.add(article)
 
+    session.flush()
+    if any(v is not None for v in (title, description, content)):
+        search_index.index_articles(session=session, article_ids=[article.id])
     if commit:
         session.commit()
-    else:
-        session.flush()
     return article
 
 
@@ -111,15 +125,311 @@ def ensure_day(session=None, day: Any = None, commit: bool = True) -> models.Day
     return day_row
 
 
+# Article columns accepted by `bulk_upsert_articles` (besides `content`, which
+# is stored compressed in `article_contents`).
+ARTICLE_UPSERT_COLUMNS = (
+    "title",
+    "description",
+    "source_name",
+    "author",
+    "published_at",
+    "url_to_image",
+    "language",
+    "country",
+    "fetch_source",
+)
+
+SUMMARY_COLUMNS = ("summary_short", "summary_long", "summary_model", "summary_updated_at")
+
+# Columns covered by the full-text index; upserts that set any of them reindex the row.
+SEARCH_COLUMNS = ("title", "description", "content")
+
+# Rows per statement; keeps bound parameters well under SQLite's limit.
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(seq, size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _native_insert(session):
+    """Return the dialect's `insert` supporting ON CONFLICT, or None."""
+    name = session.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def get_article_ids(session=None, urls: List[str] = None) -> Dict[str, int]:
+    """Resolve `urls` to Article ids with one `IN` query per chunk."""
+    if session is None:
+        session = models.db.session
+    out = {}
+    for chunk in _chunks(list(urls or [])):
+        rows = session.query(models.Article.url, models.Article.id).filter(models.Article.url.in_(chunk)).all()
+        out.update({url: id_ for url, id_ in rows})
+    return out
+
+
+def bulk_upsert_articles(session=None, items: List[Dict] = None, commit: bool = True) -> Dict[str, int]:
+    """Insert or update many Articles by `url` and return a `{url: id}` map.
+
+    `items` are dicts with a `url` key and any of `ARTICLE_UPSERT_COLUMNS`
+    or `content`. Like `upsert_article`, only provided (non-None) values
+    overwrite stored ones, and a changed `content` clears the stored
+    summaries.
+
+    On SQLite and Postgres this is one multi-row `INSERT ... ON CONFLICT (url)
+    DO UPDATE` per `BULK_CHUNK_SIZE` rows; other dialects fall back to one
+    `IN` lookup plus batched ORM inserts/updates. Bodies are written by
+    `save_article_contents`. Rows that received any of `SEARCH_COLUMNS` are
+    reindexed for full-text search.
+    """
+    if session is None:
+        session = models.db.session
+    by_url = {}
+    for item in items or []:
+        url = item.get("url")
+        # keep the first occurrence; an upsert can't touch one row twice
+        if url and url not in by_url:
+            by_url[url] = item
+    if not by_url:
+        return {}
+
+    now = models.utcnow()
+    rows = [
+        dict({col: item.get(col) for col in ARTICLE_UPSERT_COLUMNS}, url=url, inserted_at=now, updated_at=now)
+        for url, item in by_url.items()
+    ]
+    native_insert = _native_insert(session)
+    if native_insert is not None:
+        table = models.Article.__table__
+        for chunk in _chunks(rows):
+            stmt = native_insert(table).values(chunk)
+            excluded = stmt.excluded
+            set_ = {col: func.coalesce(getattr(excluded, col), table.c[col]) for col in ARTICLE_UPSERT_COLUMNS}
+            set_["updated_at"] = excluded.updated_at
+            session.execute(stmt.on_conflict_do_update(index_elements=["url"], set_=set_))
+    else:
+        existing = {
+            a.url: a
+            for chunk in _chunks(list(by_url))
+            for a in session.query(models.Article).filter(models.Article.url.in_(chunk)).all()
+        }
+        for row in rows:
+            art = existing.get(row["url"])
+            if art is None:
+                session.add(models.Article(**row))
+                continue
+            for col in ARTICLE_UPSERT_COLUMNS:
+                if row[col] is not None:
+                    setattr(art, col, row[col])
+            art.updated_at = now
+        session.flush()
+
+    ids = get_article_ids(session=session, urls=list(by_url))
+    # stored summaries describe the old body; drop them when it changes
+    changed = save_article_contents(
+        session=session,
+        contents={ids[url]: item["content"] for url, item in by_url.items() if url in ids and item.get("content") is not None},
+    )
+    for chunk in _chunks(changed):
+        session.query(models.Article).filter(models.Article.id.in_(chunk)).update(
+            {col: None for col in SUMMARY_COLUMNS}, synchronize_session=False
+        )
+    search_index.index_articles(
+        session=session,
+        article_ids=[ids[url] for url, item in by_url.items() if url in ids and any(item.get(col) is not None for col in SEARCH_COLUMNS)],
+    )
+    if commit:
+        session.commit()
+    return ids
+
+
+def save_article_contents(session=None, contents: Dict[int, str] = None) -> List[int]:
+    """Store `{article_id: body}` compressed in `article_contents`.
+
+    Bodies are compared by digest, so unchanged ones are neither
+    decompressed nor rewritten. Returns the ids whose body was added or
+    changed. Does not commit.
+    """
+    if session is None:
+        session = models.db.session
+    table = models.ArticleContent
+    contents = {id_: text for id_, text in (contents or {}).items() if text is not None}
+    existing = {}
+    for chunk in _chunks(list(contents)):
+        existing.update(session.query(table.article_id, table.digest).filter(table.article_id.in_(chunk)))
+    to_insert, to_update = [], []
+    for id_, text in contents.items():
+        digest = models.content_digest(text)
+        if id_ not in existing:
+            to_insert.append({"article_id": id_, "content": text, "digest": digest})
+        elif existing[id_] != digest:
+            to_update.append({"article_id": id_, "content": text, "digest": digest})
+    for chunk in _chunks(to_insert):
+        session.execute(insert(table), chunk)
+    for chunk in _chunks(to_update):
+        session.execute(update(table), chunk)
+    return [row["article_id"] for row in to_insert + to_update]
+
+
+def get_article_content(session=None, url: str = None) -> Optional[str]:
+    """Return the decompressed body of the article at `url`, or None."""
+    if session is None:
+        session = models.db.session
+    return (
+        session.query(models.ArticleContent.content)
+        .join(models.Article, models.Article.id == models.ArticleContent.article_id)
+        .filter(models.Article.url == url)
+        .scalar()
+    )
+
+
+def reconcile_day_articles(
+    session=None,
+    day_row: models.Day = None,
+    entries: List[Dict] = None,
+    remove_missing: bool = False,
+    commit: bool = True,
+):
+    """Make `day_row`'s DayArticle rows match `entries` in one pass.
+
+    `entries` are dicts with `article_id`, `rank` and `category`. Existing
+    mappings are loaded with a single query, then new ones are inserted and
+    changed ones updated in batches. With `remove_missing`, mappings for
+    articles not in `entries` are deleted.
+    """
+    if session is None:
+        session = models.db.session
+    existing = {
+        article_id: (da_id, rank, category)
+        for da_id, article_id, rank, category in session.query(
+            models.DayArticle.id, models.DayArticle.article_id, models.DayArticle.rank, models.DayArticle.category
+        ).filter(models.DayArticle.day_id == day_row.id)
+    }
+    to_insert, to_update, seen = [], [], set()
+    for e in entries or []:
+        article_id = e["article_id"]
+        if article_id in seen:
+            continue
+        seen.add(article_id)
+        rank = e.get("rank") or 0
+        category = e.get("category") or "general"
+        current = existing.get(article_id)
+        if current is None:
+            to_insert.append({"day_id": day_row.id, "article_id": article_id, "rank": rank, "category": category})
+        elif (current[1], current[2]) != (rank, category):
+            to_update.append({"id": current[0], "rank": rank, "category": category})
+
+    for chunk in _chunks(to_insert):
+        session.execute(insert(models.DayArticle), chunk)
+    for chunk in _chunks(to_update):
+        session.execute(update(models.DayArticle), chunk)
+    if remove_missing:
+        stale = [da_id for article_id, (da_id, _, _) in existing.items() if article_id not in seen]
+        for chunk in _chunks(stale):
+            session.query(models.DayArticle).filter(models.DayArticle.id.in_(chunk)).delete(synchronize_session=False)
+
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
+def remove_day_articles(session=None, day_row: models.Day = None, article_ids: List[int] = None, commit: bool = True) -> int:
+    """Delete `day_row`'s DayArticle rows for `article_ids`; returns the number deleted."""
+    if session is None:
+        session = models.db.session
+    removed = 0
+    for chunk in _chunks(list(article_ids or [])):
+        removed += (
+            session.query(models.DayArticle)
+            .filter(models.DayArticle.day_id == day_row.id, models.DayArticle.article_id.in_(chunk))
+            .delete(synchronize_session=False)
+        )
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return removed
+
+
+def get_dedupe_rows(session=None, since: Any = None, ids: List[int] = None) -> List[Dict]:
+    """Return articles for near-duplicate detection.
+
+    Covers the articles ranked on a day on or after `since` plus `ids`. Each
+    item is a dict with `id`, `canonical_id`, `minhash`, `title`,
+    `description`, `content` and `source_name`.
+    """
+    if session is None:
+        session = models.db.session
+    names = ("id", "canonical_id", "minhash", "title", "description", "content", "source_name")
+    columns = [models.ArticleContent.content if name == "content" else getattr(models.Article, name) for name in names]
+
+    def _query():
+        return session.query(*columns).outerjoin(models.ArticleContent, models.ArticleContent.article_id == models.Article.id)
+
+    out = {}
+    if since is not None:
+        recent = (
+            session.query(models.DayArticle.article_id)
+            .join(models.Day, models.Day.id == models.DayArticle.day_id)
+            .filter(models.Day.date >= _to_date(since))
+        )
+        for row in _query().filter(models.Article.id.in_(recent)):
+            out[row[0]] = dict(zip(names, row))
+    for chunk in _chunks([i for i in ids or [] if i not in out]):
+        for row in _query().filter(models.Article.id.in_(chunk)):
+            out[row[0]] = dict(zip(names, row))
+    return list(out.values())
+
+
+def save_article_clusters(session=None, clusters: List[Dict] = None, commit: bool = True):
+    """Store near-duplicate clustering results with batched UPDATEs.
+
+    `clusters` are dicts with `id`, `canonical_id` (None for a canonical
+    article) and optionally `minhash`. Articles that pointed at an article
+    which is now itself a duplicate are moved to the new root.
+    """
+    if session is None:
+        session = models.db.session
+    rows = []
+    for c in clusters or []:
+        row = {"id": c["id"], "canonical_id": c.get("canonical_id")}
+        if c.get("minhash") is not None:
+            row["minhash"] = c["minhash"]
+        rows.append(row)
+    # executemany needs the same keys in every row of a batch
+    for keys in {tuple(sorted(r)) for r in rows}:
+        for chunk in _chunks([r for r in rows if tuple(sorted(r)) == keys]):
+            session.execute(update(models.Article), chunk)
+    moved = {c["id"]: c["canonical_id"] for c in clusters or [] if c.get("canonical_id")}
+    for chunk in _chunks(list(moved)):
+        session.query(models.Article).filter(models.Article.canonical_id.in_(chunk)).update(
+            {"canonical_id": case({k: moved[k] for k in chunk}, value=models.Article.canonical_id)},
+            synchronize_session=False,
+        )
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
 def set_day_articles(session=None, day: Any = None, article_info: List[Dict] = None, commit: bool = True):
     """Set the list of articles for `day`.
 
     `article_info` is a list of dicts with at least a `url` key and optional
     fields: `title`, `description`, `category`, `rank`, `urlToImage`.
 
-    This function upserts articles, creates or updates the DayArticle mapping
-    with the provided `rank` and `category`, and removes mappings for articles
-    that are not present in the new `article_info` list.
+    This function bulk-upserts articles, creates or updates the DayArticle
+    mapping with the provided `rank` and `category`, and removes mappings for
+    articles that are not present in the new `article_info` list.
     """
     if session is None:
         session = models.db.session
@@ -131,78 +441,252 @@ def set_day_articles(session=None, day: Any = None, article_info: List[Dict] = N
     # Build map of url -> metadata
     info_map = {item.get("url"): item for item in article_info if item.get("url")}
 
-    # Ensure all articles exist and collect their ids
-    article_objs = {}
-    for url, meta in info_map.items():
-        art = upsert_article(
-            session=session,
-            url=url,
-            title=meta.get("title"),
-            description=meta.get("description"),
-            url_to_image=meta.get("urlToImage"),
-            commit=False,
-        )
-        article_objs[url] = art
+    ids = bulk_upsert_articles(
+        session=session,
+        items=[
+            {"url": url, "title": meta.get("title"), "description": meta.get("description"), "url_to_image": meta.get("urlToImage")}
+            for url, meta in info_map.items()
+        ],
+        commit=False,
+    )
+    reconcile_day_articles(
+        session=session,
+        day_row=day_row,
+        entries=[
+            {
+                "article_id": ids[url],
+                "rank": meta.get("rank") or 0,
+                "category": meta.get("category") or (meta.get("cat") or "general"),
+            }
+            for url, meta in info_map.items()
+            if url in ids
+        ],
+        remove_missing=True,
+        commit=commit,
+    )
 
-    session.flush()
 
-    # Existing mappings for the day
-    existing_map = {
-        (da.article.url): da
-        for da in session.query(models.DayArticle).join(models.Article).filter(models.DayArticle.day_id == day_row.id).all()
-    }
+# Article columns needed by the list/headline views. `content` lives in
+# `article_contents` and is only joined (and decompressed) when a caller asks
+# for it.
+ARTICLE_LIST_COLUMNS = (
+    "id",
+    "url",
+    "title",
+    "description",
+    "source_name",
+    "author",
+    "url_to_image",
+    "published_at",
+    "summary_short",
+)
 
-    # Upsert mappings and set rank/category
-    desired_urls = set(info_map.keys())
-    for url, meta in info_map.items():
-        art = article_objs.get(url)
-        if not art:
-            continue
-        rank = meta.get("rank") or 0
-        category = meta.get("category") or (meta.get("cat") or "general")
-        da = existing_map.get(url)
-        if da:
-            da.rank = rank
-            da.category = category
-        else:
-            da = models.DayArticle(day_id=day_row.id, article_id=art.id, rank=rank, category=category)
-            session.add(da)
 
-    # Remove mappings that are not in desired list
-    for url, da in existing_map.items():
-        if url not in desired_urls:
-            session.delete(da)
+# Orderings accepted by `get_day_articles`: ranking order, or newest first
+# (undated last, ties in rank order).
+DAY_ARTICLE_ORDERS = {
+    "rank": lambda: (models.DayArticle.rank.asc(),),
+    "recent": lambda: (
+        models.Article.published_at.is_(None),
+        models.Article.published_at.desc(),
+        models.DayArticle.rank.asc(),
+    ),
+}
 
-    if commit:
-        session.commit()
-    else:
-        session.flush()
 
+def get_day_articles(
+    session=None,
+    day: Any = None,
+    include_content: bool = False,
+    as_tuples: bool = False,
+    category: Optional[str] = None,
+    order: str = "rank",
+    limit: Optional[int] = None,
+) -> List:
+    """Return a list of articles for `day` ordered by rank (or `order="recent"`).
 
-def get_day_articles(session=None, day: Any = None) -> List[Dict]:
-    """Return a list of articles for `day` ordered by rank.
+    Runs a single `day_articles JOIN articles` query (the day's id comes
+    from a scalar subquery on `days`) that projects
+    only `ARTICLE_LIST_COLUMNS` (plus `content`, joined from
+    `article_contents`, when `include_content`), so no ORM instances or lazy
+    loads are involved. Filtering by `category`,
+    ordering and `limit` happen in SQL; rank order is read straight from the
+    `(day_id, rank)` / `(day_id, category, rank)` indexes.
 
-    Each item is a dict: { 'rank', 'category', 'article': article.to_dict() }
+    Each item is a dict: { 'rank', 'category', 'article': {column: value} }.
+    With `as_tuples=True` the raw result rows are returned instead:
+    (rank, category, *ARTICLE_LIST_COLUMNS[, content]).
     """
     if session is None:
         session = models.db.session
     d = _to_date(day or _date.today())
-    day_row = session.query(models.Day).filter_by(date=d).first()
-    if not day_row:
-        return []
-    results = (
-        session.query(models.DayArticle)
-        .filter_by(day_id=day_row.id)
-        .order_by(models.DayArticle.rank.asc())
-        .all()
+    names = ARTICLE_LIST_COLUMNS + (("content",) if include_content else ())
+    columns = [getattr(models.Article, name) for name in ARTICLE_LIST_COLUMNS]
+    if include_content:
+        columns.append(models.ArticleContent.content)
+    day_id = session.query(models.Day.id).filter(models.Day.date == d).scalar_subquery()
+    query = (
+        session.query(models.DayArticle.rank, models.DayArticle.category, *columns)
+        .join(models.Article, models.Article.id == models.DayArticle.article_id)
+        .filter(models.DayArticle.day_id == day_id)
+    )
+    if include_content:
+        query = query.outerjoin(models.ArticleContent, models.ArticleContent.article_id == models.Article.id)
+    if category:
+        query = query.filter(models.DayArticle.category == category)
+    query = query.order_by(*DAY_ARTICLE_ORDERS[order]())
+    if limit:
+        query = query.limit(limit)
+    rows = query.all()
+    if as_tuples:
+        return [tuple(r) for r in rows]
+    return [{"rank": r[0], "category": r[1], "article": dict(zip(names, r[2:]))} for r in rows]
+
+
+def get_day_headlines(
+    session=None,
+    day: Any = None,
+    include_content: bool = False,
+    category: Optional[str] = None,
+    order: str = "rank",
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """Return `day`'s articles in the headline shape served by the routes.
+
+    Each item mirrors a NewsAPI article: url, title, description, source
+    {name}, publishedAt (ISO-8601 UTC), plus the stored `category` and
+    `content` when `include_content` is set. `category`, `order` and
+    `limit` are passed to `get_day_articles`.
+    """
+    headlines = []
+    entries = get_day_articles(
+        session=session, day=day, include_content=include_content, category=category, order=order, limit=limit
+    )
+    for entry in entries:
+        art = entry["article"]
+        item = {
+            "url": art.get("url"),
+            "title": art.get("title"),
+            "description": art.get("description"),
+            "source": {"name": art.get("source_name")} if art.get("source_name") else None,
+            "publishedAt": models.iso_utc(art.get("published_at")),
+            "category": entry["category"],
+        }
+        if include_content:
+            item["content"] = art.get("content")
+        headlines.append(item)
+    return headlines
+
+
+def _latest_day_subquery(session):
+    """`(article_id, date)` of the most recent day each article was ranked on."""
+    return (
+        session.query(models.DayArticle.article_id.label("article_id"), func.max(models.Day.date).label("date"))
+        .join(models.Day, models.Day.id == models.DayArticle.day_id)
+        .group_by(models.DayArticle.article_id)
+        .subquery()
+    )
+
+
+def iter_article_texts(session=None, batch_size: int = 2000):
+    """Yield `(id, date, title, description, content)` for every canonical article.
+
+    `date` is the latest day the article was ranked on (None if never).
+    Near-duplicates are skipped. Rows are streamed in batches of
+    `batch_size` so the whole archive is never held as ORM objects; used to
+    build the retrieval index.
+    """
+    if session is None:
+        session = models.db.session
+    latest = _latest_day_subquery(session)
+    query = (
+        session.query(models.Article.id, latest.c.date, models.Article.title, models.Article.description, models.ArticleContent.content)
+        .outerjoin(latest, latest.c.article_id == models.Article.id)
+        .outerjoin(models.ArticleContent, models.ArticleContent.article_id == models.Article.id)
+        .filter(models.Article.canonical_id.is_(None))
+        .order_by(models.Article.id)
+    )
+    for row in query.yield_per(batch_size):
+        yield tuple(row)
+
+
+def iter_article_days(session=None, batch_size: int = 5000):
+    """Yield `(article_id, date)` for every day each article was ranked on.
+
+    Streamed from `day_articles` in batches of `batch_size`; used to build
+    the retrieval index's per-day filter.
+    """
+    if session is None:
+        session = models.db.session
+    query = (
+        session.query(models.DayArticle.article_id, models.Day.date)
+        .join(models.Day, models.Day.id == models.DayArticle.day_id)
+        .order_by(models.DayArticle.id)
+    )
+    for row in query.yield_per(batch_size):
+        yield tuple(row)
+
+
+def get_articles_by_id(session=None, ids: List[int] = None) -> Dict[int, Dict]:
+    """Return `{id: {url, title, description, content, date}}` for `ids`."""
+    if session is None:
+        session = models.db.session
+    latest = _latest_day_subquery(session)
+    out = {}
+    for chunk in _chunks(list(ids or [])):
+        rows = (
+            session.query(
+                models.Article.id, models.Article.url, models.Article.title, models.Article.description,
+                models.ArticleContent.content, latest.c.date,
+            )
+            .outerjoin(latest, latest.c.article_id == models.Article.id)
+            .outerjoin(models.ArticleContent, models.ArticleContent.article_id == models.Article.id)
+            .filter(models.Article.id.in_(chunk))
+        )
+        for id_, url, title, description, content, day in rows:
+            out[id_] = {"url": url, "title": title, "description": description, "content": content, "date": day}
+    return out
+
+
+def get_article_summary(session=None, url: str = None) -> Optional[Dict]:
+    """Return the stored summary fields for the article at `url`, or None.
+
+    A near-duplicate without its own summary gets its canonical article's.
+    """
+    if session is None:
+        session = models.db.session
+    canonical = aliased(models.Article)
+    row = (
+        session.query(
+            models.Article.summary_short, models.Article.summary_model, models.Article.summary_updated_at,
+            canonical.summary_short, canonical.summary_model, canonical.summary_updated_at,
+        )
+        .outerjoin(canonical, canonical.id == models.Article.canonical_id)
+        .filter(models.Article.url == url)
+        .first()
     )
-    out = []
-    for da in results:
-        out.append({
-            "rank": da.rank,
-            "category": da.category,
-            "article": da.article.to_dict() if da.article else None,
-        })
+    if not row:
+        return None
+    fields = row[0:3] if row[0] else row[3:6]
+    if not fields[0]:
+        return None
+    return {"summary_short": fields[0], "summary_model": fields[1], "summary_updated_at": fields[2]}
+
+
+def get_canonical_summaries(session=None, ids: List[int] = None) -> Dict[int, Dict]:
+    """Return `{id: {summary_short, summary_model}}` for the near-duplicates among
+    `ids` whose canonical article already has a summary."""
+    if session is None:
+        session = models.db.session
+    canonical = aliased(models.Article)
+    out = {}
+    for chunk in _chunks(list(ids or [])):
+        rows = (
+            session.query(models.Article.id, canonical.summary_short, canonical.summary_model)
+            .join(canonical, canonical.id == models.Article.canonical_id)
+            .filter(models.Article.id.in_(chunk), canonical.summary_short.isnot(None))
+        )
+        out.update({id_: {"summary_short": short, "summary_model": model} for id_, short, model in rows})
     return out
 
 
@@ -239,3 +723,202 @@ def save_article_summary(
     else:
         session.flush()
     return art
+
+
+def bulk_save_article_summaries(session=None, summaries: List[Dict] = None, commit: bool = True):
+    """Save many article summaries with batched UPDATEs by primary key.
+
+    `summaries` are dicts with `id`, `summary_short` and `summary_model`.
+    """
+    if session is None:
+        session = models.db.session
+    now = datetime.utcnow().isoformat()
+    rows = [
+        {"id": s["id"], "summary_short": s.get("summary_short"), "summary_model": s.get("summary_model"), "summary_updated_at": now}
+        for s in summaries or []
+    ]
+    for chunk in _chunks(rows):
+        session.execute(update(models.Article), chunk)
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
+def get_cached_summary(session=None, key: str = None) -> Optional[str]:
+    """Return the stored summary for a summary-cache `key`, or None."""
+    if session is None:
+        session = models.db.session
+    row = session.query(models.SummaryCache).filter_by(key=key).first()
+    return row.summary if row else None
+
+
+def save_cached_summary(
+    session=None,
+    key: str = None,
+    model: str = None,
+    summary: str = None,
+    input_chars: Optional[int] = None,
+    commit: bool = True,
+):
+    """Insert or replace a summary-cache row and return it."""
+    if session is None:
+        session = models.db.session
+    if not key or not summary:
+        raise ValueError("key and summary are required")
+    row = session.query(models.SummaryCache).filter_by(key=key).first()
+    if row:
+        row.model = model
+        row.summary = summary
+        row.input_chars = input_chars
+    else:
+        row = models.SummaryCache(key=key, model=model, summary=summary, input_chars=input_chars)
+        session.add(row)
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return row
+
+
+def start_ingest_run(session=None, day: Any = None, commit: bool = True) -> models.IngestRun:
+    """Record the start of an ingest for `day` and return the new IngestRun.
+
+    The run id is the version stamp compared against `DayDigest.ingest_run_id`.
+    """
+    if session is None:
+        session = models.db.session
+    run = models.IngestRun(day=_to_date(day or _date.today()))
+    session.add(run)
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return run
+
+
+def finish_ingest_run(session=None, run: models.IngestRun = None, day_row: models.Day = None,
+                      article_count: int = 0, commit: bool = True):
+    """Stamp `day_row` with `run` and mark the run finished."""
+    if session is None:
+        session = models.db.session
+    now = datetime.utcnow().isoformat()
+    run.article_count = article_count
+    run.finished_at = now
+    if day_row is not None:
+        day_row.ingest_run_id = run.id
+        day_row.updated_at = now
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return run
+
+
+def get_ingest_generation(session=None) -> int:
+    """Return the id of the latest IngestRun (0 when nothing was ingested).
+
+    Run ids only grow, so this acts as a global ingest generation counter.
+    """
+    if session is None:
+        session = models.db.session
+    return session.query(func.max(models.IngestRun.id)).scalar() or 0
+
+
+def get_ingested_days_since(session=None, run_id: int = 0) -> List[str]:
+    """Return ISO dates touched by ingest runs newer than `run_id`."""
+    if session is None:
+        session = models.db.session
+    rows = session.query(models.IngestRun.day).filter(models.IngestRun.id > run_id).distinct().all()
+    return [r[0].isoformat() for r in rows]
+
+
+def save_day_digest(
+    session=None,
+    day: Any = None,
+    ingest_run_id: int = None,
+    summary: Optional[str] = None,
+    summary_source: Optional[str] = None,
+    article_count: int = 0,
+    categories: Optional[Dict] = None,
+    commit: bool = True,
+) -> models.DayDigest:
+    """Insert or replace the materialized digest for `day`."""
+    if session is None:
+        session = models.db.session
+    day_row = ensure_day(session=session, day=day, commit=False)
+    digest = session.query(models.DayDigest).filter_by(day_id=day_row.id).first()
+    if not digest:
+        digest = models.DayDigest(day_id=day_row.id)
+        session.add(digest)
+    digest.ingest_run_id = ingest_run_id
+    digest.summary = summary
+    digest.summary_source = summary_source
+    digest.article_count = article_count
+    digest.categories = json.dumps(categories or {})
+    digest.created_at = datetime.utcnow().isoformat()
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return digest
+
+
+def update_day_digest_summary(
+    session=None,
+    day: Any = None,
+    ingest_run_id: int = None,
+    summary: Optional[str] = None,
+    summary_source: Optional[str] = None,
+    commit: bool = True,
+) -> bool:
+    """Replace the summary of `day`'s digest if it was built by `ingest_run_id`.
+
+    Used to upgrade a naive summary once the model is reachable; a digest
+    rebuilt by a newer ingest in the meantime is left alone. Returns True
+    when a row was updated.
+    """
+    if session is None:
+        session = models.db.session
+    d = _to_date(day or _date.today())
+    day_ids = session.query(models.Day.id).filter(models.Day.date == d).scalar_subquery()
+    updated = (
+        session.query(models.DayDigest)
+        .filter(models.DayDigest.day_id == day_ids, models.DayDigest.ingest_run_id == ingest_run_id)
+        .update({"summary": summary, "summary_source": summary_source}, synchronize_session=False)
+    )
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return bool(updated)
+
+
+def get_day_digest(session=None, day: Any = None) -> Optional[Dict]:
+    """Return the materialized digest for `day` as a dict, or None.
+
+    `stale` is True when the day has been ingested again since the digest was
+    built (i.e. the digest's ingest run is not the day's latest one).
+    """
+    if session is None:
+        session = models.db.session
+    d = _to_date(day or _date.today())
+    row = (
+        session.query(models.DayDigest, models.Day.ingest_run_id)
+        .join(models.Day, models.Day.id == models.DayDigest.day_id)
+        .filter(models.Day.date == d)
+        .first()
+    )
+    if not row:
+        return None
+    digest, latest_run_id = row
+    return {
+        "ingest_run_id": digest.ingest_run_id,
+        "latest_ingest_run_id": latest_run_id,
+        "stale": digest.ingest_run_id != latest_run_id,
+        "summary": digest.summary,
+        "summary_source": digest.summary_source,
+        "article_count": digest.article_count,
+        "categories": json.loads(digest.categories) if digest.categories else {},
+        "created_at": digest.created_at,
+    }
@@ -0,0 +1,158 @@
+"""Near-duplicate detection for ingested articles (MinHash + LSH).
+
+NewsAPI returns the same wire story from many outlets under different URLs.
+Each article gets a MinHash signature of its title + description + content
+(word shingles, after dropping the " - Outlet" suffix NewsAPI appends to
+titles). Signatures are split into `BANDS` bands; articles sharing any band
+are candidates, and a candidate whose estimated Jaccard similarity is at
+least `DEDUPE_THRESHOLD` (default 0.6) is a duplicate.
+
+`pushnews` clusters every ingest against the articles ranked in the last
+`DEDUPE_WINDOW_DAYS` days (default 3): a duplicate gets `canonical_id`
+pointing at the first article of its cluster, only one article per cluster
+is ranked for the day, and duplicates reuse the canonical summary.
+
+Signatures are stored in `Article.minhash` so older articles are not
+re-hashed on every run. Without NumPy, detection is disabled and every
+article is its own canonical.
+"""
+import os
+import re
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Changing these invalidates stored signatures, so they are not configurable.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 31) - 1
+
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.6"))
+DEDUPE_SHINGLE_WORDS = int(os.getenv("DEDUPE_SHINGLE_WORDS", "2"))
+DEDUPE_WINDOW_DAYS = int(os.getenv("DEDUPE_WINDOW_DAYS", "3"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+if np is not None:
+    # fixed seed: signatures stored in the DB must stay comparable across runs
+    _rng = np.random.RandomState(20251207)
+    _A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)[:, None]
+    _B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)[:, None]
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _strip_outlet(title: str, source_name: str = None) -> str:
+    """Drop a trailing " - Outlet" from `title` (NewsAPI appends the source name).
+
+    Without a known `source_name` any short trailing segment is dropped.
+    """
+    if title and " - " in title:
+        head, tail = title.rsplit(" - ", 1)
+        if (tail.strip().lower() == source_name.strip().lower()) if source_name else len(tail) <= 40:
+            return head
+    return title or ""
+
+
+def shingles(text: str, k: int = None) -> set:
+    """Set of `k`-word shingles of the normalized `text`."""
+    k = k or DEDUPE_SHINGLE_WORDS
+    words = _WORD.findall((text or "").lower())
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def signature(title: str = None, description: str = None, content: str = None, source_name: str = None):
+    """MinHash signature (uint32 array of `NUM_PERM`) or None for an empty article."""
+    text = " ".join(p for p in (_strip_outlet(title, source_name), description, content) if p)
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams)) % _PRIME
+    return ((_A * hashes + _B) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def to_bytes(sig) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(data: bytes):
+    """Decode a stored signature; None if missing or from a different scheme."""
+    if not data or len(data) != NUM_PERM * 4:
+        return None
+    return np.frombuffer(data, dtype="<u4")
+
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class LshIndex:
+    """Banded LSH over MinHash signatures."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._sigs = {}
+
+    def __len__(self):
+        return len(self._sigs)
+
+    def add(self, key, sig):
+        if key in self._sigs:
+            return
+        self._sigs[key] = sig
+        for band in range(BANDS):
+            self._buckets.setdefault((band, sig[band * ROWS:(band + 1) * ROWS].tobytes()), []).append(key)
+
+    def query(self, sig, threshold: float = None, exclude=None):
+        """Return `(key, similarity)` of the most similar indexed signature
+        at or above `threshold`, or None."""
+        threshold = DEDUPE_THRESHOLD if threshold is None else threshold
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(self._buckets.get((band, sig[band * ROWS:(band + 1) * ROWS].tobytes()), ()))
+        candidates.discard(exclude)
+        best = None
+        for key in candidates:
+            sim = similarity(sig, self._sigs[key])
+            if sim >= threshold and (best is None or sim > best[1]):
+                best = (key, sim)
+        return best
+
+
+def cluster(existing, new, threshold: float = None) -> dict:
+    """Assign canonical articles to `new` articles.
+
+    `existing` is an iterable of `(id, canonical_id, sig)` for already
+    clustered articles; `new` is a list of `(id, sig)` in priority order
+    (e.g. rank). Returns `{id: canonical_id}` for every new id, where
+    `canonical_id` is None for an article that is its own canonical. Clusters
+    never chain: a duplicate always points at the cluster's root.
+    """
+    index = LshIndex()
+    root = {}
+    for id_, canonical_id, sig in existing:
+        root[id_] = canonical_id or id_
+        if sig is not None:
+            index.add(id_, sig)
+    out = {}
+    for id_, sig in new:
+        canonical = None
+        if sig is not None:
+            match = index.query(sig, threshold=threshold, exclude=id_)
+            if match:
+                canonical = root.get(match[0], match[0])
+                if canonical == id_:
+                    canonical = None
+            index.add(id_, sig)
+        out[id_] = canonical
+        root[id_] = canonical or id_
+    return out
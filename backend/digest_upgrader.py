@@ -0,0 +1,116 @@
+"""Background upgrade of daily digests summarized without the model.
+
+`pushnews` stores the naive summary on a `DayDigest` when the model is down
+at ingest. Reads keep serving that stored digest and call
+`digest_upgrader.request()`, which starts at most one background attempt per
+date to summarize the same headline text with the model. A model summary is
+written back with `db_ops.update_day_digest_summary` (only onto the digest
+built by the same ingest run) and the date is dropped from `headline_cache`,
+so later reads pick it up.
+
+An attempt that ends without a model summary (model down, request rejected,
+no headlines) is not retried for that digest for `DIGEST_UPGRADE_RETRY`
+seconds (default 600), so a persistent failure costs one model call per
+interval instead of one per read.
+"""
+import os
+import threading
+import time
+
+from flask import current_app, has_app_context
+
+try:
+	from .helpers import _openai_available, _summarize_long, _headlines_text
+	from .headline_cache import headline_cache
+except ImportError:
+	from helpers import _openai_available, _summarize_long, _headlines_text
+	from headline_cache import headline_cache
+
+
+def _db_ops():
+	try:
+		from . import db_ops
+	except ImportError:
+		import db_ops
+	return db_ops
+
+
+class DigestUpgrader:
+	def __init__(self, retry_after: float = None):
+		self.retry_after = retry_after if retry_after is not None else float(os.getenv("DIGEST_UPGRADE_RETRY", "600"))
+		self._lock = threading.Lock()
+		self._running = set()
+		self._failed_at = {}
+		self.started = 0
+		self.upgraded = 0
+		self.failed = 0
+
+	def request(self, target_date: str, digest: dict) -> bool:
+		"""Start a background upgrade of `digest` unless it already has a model
+		summary, one is running for `target_date`, or the last attempt for
+		this digest failed recently. Needs an app context; never blocks on the
+		model. Returns True when an attempt was started.
+		"""
+		if digest.get("summary_source") == "openai" or not _openai_available() or not has_app_context():
+			return False
+		key = (target_date, digest.get("ingest_run_id"))
+		now = time.monotonic()
+		with self._lock:
+			if target_date in self._running:
+				return False
+			failed_at = self._failed_at.get(key)
+			if failed_at is not None and now - failed_at < self.retry_after:
+				return False
+			self._running.add(target_date)
+			self.started += 1
+		app_obj = current_app._get_current_object()
+		threading.Thread(target=self._upgrade, args=(app_obj, key), daemon=True).start()
+		return True
+
+	def _upgrade(self, app_obj, key):
+		target_date, ingest_run_id = key
+		ok = False
+		try:
+			with app_obj.app_context():
+				ok = self._summarize_and_store(target_date, ingest_run_id)
+		except Exception:
+			ok = False
+		finally:
+			now = time.monotonic()
+			with self._lock:
+				self._running.discard(target_date)
+				if ok:
+					self.upgraded += 1
+					self._failed_at.pop(key, None)
+				else:
+					self.failed += 1
+					for old in [k for k, t in self._failed_at.items() if now - t >= self.retry_after]:
+						del self._failed_at[old]
+					self._failed_at[key] = now
+
+	@staticmethod
+	def _summarize_and_store(target_date: str, ingest_run_id: int) -> bool:
+		db_ops = _db_ops()
+		headlines = db_ops.get_day_headlines(day=target_date)
+		if not headlines:
+			return False
+		# the same text pushnews summarized, so the summary cache is shared
+		summary, source = _summarize_long(_headlines_text(headlines, max_articles=10), max_chars=500)
+		if source != "openai":
+			return False
+		updated = db_ops.update_day_digest_summary(day=target_date, ingest_run_id=ingest_run_id, summary=summary, summary_source=source)
+		headline_cache.invalidate([target_date])
+		return updated
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"running": len(self._running),
+				"started": self.started,
+				"upgraded": self.upgraded,
+				"failed": self.failed,
+				"retry_after": self.retry_after,
+			}
+
+
+digest_upgrader = DigestUpgrader()
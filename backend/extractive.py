@@ -0,0 +1,109 @@
+"""Extractive summarizer used when no model is available.
+
+Sentences are scored by TF-IDF similarity to the article's centroid (the
+sentences that share the most important vocabulary with the whole piece),
+boosted for early position because news leads with its key facts. The
+best-scoring sentences that fit in `max_chars` are returned in their original
+order.
+
+The scoring is vectorized with NumPy over a sentence x term count matrix and
+stays well under a millisecond for a typical article. Without NumPy, or for
+texts with too few sentences to rank, it falls back to the leading sentences.
+"""
+import re
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+_WORD = re.compile(r"[a-z][a-z'-]+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her here
+hers herself him himself his how i if in into is it its itself just me more most my myself no nor not now of off
+on once only or other our ours ourselves out over own said same says she should so some such than that the their
+theirs them themselves then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself yourselves mr mrs ms one two new
+""".split())
+
+# sentences before this index get a lead bonus of LEAD_WEIGHT / (1 + index)
+LEAD_WEIGHT = 0.5
+MIN_SENTENCES = 3
+
+
+def split_sentences(text: str) -> list:
+	return [s for s in (p.strip() for p in _SENTENCE_BREAK.split(text)) if s]
+
+
+def lead_summarize(sentences: list, max_chars: int) -> str:
+	"""Leading sentences that fit in `max_chars` (the old naive behaviour)."""
+	out = []
+	used = 0
+	for s in sentences:
+		if used + len(s) + 1 > max_chars:
+			break
+		out.append(s)
+		used += len(s) + 1
+	return " ".join(out)
+
+
+def score_sentences(sentences: list):
+	"""Return a NumPy array with one relevance score per sentence."""
+	vocab = {}
+	rows = []
+	cols = []
+	for i, sentence in enumerate(sentences):
+		for word in _WORD.findall(sentence.lower()):
+			if word in STOPWORDS:
+				continue
+			rows.append(i)
+			# a 6-letter prefix is a crude but free stemmer (library/libraries)
+			cols.append(vocab.setdefault(word[:6], len(vocab)))
+	n = len(sentences)
+	if not vocab:
+		return np.zeros(n)
+	v = len(vocab)
+	flat = np.asarray(rows) * v + np.asarray(cols)
+	counts = np.bincount(flat, minlength=n * v).reshape(n, v).astype(np.float32)
+
+	df = np.count_nonzero(counts, axis=0)
+	idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+	tfidf = np.log1p(counts) * idf
+	norms = np.linalg.norm(tfidf, axis=1)
+	norms[norms == 0] = 1.0
+	tfidf /= norms[:, None]
+
+	centroid = tfidf.mean(axis=0)
+	centroid_norm = np.linalg.norm(centroid) or 1.0
+	scores = tfidf @ (centroid / centroid_norm)
+	return scores * (1.0 + LEAD_WEIGHT / (1.0 + np.arange(n)))
+
+
+def summarize(text: str, max_chars: int = 400) -> str:
+	"""Pick the most central sentences of `text` that fit in `max_chars`."""
+	text = (text or "").strip()
+	if len(text) <= max_chars:
+		return text
+	sentences = split_sentences(text)
+	if np is None or len(sentences) < MIN_SENTENCES:
+		out = lead_summarize(sentences, max_chars)
+	else:
+		scores = score_sentences(sentences)
+		# the weaker half is never used just to fill leftover space
+		floor = np.median(scores)
+		chosen = []
+		used = 0
+		for i in np.argsort(-scores, kind="stable"):
+			if chosen and scores[i] < floor:
+				break
+			length = len(sentences[i]) + 1
+			if used + length <= max_chars:
+				chosen.append(i)
+				used += length
+		out = " ".join(sentences[i] for i in sorted(chosen))
+	if not out:
+		out = text[:max_chars].rsplit(" ", 1)[0] + "..."
+	return out
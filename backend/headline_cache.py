@@ -0,0 +1,136 @@
+"""Cross-request cache for per-date reads (`/today*`, `/ask`, `/article/summary`).
+
+Entries are keyed by `(date, kind)` where kind is e.g. "headlines" or
+"digest". Today's entries expire after `HEADLINE_CACHE_TTL` seconds
+(default 30) because an ingest may still be adding to them; past dates are
+kept until evicted by LRU (`HEADLINE_CACHE_SIZE` entries, default 64) or
+invalidated.
+
+Invalidation follows the ingest generation counter: every `pushnews` run
+inserts an `ingest_runs` row, so the highest run id only grows. At most every
+`HEADLINE_GENERATION_CHECK` seconds (default 5) the cache reads that id; when
+it moved, entries for the dates touched by the new runs are dropped.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+
+def _db_ops():
+	try:
+		from . import db_ops
+	except ImportError:
+		import db_ops
+	return db_ops
+
+
+def _deep_sizeof(obj, seen=None) -> int:
+	"""Approximate memory held by `obj` (containers are walked recursively)."""
+	if seen is None:
+		seen = set()
+	if id(obj) in seen:
+		return 0
+	seen.add(id(obj))
+	size = sys.getsizeof(obj)
+	if isinstance(obj, dict):
+		size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+	elif isinstance(obj, (list, tuple, set)):
+		size += sum(_deep_sizeof(v, seen) for v in obj)
+	elif hasattr(obj, "__dict__"):
+		size += _deep_sizeof(vars(obj), seen)
+	return size
+
+
+class _Entry:
+	__slots__ = ("value", "stored_at", "size")
+
+	def __init__(self, value, stored_at, size):
+		self.value = value
+		self.stored_at = stored_at
+		self.size = size
+
+
+class HeadlineCache:
+	def __init__(self, ttl: float = None, max_size: int = None, generation_check: float = None):
+		self.ttl = ttl if ttl is not None else float(os.getenv("HEADLINE_CACHE_TTL", "30"))
+		self.max_size = max_size if max_size is not None else int(os.getenv("HEADLINE_CACHE_SIZE", "64"))
+		self.generation_check = generation_check if generation_check is not None else float(os.getenv("HEADLINE_GENERATION_CHECK", "5"))
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+		self.generation = None
+		self._checked_at = 0.0
+		self.hits = 0
+		self.misses = 0
+		self.request_hits = 0
+		self.invalidations = 0
+
+	def get(self, target_date: str, kind: str, loader):
+		"""Return the cached value for `(target_date, kind)` or call `loader()`.
+
+		`loader` must return the value to cache; exceptions propagate and are
+		not cached.
+		"""
+		self._check_generation()
+		key = (target_date, kind)
+		now = time.monotonic()
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and (target_date != date.today().isoformat() or now - entry.stored_at < self.ttl):
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return entry.value
+			self.misses += 1
+		value = loader()
+		with self._lock:
+			self._entries[key] = _Entry(value, now, _deep_sizeof(value))
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+		return value
+
+	def _check_generation(self):
+		now = time.monotonic()
+		if now - self._checked_at < self.generation_check:
+			return
+		self._checked_at = now
+		try:
+			db_ops = _db_ops()
+			current = db_ops.get_ingest_generation()
+			if self.generation is not None and current != self.generation:
+				self.invalidate(db_ops.get_ingested_days_since(run_id=self.generation))
+			self.generation = current
+		except Exception:
+			# can't read the counter (no DB/app context): rely on the TTL
+			pass
+
+	def invalidate(self, dates=None):
+		"""Drop entries for `dates` (ISO strings), or everything when None."""
+		with self._lock:
+			if dates is None:
+				self._entries.clear()
+			else:
+				dates = set(dates)
+				for key in [k for k in self._entries if k[0] in dates]:
+					del self._entries[key]
+			self.invalidations += 1
+
+	def stats(self) -> dict:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"entries": len(self._entries),
+				"max_size": self.max_size,
+				"bytes": sum(e.size for e in self._entries.values()),
+				"hits": self.hits,
+				"misses": self.misses,
+				"request_hits": self.request_hits,
+				"hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+				"invalidations": self.invalidations,
+				"generation": self.generation,
+			}
+
+
+headline_cache = HeadlineCache()
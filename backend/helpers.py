@@ -1,39 +1,69 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, current_app, has_app_context
+import io
+import json
 import os
-import tempfile
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+# helpers is imported as `backend.helpers` by the routes and as a top-level
+# module by scripts run from this folder (e.g. pushnews.py).
+try:
+	from .robots_cache import robots_cache
+	from .http_client import http_client
+	from .summary_cache import summary_cache, summary_key
+	from . import ocr_preprocess
+	from .chunking import count_tokens, chunk_text
+	from .model_client import model_client
+	from . import extractive
+except ImportError:
+	from robots_cache import robots_cache
+	from http_client import http_client
+	from summary_cache import summary_cache, summary_key
+	import ocr_preprocess
+	from chunking import count_tokens, chunk_text
+	from model_client import model_client
+	import extractive
 from dotenv import load_dotenv
 
 load_dotenv()
 app = Flask(__name__)
 
 def _openai_available():
-	"""Return True when an OpenAI API key is configured in the environment.
+	"""Return True when an OpenAI API key is configured and the model is healthy.
 
 	This is used to decide whether summarization should call the remote
-	OpenAI service or fall back to the local naive summarizer.
+	OpenAI service or fall back to the local naive summarizer. While
+	`model_client`'s circuit breaker is open this is False, so callers go
+	straight to the fallback instead of waiting on a degraded API.
 	"""
-	return bool(os.getenv("OPENAI_API_KEY"))
+	return model_client.available()
 
-def _ask_with_openai(prompt: str, context: str = None) -> str:
-	"""Call OpenAI ChatCompletion to answer a user's prompt, optionally using a context string."""
-	try:
-		import openai
-	except Exception:
-		return None
-	key = os.getenv("OPENAI_API_KEY")
-	if not key:
-		return None
-	openai.api_key = key
-	model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+def _ask_messages(prompt: str, context: str = None) -> list:
+	"""Chat messages for answering `prompt`, optionally grounded in `context`."""
 	# Build messages: system instructions, optional context, then user prompt
 	system = "You are a helpful assistant that answers questions in short, clear, friendly sentences suitable for elderly users. If context is provided, prefer answers informed by it and mention when you are guessing." 
 	messages = [{"role": "system", "content": system}]
 	if context:
 		messages.append({"role": "user", "content": f"Context (do not invent facts):\n{context}"})
 	messages.append({"role": "user", "content": prompt})
+	return messages
+
+
+def _summary_messages(text: str) -> list:
+	"""Chat messages for an elderly-friendly summary of `text`."""
+	return [
+		{"role": "system", "content": "You are an assistant that summarizes news in short, clear, friendly sentences suitable for elderly users."},
+		{"role": "user", "content": f"Summarize the following for an elderly reader, keep it concise and use simple language:\n\n{text}"},
+	]
+
+
+def _ask_with_openai(prompt: str, context: str = None) -> str:
+	"""Call OpenAI ChatCompletion to answer a user's prompt, optionally using a context string."""
 	try:
-		resp = openai.ChatCompletion.create(model=model, messages=messages, max_tokens=300, temperature=0.4)
-		return resp["choices"][0]["message"]["content"].strip()
+		return model_client.chat(_ask_messages(prompt, context), max_tokens=300, temperature=0.4, op="ask") or None
 	except Exception:
 		return None
 	
@@ -42,55 +72,380 @@ def _summarize_with_openai(text: str) -> str:
 	"""If `OPENAI_API_KEY` is set, use OpenAI to create a short, elderly-friendly summary.
 	Returns None if the OpenAI key is not configured or if the call fails.
 	"""
-	key = os.getenv("OPENAI_API_KEY")
-	if not key:
-		return None
 	try:
-		import openai
-		openai.api_key = key
+		return model_client.chat(_summary_messages(text), max_tokens=300, temperature=0.5, op="summarize") or None
+	except Exception:
+		return None
+
+
+def _summarize(text: str, max_chars: int = 400) -> tuple:
+	"""Summarize `text`, consulting the summary cache first.
+
+	Prefers OpenAI when configured and falls back to `_naive_summarize`.
+	Returns `(summary, source)` where source is "openai" or "naive".
+	"""
+	if _openai_available():
 		model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-		response = openai.ChatCompletion.create(
-			model=model,
-			messages=[
+		key = summary_key(text, f"openai:{model}")
+		summary = summary_cache.get(key)
+		if summary:
+			return summary, "openai"
+		summary = _summarize_with_openai(text)
+		if summary:
+			summary_cache.put(key, summary, model=f"openai:{model}", input_chars=len(text))
+			return summary, "openai"
+
+	# the naive summarizer is cheap, so only keep it in memory
+	key = summary_key(text, f"naive:{max_chars}")
+	summary = summary_cache.get(key, persistent=False)
+	if summary is None:
+		summary = _naive_summarize(text, max_chars=max_chars)
+		summary_cache.put(key, summary, persistent=False)
+	return summary, "naive"
+
+
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", "3000"))
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))
+SUMMARY_BATCH_ARTICLE_CHARS = int(os.getenv("SUMMARY_BATCH_ARTICLE_CHARS", "4000"))
+
+
+def _pack_batches(items, max_tokens: int, max_items: int) -> list:
+	"""Greedily pack `(index, text)` pairs into batches of at most
+	`max_tokens` tokens and `max_items` entries.
+	"""
+	batches = []
+	current, used = [], 0
+	for item in items:
+		tokens = count_tokens(item[1])
+		if current and (used + tokens > max_tokens or len(current) >= max_items):
+			batches.append(current)
+			current, used = [], 0
+		current.append(item)
+		used += tokens
+	if current:
+		batches.append(current)
+	return batches
+
+
+def _summarize_batch_with_openai(texts: list) -> list:
+	"""Summarize several articles in one ChatCompletion call.
+
+	The articles are numbered in the prompt and the model is asked for a JSON
+	array with one summary per article. Returns a list the same length as
+	`texts`; entries are None when the call or the parse failed.
+	"""
+	numbered = "\n\n".join(f"[{i + 1}] {t}" for i, t in enumerate(texts))
+	try:
+		content = model_client.chat(
+			[
 				{"role": "system", "content": "You are an assistant that summarizes news in short, clear, friendly sentences suitable for elderly users."},
-				{"role": "user", "content": f"Summarize the following for an elderly reader, keep it concise and use simple language:\n\n{text}"},
+				{"role": "user", "content": (
+					f"Summarize each of the {len(texts)} numbered articles below for an elderly reader, "
+					"keep each summary concise and use simple language. Reply with only a JSON array of "
+					f"{len(texts)} strings, one summary per article, in the same order.\n\n{numbered}"
+				)},
 			],
-			max_tokens=300,
+			max_tokens=150 * len(texts),
 			temperature=0.5,
+			op="summarize_batch",
 		)
-		return response["choices"][0]["message"]["content"].strip()
+		summaries = json.loads(content[content.index("["):content.rindex("]") + 1])
 	except Exception:
-		return None
+		return [None] * len(texts)
+	if not isinstance(summaries, list) or len(summaries) != len(texts):
+		return [None] * len(texts)
+	return [s.strip() if isinstance(s, str) and s.strip() else None for s in summaries]
+
+
+def _summarize_batch(texts: list, max_chars: int = 400) -> list:
+	"""Summarize many texts at once; returns `[(summary, source), ...]`.
+
+	Same contract and cache as `_summarize`, but cache misses are packed into
+	as few model calls as `SUMMARY_BATCH_TOKENS` (input tokens per call,
+	default 3000) and `SUMMARY_BATCH_SIZE` (articles per call, default
+	8) allow. Each article is capped at `SUMMARY_BATCH_ARTICLE_CHARS` in the
+	prompt. Anything the model didn't summarize falls back to
+	`_naive_summarize_batch`.
+	"""
+	results = [None] * len(texts)
+	if _openai_available():
+		model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+		keys = [summary_key(t, f"openai:{model}") for t in texts]
+		misses = []
+		for i, key in enumerate(keys):
+			summary = summary_cache.get(key)
+			if summary:
+				results[i] = (summary, "openai")
+			else:
+				misses.append((i, texts[i][:SUMMARY_BATCH_ARTICLE_CHARS]))
+		for batch in _pack_batches(misses, SUMMARY_BATCH_TOKENS, SUMMARY_BATCH_SIZE):
+			if len(batch) == 1:
+				summaries = [_summarize_with_openai(batch[0][1])]
+			else:
+				summaries = _summarize_batch_with_openai([t for _, t in batch])
+			for (i, _), summary in zip(batch, summaries):
+				if summary:
+					summary_cache.put(keys[i], summary, model=f"openai:{model}", input_chars=len(texts[i]))
+					results[i] = (summary, "openai")
+
+	remaining = [i for i, r in enumerate(results) if r is None]
+	naive = _naive_summarize_batch([texts[i] for i in remaining], max_chars=max_chars)
+	for i, summary in zip(remaining, naive):
+		results[i] = (summary, "naive")
+	return results
+
+
+class SummaryBatcher:
+	"""Summarize texts in `_summarize_batch` calls while they are still arriving.
+
+	Producers (e.g. `_fetch_many` workers) call `done(key, text)` once per
+	expected item, with `text=None` for items that have nothing to summarize.
+	Queued texts are sent as soon as they fill a batch, using the same
+	`SUMMARY_BATCH_TOKENS` / `SUMMARY_BATCH_SIZE` limits as `_pack_batches`,
+	or when the last expected item arrives. The call runs on the producer's
+	thread, so it overlaps with work still in flight on other threads.
+
+	`results()` closes the batcher and returns `{key: (summary, source,
+	summarize_ms)}`; texts still queued or in flight at that point get the
+	naive summary, and late model replies are dropped.
+	"""
+
+	def __init__(self, expected: int, max_chars: int = 400):
+		self._lock = threading.Lock()
+		self._expected = expected
+		self._max_chars = max_chars
+		self._texts = {}
+		self._pending, self._pending_tokens = [], 0
+		self._results = {}
+		self._closed = False
+		# worker threads need an app context for the DB-backed summary cache
+		self._app = current_app._get_current_object() if has_app_context() else None
+
+	def done(self, key, text: str = None) -> None:
+		batches = []
+		with self._lock:
+			self._expected -= 1
+			if text and not self._closed:
+				self._texts[key] = text
+				tokens = count_tokens(text[:SUMMARY_BATCH_ARTICLE_CHARS])
+				if self._pending and self._pending_tokens + tokens > SUMMARY_BATCH_TOKENS:
+					batches.append(self._pending)
+					self._pending, self._pending_tokens = [], 0
+				self._pending.append((key, text))
+				self._pending_tokens += tokens
+			if self._pending and (self._expected <= 0 or len(self._pending) >= SUMMARY_BATCH_SIZE):
+				batches.append(self._pending)
+				self._pending, self._pending_tokens = [], 0
+		for batch in batches:
+			self._summarize(batch)
+
+	def _summarize(self, batch: list) -> None:
+		t0 = time.monotonic()
+		texts = [text for _, text in batch]
+		try:
+			if self._app is None:
+				summaries = _summarize_batch(texts, max_chars=self._max_chars)
+			else:
+				with self._app.app_context():
+					summaries = _summarize_batch(texts, max_chars=self._max_chars)
+		except Exception:
+			return
+		ms = round((time.monotonic() - t0) * 1000, 1)
+		with self._lock:
+			if self._closed:
+				return
+			for (key, _), (summary, source) in zip(batch, summaries):
+				self._results[key] = (summary, source, ms)
+
+	def results(self) -> dict:
+		with self._lock:
+			self._closed = True
+			results = dict(self._results)
+			missing = [key for key in self._texts if key not in results]
+		naive = _naive_summarize_batch([self._texts[key] for key in missing], max_chars=self._max_chars)
+		for key, summary in zip(missing, naive):
+			results[key] = (summary, "naive", 0.0)
+		return results
+
+
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_MAX_CHUNKS = int(os.getenv("SUMMARY_MAX_CHUNKS", "24"))
+
+
+def _map_chunks(text: str, max_chars: int = 400) -> str:
+	"""Map step of `_summarize_long`: reduce `text` to something one call can summarize.
+
+	Returns `text` itself when it is within `SUMMARY_CHUNK_TOKENS`, otherwise
+	the joined chunk summaries (re-chunked until they fit), or None when the
+	model failed for any chunk.
+	"""
+	while count_tokens(text) > SUMMARY_CHUNK_TOKENS:
+		chunks = chunk_text(text, SUMMARY_CHUNK_TOKENS)[:SUMMARY_MAX_CHUNKS]
+
+		# worker threads need an app context for the DB-backed summary cache
+		app_obj = current_app._get_current_object() if has_app_context() else None
+
+		def _map(chunk):
+			if app_obj is None:
+				return _summarize(chunk, max_chars=max_chars)
+			with app_obj.app_context():
+				return _summarize(chunk, max_chars=max_chars)
+
+		with ThreadPoolExecutor(max_workers=max(1, min(SUMMARY_CONCURRENCY, len(chunks)))) as pool:
+			partials = list(pool.map(_map, chunks))
+		if any(source != "openai" for _, source in partials):
+			return None
+		text = "\n\n".join(summary for summary, _ in partials)
+	return text
+
+
+def _summarize_long(text: str, max_chars: int = 400) -> tuple:
+	"""Summarize text of any length with a chunked map-reduce.
+
+	Text within `SUMMARY_CHUNK_TOKENS` tokens (default 1500) goes straight to
+	`_summarize`. Longer text is split by `chunking.chunk_text`, the chunks
+	are summarized on up to `SUMMARY_CONCURRENCY` threads (default 4) and the
+	partial summaries are summarized again (recursively, if they are still
+	too long). At most `SUMMARY_MAX_CHUNKS` chunks (default 24) are mapped so
+	latency stays bounded for very long input.
+
+	The naive summarizer works from the lead sentences of the full text, so
+	without a model the text is passed to `_summarize` as-is.
+	Returns `(summary, source)` like `_summarize`.
+	"""
+	if not _openai_available():
+		return _summarize(text, max_chars=max_chars)
+	# if the model failed for part of the text, fall back for the whole
+	return _summarize(_map_chunks(text, max_chars=max_chars) or text, max_chars=max_chars)
+
+
+SSE_NAIVE_AFTER = float(os.getenv("SSE_NAIVE_AFTER", "0.5"))
+
+
+def _stream_model(messages: list, max_tokens: int, temperature: float, fallback: str = None):
+	"""Run `model_client.stream_chat` on a thread and yield `(event, data)` pairs.
+
+	Yields ("naive", {"summary": fallback}) if no token arrived within
+	`SSE_NAIVE_AFTER` seconds (default 0.5), then ("token", {"text": ...})
+	per delta and finally ("complete", {"text": full}) or ("failed",
+	{"error": ...}).
+	"""
+	events = queue.Queue()
+
+	def _produce():
+		try:
+			for delta in model_client.stream_chat(messages, max_tokens=max_tokens, temperature=temperature):
+				events.put(("token", delta))
+			events.put(("end", None))
+		except Exception as e:
+			events.put(("error", str(e)))
+
+	threading.Thread(target=_produce, daemon=True).start()
+	parts = []
+	try:
+		kind, value = events.get(timeout=SSE_NAIVE_AFTER)
+	except queue.Empty:
+		if fallback:
+			yield "naive", {"summary": fallback}
+		kind, value = events.get()
+	while True:
+		if kind == "token":
+			parts.append(value)
+			yield "token", {"text": value}
+		elif kind == "end":
+			yield "complete", {"text": "".join(parts).strip()}
+			return
+		else:
+			yield "failed", {"error": value, "partial": "".join(parts)}
+			return
+		kind, value = events.get()
+
+
+def _stream_summary(text: str, max_chars: int = 400):
+	"""Streaming counterpart of `_summarize_long`; yields `(event, data)` pairs.
+
+	Events: optional "naive" (lead-sentence summary, sent when the model is
+	slow to start), "token" deltas, then exactly one "summary" with
+	`summary` and `source`. A cached model summary is returned as a single
+	"summary" event; a completed stream is written to the summary cache.
+	"""
+	naive = _naive_summarize(text, max_chars=max_chars)
+	if not _openai_available():
+		yield "summary", {"summary": naive, "source": "naive"}
+		return
+	model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+	if count_tokens(text) > SUMMARY_CHUNK_TOKENS:
+		# the map step takes a while: show the lead sentences meanwhile
+		yield "naive", {"summary": naive}
+		final_input = _map_chunks(text, max_chars=max_chars)
+		if final_input is None:
+			yield "summary", {"summary": naive, "source": "naive"}
+			return
+		fallback = None
+	else:
+		final_input, fallback = text, naive
+	key = summary_key(final_input, f"openai:{model}")
+	cached = summary_cache.get(key)
+	if cached:
+		yield "summary", {"summary": cached, "source": "openai", "cached": True}
+		return
+	for event, data in _stream_model(_summary_messages(final_input), 300, 0.5, fallback=fallback):
+		if event == "complete" and data["text"]:
+			summary_cache.put(key, data["text"], model=f"openai:{model}", input_chars=len(final_input))
+			yield "summary", {"summary": data["text"], "source": "openai"}
+			return
+		if event in ("complete", "failed"):
+			yield "summary", {"summary": naive, "source": "naive"}
+			return
+		yield event, data
+
+
+def _stream_answer(prompt: str, context: str = None):
+	"""Streaming counterpart of `_ask_with_openai`; yields `(event, data)` pairs.
+
+	"token" deltas followed by "answer" with the full text, or a single
+	"failed" event when the model could not be reached.
+	"""
+	for event, data in _stream_model(_ask_messages(prompt, context), 300, 0.4):
+		if event == "complete":
+			yield "answer", {"answer": data["text"]}
+			return
+		yield event, data
 
 
 def _naive_summarize(text: str, max_chars: int = 400) -> str:
-	"""Simple fallback summarizer: return the first few sentences up to max_chars."""
-	text = text.strip()
-	if len(text) <= max_chars:
-		return text
-	# try to cut at sentence boundary
-	import re
-	sentences = re.split(r'(?<=[.!?])\s+', text)
-	out = ""
-	for s in sentences:
-		if len(out) + len(s) + 1 > max_chars:
-			break
-		out += (s + " ")
-	if not out:
-		out = text[:max_chars].rsplit(" ", 1)[0] + "..."
-	return out.strip()
+	"""Fallback summarizer used without a model.
+
+	Delegates to `extractive.summarize`, which picks the most central
+	sentences (TF-IDF, lead-weighted) that fit in `max_chars`.
+	"""
+	return extractive.summarize(text, max_chars=max_chars)
+
+
+def _naive_summarize_batch(texts: list, max_chars: int = 400) -> list:
+	"""`_naive_summarize` over a list of texts."""
+	return [_naive_summarize(t, max_chars=max_chars) for t in texts]
+
 
 
 
 
+def _ocr_image(path, lang: str = None, timings: dict = None):
+	"""Run OCR on an image and return extracted text.
 
-def _ocr_image(path: str, lang: str = None):
-	"""Run OCR on an image file and return extracted text.
+	`path` may be a filename, the encoded image bytes, or a binary file-like
+	object (e.g. an upload stream).
 
 	This helper attempts to import `Pillow` and `pytesseract` and uses them to
 	open the image and extract text. `lang` may be passed to tell Tesseract
 	which language pack to use (e.g. 'eng' or 'spa').
 
+	Unless `OCR_PREPROCESS=0`, the image is first downscaled, binarized,
+	deskewed and split into column tiles that are OCR'd in parallel (see
+	`ocr_preprocess.py`). Pass a dict as `timings` to get the milliseconds
+	spent in each stage.
+
 	Returns a tuple `(text, None)` on success or `(None, error_message)` on
 	failure so callers can handle errors uniformly.
 	"""
@@ -100,9 +455,20 @@ def _ocr_image(path: str, lang: str = None):
 	except Exception as e:
 		return None, f"Pillow/pytesseract not available: {e}"
 	try:
-		img = Image.open(path)
-		config = f"-l {lang}" if lang else ""
-		text = pytesseract.image_to_string(img, config=config)
+		t0 = time.perf_counter()
+		img = Image.open(io.BytesIO(path) if isinstance(path, (bytes, bytearray)) else path)
+		img.load()
+		if timings is not None:
+			timings["load_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+		if os.getenv("OCR_PREPROCESS", "1") == "0":
+			tiles = [img]
+		else:
+			tiles = ocr_preprocess.preprocess(img, timings=timings)
+		t0 = time.perf_counter()
+		text = ocr_preprocess.ocr_tiles(tiles, lang=lang)
+		if timings is not None:
+			timings["tesseract_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+			timings["tiles"] = len(tiles)
 		return text.strip(), None
 	except Exception as e:
 		return None, str(e)
@@ -111,21 +477,14 @@ def _ocr_image(path: str, lang: str = None):
 def _allowed_by_robots(url: str, user_agent: str = "*") -> bool:
 	"""Check the target site's robots.txt to see if fetching is allowed.
 
-	Uses `urllib.robotparser` to read `/robots.txt` for the target host and
-	returns True when the specified `user_agent` is allowed to fetch the URL.
+	Parsed robots.txt files are kept in the process-wide `robots_cache` (see
+	`robots_cache.py`) so each host is downloaded at most once per TTL.
 	If robots.txt cannot be fetched/parsed we return True (permissive) to
 	avoid blocking in environments where robots.txt is unavailable; change
 	this policy if you prefer a conservative-deny approach.
 	"""
 	try:
-		from urllib import robotparser
-		from urllib.parse import urlparse
-		parsed = urlparse(url)
-		robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-		rp = robotparser.RobotFileParser()
-		rp.set_url(robots_url)
-		rp.read()
-		return rp.can_fetch(user_agent, url)
+		return robots_cache.can_fetch(url, user_agent)
 	except Exception:
 		# If robots.txt can't be retrieved or parsed, allow by default
 		return True
@@ -136,14 +495,14 @@ def _fetch_and_extract(url: str) -> tuple:
 
 	This function performs three steps:
 	1. Checks robots.txt to respect publisher rules.
-	2. Fetches the page HTML with `requests`.
+	2. Fetches the page HTML through the pooled `http_client` (keep-alive,
+	   retries on 429/5xx and a response size cap).
 	3. Uses `readability-lxml` to find the main content, then strips HTML
 	   tags with BeautifulSoup and returns plain text.
 
 	Returns `(text, None)` on success or `(None, error_message)` on failure.
 	"""
 	try:
-		import requests
 		from readability import Document
 		from bs4 import BeautifulSoup
 	except Exception as e:
@@ -159,7 +518,7 @@ def _fetch_and_extract(url: str) -> tuple:
 
 	headers = {"User-Agent": "ElderlyNewsBot/1.0 (+https://example.com)"}
 	try:
-		resp = requests.get(url, headers=headers, timeout=10)
+		resp = http_client.get(url, headers=headers)
 	except Exception as e:
 		return None, f"Request failed: {e}"
 
@@ -175,54 +534,123 @@ def _fetch_and_extract(url: str) -> tuple:
 		return text, None
 	except Exception as e:
 		return None, f"Extraction failed: {e}"
-	
-def _find_top_match(headlines, keywords):
-		"""Return the first headline that matches any keyword (title or description).
 
-		Matching is case-insensitive. Returns None if no match found.
-		"""
-		if not isinstance(headlines, list):
-			return None
-		kws = [k.lower() for k in keywords]
-		for a in headlines:
-			title = (a.get("title") or "").lower()
-			desc = (a.get("description") or "").lower()
-			for kw in kws:
-				if kw in title or kw in desc:
-					return a
-		return None
 
-def _parse_published_at(item):
-	"""Try to parse `publishedAt` from an article dict to a datetime for sorting."""
-	ts = item.get("publishedAt") if isinstance(item, dict) else None
-	if not ts:
+def _url_host(url):
+	"""Lower-cased host of `url`, or None when it isn't a parseable URL string."""
+	if not isinstance(url, str):
 		return None
 	try:
-		# NewsAPI often returns ISO8601 with trailing Z
-		if ts.endswith("Z"):
-			ts = ts.replace("Z", "+00:00")
-		from datetime import datetime
-		return datetime.fromisoformat(ts)
-	except Exception:
+		return urlparse(url).netloc.lower()
+	except ValueError:
 		return None
 
 
-def _find_top_matches(headlines, keywords, limit=3):
-	"""Return up to `limit` headlines matching keywords, prefer most recent when possible."""
-	if not isinstance(headlines, list):
+def _fetch_many(urls, worker, max_workers: int = None, per_host: int = None, deadline: float = None, on_done=None) -> list:
+	"""Run `worker(url)` for every URL on a bounded thread pool.
+
+	Downloads, extraction and summarization for different URLs overlap, but
+	at most `per_host` requests run against the same host at once so a batch
+	of links from one publisher doesn't hammer it. Each host keeps a FIFO of
+	its URLs and only hands the next one to the pool when one of its own
+	requests finishes, so a slow publisher never holds pool threads that
+	other hosts could use. `deadline` is a global budget in seconds for the
+	whole batch; URLs that have not finished by then are reported with an
+	error instead of holding the request open. Entries that aren't URL
+	strings get an "Invalid URL" error.
+
+	`worker` must return a dict. Results are returned in the same order as
+	`urls`, each with `url` and `elapsed_ms` filled in. `on_done(entry)`, if
+	given, is called on the worker thread as each URL finishes; time spent
+	in it counts against `deadline`.
+
+	Defaults come from `FETCH_MAX_WORKERS`, `FETCH_PER_HOST` and
+	`FETCH_DEADLINE` environment variables.
+	"""
+	if max_workers is None:
+		max_workers = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+	if per_host is None:
+		per_host = int(os.getenv("FETCH_PER_HOST", "2"))
+	if deadline is None:
+		deadline = float(os.getenv("FETCH_DEADLINE", "45"))
+	if not urls:
 		return []
-	kws = [k.lower() for k in keywords]
-	matches = []
-	for a in headlines:
-		title = (a.get("title") or "").lower()
-		desc = (a.get("description") or "").lower()
-		for kw in kws:
-			if kw in title or kw in desc:
-				matches.append(a)
-				break
-	# If articles include publishedAt, sort by it desc
+
+	started = time.monotonic()
+	hosts = [_url_host(u) for u in urls]
+	waiting = {}
+	for i, host in enumerate(hosts):
+		waiting.setdefault(host, deque()).append(i)
+	results = [None] * len(urls)
+	lock = threading.Lock()
+	all_done = threading.Event()
+	state = {"remaining": len(urls), "closed": False}
+	pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))))
+
+	def _run(i):
+		u = urls[i]
+		t0 = time.monotonic()
+		if hosts[i] is None:
+			entry = {"url": u, "error": "Invalid URL"}
+		else:
+			try:
+				entry = worker(u)
+			except Exception as e:
+				entry = {"url": u, "error": str(e)}
+		entry.setdefault("url", u)
+		entry["elapsed_ms"] = round((time.monotonic() - t0) * 1000, 1)
+		# hand this host's slot to its next URL before running `on_done`
+		with lock:
+			if waiting[hosts[i]] and not state["closed"]:
+				pool.submit(_run, waiting[hosts[i]].popleft())
+		try:
+			if on_done is not None:
+				on_done(entry)
+		finally:
+			with lock:
+				if not state["closed"]:
+					results[i] = entry
+				state["remaining"] -= 1
+				if state["remaining"] == 0:
+					all_done.set()
+		return entry
+
 	try:
-		matches.sort(key=lambda x: _parse_published_at(x) or 0, reverse=True)
-	except Exception:
-		pass
-	return matches[:limit]
\ No newline at end of file
+		with lock:
+			for queued in waiting.values():
+				for _ in range(min(max(1, per_host), len(queued))):
+					pool.submit(_run, queued.popleft())
+		all_done.wait(timeout=max(0.0, started + deadline - time.monotonic()))
+	finally:
+		with lock:
+			state["closed"] = True
+			finished = list(results)
+		# Don't block the request on stragglers; their results are dropped.
+		pool.shutdown(wait=False, cancel_futures=True)
+
+	elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+	return [
+		entry if entry is not None else {"url": u, "error": "Deadline exceeded", "elapsed_ms": elapsed_ms}
+		for u, entry in zip(urls, finished)
+	]
+
+
+def _headlines_text(headlines, max_articles: int = 10, max_chars: int = None) -> str:
+	"""Join titles + descriptions of the first `max_articles` headlines into one blob.
+
+	The result is capped at `max_chars` when given; callers that summarize
+	with `_summarize_long` can pass the full text instead.
+	"""
+	if isinstance(headlines, list):
+		parts = []
+		for a in headlines[:max_articles]:
+			title = a.get("title") or ""
+			desc = a.get("description") or ""
+			parts.append(f"{title}. {desc}")
+		combined = "\n\n".join(parts)
+	else:
+		# if stored as plain text, summarize it directly
+		combined = str(headlines)
+	if max_chars and len(combined) > max_chars:
+		combined = combined[:max_chars].rsplit(" ", 1)[0] + "..."
+	return combined
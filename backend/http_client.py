@@ -0,0 +1,131 @@
+"""Shared, pooled HTTP client for every outbound fetch in `backend/`.
+
+Article downloads (`helpers._fetch_and_extract`), robots.txt lookups
+(`robots_cache`) and NewsAPI calls (`pushnews`) all go through the single
+`http_client` instance below, so connections to the same publisher are kept
+alive and reused instead of paying a new TCP + TLS handshake per request.
+
+Configuration (environment variables):
+  - `HTTP_POOL_CONNECTIONS` number of per-host pools to keep (default 32)
+  - `HTTP_POOL_MAXSIZE` connections kept per host (default 8)
+  - `HTTP_RETRIES` retries on connection errors, 429 and 5xx (default 2)
+  - `HTTP_BACKOFF` exponential backoff factor in seconds (default 0.5)
+  - `HTTP_TIMEOUT` default request timeout in seconds (default 10)
+  - `HTTP_MAX_BYTES` default response body cap in bytes (default 5 MB)
+
+The client is plain `requests` underneath, so it can be pointed at a local
+stand-in server simply by passing its URL; `tests/test_http_client.py` does
+this with an `http.server` on a free port.
+"""
+import os
+import threading
+
+DEFAULT_USER_AGENT = "ElderlyNewsBot/1.0 (+https://example.com)"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class ResponseTooLarge(Exception):
+	"""Raised when a response body exceeds the configured byte cap."""
+
+
+class HttpClient:
+	"""Thread-safe wrapper around a `requests.Session` with pooling and retries."""
+
+	def __init__(self, pool_connections: int = None, pool_maxsize: int = None, retries: int = None,
+			backoff: float = None, timeout: float = None, max_bytes: int = None, user_agent: str = DEFAULT_USER_AGENT):
+		self.pool_connections = pool_connections or int(os.getenv("HTTP_POOL_CONNECTIONS", "32"))
+		self.pool_maxsize = pool_maxsize or int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+		self.retries = retries if retries is not None else int(os.getenv("HTTP_RETRIES", "2"))
+		self.backoff = backoff if backoff is not None else float(os.getenv("HTTP_BACKOFF", "0.5"))
+		self.timeout = timeout or float(os.getenv("HTTP_TIMEOUT", "10"))
+		self.max_bytes = max_bytes or int(os.getenv("HTTP_MAX_BYTES", str(5 * 1024 * 1024)))
+		self.user_agent = user_agent
+		self._session = None
+		self._lock = threading.Lock()
+		self.requests = 0
+		self.errors = 0
+		self.bytes_read = 0
+
+	@property
+	def session(self):
+		"""Lazily build the shared session (imports `requests` on first use)."""
+		if self._session is None:
+			with self._lock:
+				if self._session is None:
+					self._session = self._build_session()
+		return self._session
+
+	def _build_session(self):
+		import requests
+		from requests.adapters import HTTPAdapter
+		from urllib3.util.retry import Retry
+
+		retry = Retry(
+			total=self.retries,
+			connect=self.retries,
+			read=self.retries,
+			status=self.retries,
+			backoff_factor=self.backoff,
+			status_forcelist=RETRY_STATUSES,
+			allowed_methods=frozenset(["GET", "HEAD"]),
+			respect_retry_after_header=True,
+			raise_on_status=False,
+		)
+		adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=retry)
+		session = requests.Session()
+		session.mount("http://", adapter)
+		session.mount("https://", adapter)
+		session.headers["User-Agent"] = self.user_agent
+		return session
+
+	def get(self, url: str, params: dict = None, headers: dict = None, timeout: float = None, max_bytes: int = None):
+		"""GET `url` and return a fully-read `requests.Response`.
+
+		The body is streamed and reading stops with `ResponseTooLarge` as soon
+		as it grows past `max_bytes`, so a huge or endless page can't exhaust
+		memory. `resp.text`/`resp.json()` work as usual afterwards.
+		"""
+		cap = max_bytes or self.max_bytes
+		with self._lock:
+			self.requests += 1
+		try:
+			resp = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout, stream=True)
+		except Exception:
+			with self._lock:
+				self.errors += 1
+			raise
+		try:
+			declared = resp.headers.get("Content-Length")
+			if declared and declared.isdigit() and int(declared) > cap:
+				raise ResponseTooLarge(f"Response is {declared} bytes (limit {cap})")
+			chunks = []
+			size = 0
+			for chunk in resp.iter_content(chunk_size=64 * 1024):
+				size += len(chunk)
+				if size > cap:
+					raise ResponseTooLarge(f"Response exceeded {cap} bytes")
+				chunks.append(chunk)
+			resp._content = b"".join(chunks)
+			with self._lock:
+				self.bytes_read += size
+			return resp
+		except Exception:
+			with self._lock:
+				self.errors += 1
+			raise
+		finally:
+			# Returns the connection to the pool (body is fully consumed or abandoned).
+			resp.close()
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"requests": self.requests,
+				"errors": self.errors,
+				"bytes_read": self.bytes_read,
+				"pool_connections": self.pool_connections,
+				"pool_maxsize": self.pool_maxsize,
+			}
+
+
+http_client = HttpClient()
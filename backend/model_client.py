@@ -0,0 +1,312 @@
+"""Shared client for every chat-model call in `backend/`.
+
+Summaries, batch summaries, `/ask` answers and the streaming endpoints all go
+through the single `model_client` instance below instead of configuring the
+`openai` module on every call. It adds what a degraded API needs:
+
+- one persistent client, built on first use and rebuilt only when
+  `OPENAI_API_KEY`/`OPENAI_API_BASE` change (`openai>=1` `OpenAI` client, or
+  the legacy module API on older installs)
+- a per-call deadline (`MODEL_TIMEOUT` seconds, default 20)
+- a process-wide concurrency limit (`MODEL_MAX_CONCURRENCY`, default 8);
+  callers wait at most `MODEL_QUEUE_TIMEOUT` seconds (default 5) for a slot
+- a circuit breaker: when at least half (`MODEL_BREAKER_THRESHOLD`) of the
+  last `MODEL_BREAKER_WINDOW` calls (default 20, minimum 5) failed with a
+  timeout, a connection error, a 429 or a 5xx, calls fail fast with `ModelUnavailable` for `MODEL_BREAKER_COOLDOWN` seconds
+  (default 30), after which a single trial call decides whether to close it
+- latency histograms per operation, reported by `stats()` on `GET /stats`
+
+`OPENAI_API_BASE` points the client at any OpenAI-compatible server, e.g.
+`python bench.py stub_server` for tests and benchmarks.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class ModelUnavailable(Exception):
+	"""No model call was made: not configured, breaker open or no free slot."""
+
+
+class LatencyHistogram:
+	"""Fixed-bucket latency histogram (milliseconds)."""
+
+	def __init__(self, buckets=LATENCY_BUCKETS_MS):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.count = 0
+		self.total_ms = 0.0
+
+	def observe(self, ms: float):
+		for i, bound in enumerate(self.buckets):
+			if ms <= bound:
+				self.counts[i] += 1
+				break
+		else:
+			self.counts[-1] += 1
+		self.count += 1
+		self.total_ms += ms
+
+	def quantile(self, q: float):
+		"""Upper bound of the bucket holding the `q` quantile (None past the last bucket)."""
+		if not self.count:
+			return None
+		rank = q * self.count
+		seen = 0
+		for i, c in enumerate(self.counts):
+			seen += c
+			if seen >= rank:
+				return self.buckets[i] if i < len(self.buckets) else None
+		return None
+
+	def to_dict(self) -> dict:
+		labels = [f"le_{b}" for b in self.buckets] + ["inf"]
+		return {
+			"count": self.count,
+			"avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+			"p50_ms": self.quantile(0.5),
+			"p95_ms": self.quantile(0.95),
+			"buckets": dict(zip(labels, self.counts)),
+		}
+
+
+class CircuitBreaker:
+	"""Error-rate breaker over the last `window` calls."""
+
+	def __init__(self, threshold: float = None, window: int = None, min_calls: int = 5, cooldown: float = None):
+		self.threshold = threshold if threshold is not None else float(os.getenv("MODEL_BREAKER_THRESHOLD", "0.5"))
+		self.window = window or int(os.getenv("MODEL_BREAKER_WINDOW", "20"))
+		self.min_calls = min_calls
+		self.cooldown = cooldown if cooldown is not None else float(os.getenv("MODEL_BREAKER_COOLDOWN", "30"))
+		self._outcomes = deque(maxlen=self.window)
+		self._lock = threading.Lock()
+		self.state = "closed"
+		self.opened_at = 0.0
+		self._trial_running = False
+		self.opens = 0
+
+	def allow(self) -> bool:
+		"""Return True if a call may proceed (claims the trial slot when half-open)."""
+		with self._lock:
+			if self.state == "closed":
+				return True
+			if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+				self.state = "half_open"
+			if self.state == "half_open" and not self._trial_running:
+				self._trial_running = True
+				return True
+			return False
+
+	def would_allow(self) -> bool:
+		"""Like `allow()` but without claiming anything (for cheap pre-checks)."""
+		with self._lock:
+			if self.state == "open":
+				return time.monotonic() - self.opened_at >= self.cooldown
+			return self.state == "closed" or not self._trial_running
+
+	def record(self, ok: bool):
+		with self._lock:
+			if self.state == "half_open":
+				self._trial_running = False
+				if ok:
+					self.state = "closed"
+					self._outcomes.clear()
+				else:
+					self._open()
+				return
+			self._outcomes.append(ok)
+			failures = self._outcomes.count(False)
+			if self.state == "closed" and len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.threshold:
+				self._open()
+
+	def _open(self):
+		self.state = "open"
+		self.opened_at = time.monotonic()
+		self.opens += 1
+
+	def to_dict(self) -> dict:
+		with self._lock:
+			recent = len(self._outcomes)
+			return {
+				"state": self.state,
+				"opens": self.opens,
+				"recent_calls": recent,
+				"recent_error_rate": round(self._outcomes.count(False) / recent, 3) if recent else None,
+			}
+
+
+class ModelClient:
+	def __init__(self, timeout: float = None, max_concurrency: int = None, queue_timeout: float = None, breaker=None):
+		self.timeout = timeout or float(os.getenv("MODEL_TIMEOUT", "20"))
+		self.max_concurrency = max_concurrency or int(os.getenv("MODEL_MAX_CONCURRENCY", "8"))
+		self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("MODEL_QUEUE_TIMEOUT", "5"))
+		self.breaker = breaker or CircuitBreaker()
+		self._slots = threading.BoundedSemaphore(self.max_concurrency)
+		self._lock = threading.Lock()
+		self._client = None
+		self._config = None
+		self._latency = {}
+		self.calls = 0
+		self.errors = 0
+		self.timeouts = 0
+		self.rejected = 0
+		self.busy = 0
+		self.in_flight = 0
+
+	@staticmethod
+	def configured() -> bool:
+		return bool(os.getenv("OPENAI_API_KEY"))
+
+	def available(self) -> bool:
+		"""True when a key is configured and the breaker is not open."""
+		return self.configured() and self.breaker.would_allow()
+
+	def _get_client(self):
+		"""Return `(client, legacy)`; built once and reused across calls."""
+		config = (os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_API_BASE"))
+		with self._lock:
+			if self._client is None or self._config != config:
+				self._client = self._build_client(*config)
+				self._config = config
+			return self._client
+
+	def _build_client(self, key, base):
+		try:
+			from openai import OpenAI
+		except ImportError:
+			OpenAI = None
+		if OpenAI is not None:
+			# deadlines and retries are handled here, not by the SDK
+			return OpenAI(api_key=key, base_url=base or None, timeout=self.timeout, max_retries=0), False
+		import openai
+
+		openai.api_key = key
+		if base:
+			openai.api_base = base
+		return openai, True
+
+	def _acquire(self):
+		if not self.configured():
+			raise ModelUnavailable("OPENAI_API_KEY is not set")
+		# cheap check first so an open breaker never waits for a slot
+		if not self.breaker.would_allow():
+			self.rejected += 1
+			raise ModelUnavailable("circuit breaker is open")
+		if not self._slots.acquire(timeout=self.queue_timeout):
+			self.busy += 1
+			raise ModelUnavailable("too many concurrent model calls")
+		if not self.breaker.allow():
+			self._slots.release()
+			self.rejected += 1
+			raise ModelUnavailable("circuit breaker is open")
+		with self._lock:
+			self.in_flight += 1
+			self.calls += 1
+
+	def _release(self, op: str, started: float, ok: bool, timed_out: bool = False, outage: bool = False):
+		elapsed_ms = (time.monotonic() - started) * 1000
+		with self._lock:
+			self.in_flight -= 1
+			self._latency.setdefault(op, LatencyHistogram()).observe(elapsed_ms)
+			if not ok:
+				self.errors += 1
+			if timed_out:
+				self.timeouts += 1
+		self._slots.release()
+		self.breaker.record(not outage)
+
+	@staticmethod
+	def _is_timeout(exc) -> bool:
+		return "timeout" in type(exc).__name__.lower() or "timed out" in str(exc).lower()
+
+	@classmethod
+	def _is_outage(cls, exc) -> bool:
+		"""True when `exc` says the service is unhealthy: a timeout, a connection
+		error, a 429 or a 5xx. A rejected request (other 4xx, e.g. a bad request
+		or an over-long context) is the caller's problem and doesn't count
+		against the breaker."""
+		if cls._is_timeout(exc) or isinstance(exc, ConnectionError) or "connection" in type(exc).__name__.lower():
+			return True
+		# `status_code` on openai>=1 errors, `http_status` on the legacy ones
+		status = getattr(exc, "status_code", None) or getattr(exc, "http_status", None)
+		return isinstance(status, int) and (status == 429 or status >= 500)
+
+	def chat(self, messages: list, max_tokens: int = 300, temperature: float = 0.5, timeout: float = None, op: str = "chat") -> str:
+		"""Return the completion text. Raises `ModelUnavailable` or the call's error."""
+		self._acquire()
+		started = time.monotonic()
+		model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+		timeout = timeout or self.timeout
+		try:
+			client, legacy = self._get_client()
+			if legacy:
+				resp = client.ChatCompletion.create(model=model, messages=messages, max_tokens=max_tokens,
+					temperature=temperature, request_timeout=timeout)
+				text = resp["choices"][0]["message"]["content"]
+			else:
+				resp = client.with_options(timeout=timeout).chat.completions.create(model=model, messages=messages,
+					max_tokens=max_tokens, temperature=temperature)
+				text = resp.choices[0].message.content
+		except Exception as e:
+			self._release(op, started, ok=False, timed_out=self._is_timeout(e), outage=self._is_outage(e))
+			raise
+		self._release(op, started, ok=True)
+		return (text or "").strip()
+
+	def stream_chat(self, messages: list, max_tokens: int = 300, temperature: float = 0.5, timeout: float = None, op: str = "stream"):
+		"""Yield content deltas; the whole stream must finish within `timeout`."""
+		self._acquire()
+		started = time.monotonic()
+		model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+		timeout = timeout or self.timeout
+		ok = False
+		timed_out = False
+		outage = False
+		try:
+			client, legacy = self._get_client()
+			if legacy:
+				chunks = client.ChatCompletion.create(model=model, messages=messages, max_tokens=max_tokens,
+					temperature=temperature, stream=True, request_timeout=timeout)
+			else:
+				chunks = client.with_options(timeout=timeout).chat.completions.create(model=model, messages=messages,
+					max_tokens=max_tokens, temperature=temperature, stream=True)
+			for chunk in chunks:
+				if time.monotonic() - started > timeout:
+					timed_out = True
+					raise TimeoutError(f"model stream exceeded {timeout}s")
+				if legacy:
+					delta = chunk["choices"][0].get("delta", {}).get("content")
+				else:
+					delta = chunk.choices[0].delta.content if chunk.choices else None
+				if delta:
+					yield delta
+			ok = True
+		except Exception as e:
+			timed_out = timed_out or self._is_timeout(e)
+			outage = timed_out or self._is_outage(e)
+			raise
+		finally:
+			self._release(op, started, ok=ok, timed_out=timed_out, outage=outage)
+
+	def stats(self) -> dict:
+		with self._lock:
+			latency = {op: h.to_dict() for op, h in self._latency.items()}
+			return {
+				"configured": self.configured(),
+				"timeout": self.timeout,
+				"max_concurrency": self.max_concurrency,
+				"in_flight": self.in_flight,
+				"calls": self.calls,
+				"errors": self.errors,
+				"timeouts": self.timeouts,
+				"rejected": self.rejected,
+				"busy": self.busy,
+				"breaker": self.breaker.to_dict(),
+				"latency": latency,
+			}
+
+
+model_client = ModelClient()
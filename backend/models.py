@@ -2,7 +2,107 @@ from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
-from datetime import datetime
+import hashlib
+import os
+import zlib
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def to_utc(value):
+    """Return `value` (datetime or ISO-8601 string, e.g. NewsAPI's trailing
+    "Z") as an aware UTC datetime; None for empty or unparseable values.
+    Naive values are taken to be UTC."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def iso_utc(value):
+    """Format a stored timestamp in the NewsAPI shape (`2025-12-07T10:00:00Z`)."""
+    value = to_utc(value)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ") if value else None
+
+
+class UtcDateTime(db.TypeDecorator):
+    """Timezone-aware timestamp that is always stored and returned in UTC.
+
+    Binds datetimes or ISO strings. SQLite keeps no offset, so values are
+    normalized to UTC before storing and marked UTC again when loaded.
+    """
+    impl = db.DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return to_utc(value)
+
+    def process_result_value(self, value, dialect):
+        return to_utc(value)
+
+
+# Codec for newly written article bodies: "zstd" (needs `zstandard`) or "zlib".
+# Each stored value is tagged, so rows written with either stay readable.
+CONTENT_CODEC = os.getenv("CONTENT_CODEC") or ("zstd" if zstandard is not None else "zlib")
+
+_CODEC_TAGS = {"raw": b"r", "zlib": b"z", "zstd": b"s"}
+
+
+def compress_text(value: str) -> bytes:
+    """Encode `value` as a codec tag byte followed by the compressed UTF-8."""
+    data = value.encode("utf-8")
+    if CONTENT_CODEC == "zstd" and zstandard is not None:
+        packed, codec = zstandard.ZstdCompressor(level=3).compress(data), "zstd"
+    else:
+        packed, codec = zlib.compress(data, 6), "zlib"
+    # short bodies may not shrink; keep them as they are
+    if len(packed) >= len(data):
+        packed, codec = data, "raw"
+    return _CODEC_TAGS[codec] + packed
+
+
+def decompress_text(value: bytes) -> str:
+    tag, packed = value[:1], value[1:]
+    if tag == b"z":
+        packed = zlib.decompress(packed)
+    elif tag == b"s":
+        if zstandard is None:
+            raise RuntimeError("article body is zstd-compressed; install zstandard to read it")
+        packed = zstandard.ZstdDecompressor().decompress(packed)
+    return packed.decode("utf-8")
+
+
+def content_digest(value: str) -> str:
+    """Fingerprint of an article body, compared to detect changed content."""
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+class CompressedText(db.TypeDecorator):
+    """Text stored compressed (see `compress_text`); decompressed only when
+    the column is selected."""
+    impl = db.LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(bytes(value)) if value is not None else None
+
 
 class Article(db.Model):
     """Canonical stored article row."""
@@ -11,38 +111,69 @@ class Article(db.Model):
     url = db.Column(db.Text, unique=True, nullable=False, index=True)
     title = db.Column(db.Text)
     description = db.Column(db.Text)
-    content = db.Column(db.Text)
     source_name = db.Column(db.Text)
     author = db.Column(db.Text)
     url_to_image = db.Column(db.Text)
-    published_at = db.Column(db.Text, index=True)
+    published_at = db.Column(UtcDateTime, index=True)
     language = db.Column(db.String(10))
     country = db.Column(db.String(5))
     fetched = db.Column(db.Boolean, default=False)
-    fetched_at = db.Column(db.Text)
+    fetched_at = db.Column(UtcDateTime)
     fetch_source = db.Column(db.Text)
     summary_short = db.Column(db.Text)
     summary_long = db.Column(db.Text)
     summary_model = db.Column(db.Text)
     summary_updated_at = db.Column(db.Text)
-    inserted_at = db.Column(db.Text, default=lambda: datetime.utcnow().isoformat())
-    updated_at = db.Column(db.Text, default=lambda: datetime.utcnow().isoformat())
+    # near-duplicate clustering (see dedupe.py): the cluster's canonical
+    # article, NULL when this article is canonical; MinHash signature bytes
+    canonical_id = db.Column(db.Integer, db.ForeignKey("articles.id"), index=True)
+    minhash = db.Column(db.LargeBinary)
+    inserted_at = db.Column(UtcDateTime, default=utcnow)
+    updated_at = db.Column(UtcDateTime, default=utcnow)
+    # the body lives in `article_contents` so list reads never page it in
+    body = db.relationship("ArticleContent", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+
+    @property
+    def content(self):
+        return self.body.content if self.body is not None else None
+
+    @content.setter
+    def content(self, value):
+        if value is None:
+            self.body = None
+        elif self.body is None:
+            self.body = ArticleContent(content=value, digest=content_digest(value))
+        else:
+            self.body.content = value
+            self.body.digest = content_digest(value)
 
     def to_dict(self):
+        """List fields of the article; the body is left out (see `content`)."""
         return {
             "id": self.id,
             "url": self.url,
             "title": self.title,
             "description": self.description,
-            "content": self.content,
             "source_name": self.source_name,
             "author": self.author,
             "url_to_image": self.url_to_image,
-            "published_at": self.published_at,
+            "published_at": iso_utc(self.published_at),
             "summary_short": self.summary_short,
             "summary_long": self.summary_long,
+            "canonical_id": self.canonical_id,
         }
 
+
+class ArticleContent(db.Model):
+    """Compressed body of an article, one row per article that has one."""
+    __tablename__ = "article_contents"
+    article_id = db.Column(db.Integer, db.ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    content = db.Column(CompressedText, nullable=False)
+    # `content_digest` of the body, so upserts can skip unchanged bodies
+    # without decompressing them
+    digest = db.Column(db.String(40), nullable=False)
+
+
 class Day(db.Model):
     """Day table representing a date (replaces the old Today JSON row)."""
     __tablename__ = "days"
@@ -50,16 +181,25 @@ class Day(db.Model):
     date = db.Column(db.Date, unique=True, nullable=False)
     created_at = db.Column(db.Text, default=lambda: datetime.utcnow().isoformat())
     updated_at = db.Column(db.Text, default=lambda: datetime.utcnow().isoformat())
+    # id of the last IngestRun that touched this day; compared with
+    # DayDigest.ingest_run_id to detect a stale digest
+    ingest_run_id = db.Column(db.Integer)
     top_articles = db.relationship("DayArticle", back_populates="day", cascade="all, delete-orphan")
 
     def to_dict(self):
-        return {"id": self.id, "date": self.date}
+        return {"id": self.id, "date": self.date, "ingest_run_id": self.ingest_run_id}
 
 class DayArticle(db.Model):
     """Association between a Day and an Article with category and rank."""
     __tablename__ = "day_articles"
+    # the read paths: a day's ranking, and a day's ranking within a category
+    __table_args__ = (
+        db.Index("ix_day_articles_day_id_rank", "day_id", "rank"),
+        db.Index("ix_day_articles_day_id_category_rank", "day_id", "category", "rank"),
+        db.Index("uq_day_articles_day_id_article_id", "day_id", "article_id", unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    day_id = db.Column(db.Integer, db.ForeignKey("days.id"), nullable=False, index=True)
+    day_id = db.Column(db.Integer, db.ForeignKey("days.id"), nullable=False)
     article_id = db.Column(db.Integer, db.ForeignKey("articles.id"), nullable=False, index=True)
     rank = db.Column(db.Integer, nullable=False, default=0)
     category = db.Column(db.Text, nullable=False, default="general")
@@ -68,5 +208,39 @@ class DayArticle(db.Model):
 
     day = db.relationship("Day", back_populates="top_articles")
     article = db.relationship("Article")
-    
 
+
+class SummaryCache(db.Model):
+    """Persisted summaries keyed by a hash of the normalized input text and model."""
+    __tablename__ = "summary_cache"
+    key = db.Column(db.String(64), primary_key=True)
+    model = db.Column(db.Text, nullable=False)
+    summary = db.Column(db.Text, nullable=False)
+    input_chars = db.Column(db.Integer)
+    created_at = db.Column(db.Text, default=lambda: datetime.utcnow().isoformat())
+
+
+class IngestRun(db.Model):
+    """One execution of `pushnews.main()`; its id is the ingest version stamp."""
+    __tablename__ = "ingest_runs"
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    article_count = db.Column(db.Integer, default=0)
+    started_at = db.Column(db.Text, default=lambda: datetime.utcnow().isoformat())
+    finished_at = db.Column(db.Text)
+
+
+class DayDigest(db.Model):
+    """Materialized read model for a day, rebuilt by `pushnews` after ingest.
+
+    `categories` is a JSON object: {category: {"top": headline, "top_n": [headline, ...]}}.
+    """
+    __tablename__ = "day_digests"
+    id = db.Column(db.Integer, primary_key=True)
+    day_id = db.Column(db.Integer, db.ForeignKey("days.id"), nullable=False, unique=True)
+    ingest_run_id = db.Column(db.Integer, nullable=False)
+    summary = db.Column(db.Text)
+    summary_source = db.Column(db.Text)
+    article_count = db.Column(db.Integer, default=0)
+    categories = db.Column(db.Text)
+    created_at = db.Column(db.Text, default=lambda: datetime.utcnow().isoformat())
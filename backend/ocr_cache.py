@@ -0,0 +1,254 @@
+"""On-disk cache of `/convert` results keyed by the uploaded image.
+
+Users often re-upload the same page (retries, several people photographing the
+same paper). Before queueing OCR, `/convert` looks the upload up here:
+
+- exact hit: SHA-256 of the image bytes (plus the Tesseract language)
+- near hit (off by default): a 64-bit difference hash (dHash) of the image
+  within `OCR_CACHE_PHASH_DISTANCE` bits (default 0, exact matches only), so a
+  re-encoded or slightly rescaled copy of the same photo also hits. Pages
+  sharing a layout often have dHashes a few bits apart, so a near candidate
+  is only served after a 64x64 grayscale thumbnail stored with it matches:
+  no 8x8 block may differ by more than `OCR_CACHE_NEAR_MAX_DIFF` grey levels
+  on average (default 4; re-encoded copies stay under 2, a page with one
+  story changed is above 6)
+
+Each result is one JSON file in `OCR_CACHE_DIR` (default
+`<tmp>/newsapp-ocr-cache`) named `<sha256>-<lang>-<dhash>.json`, so the index
+is rebuilt from a directory listing without opening the files. The directory
+is capped at `OCR_CACHE_MAX_BYTES` (default 64MB); hits touch the file's
+mtime and the oldest files are evicted first (LRU by mtime). Being on disk,
+the cache is shared by every worker process on the host.
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+
+# Tesseract language names ("eng", "chi_sim", "eng+deu"); anything else is
+# rejected before it reaches a cache file name or the OCR process
+LANG_PATTERN = re.compile(r"[A-Za-z0-9_+]+")
+
+THUMB_SIZE = 64
+THUMB_BLOCK = 8
+
+
+def valid_lang(lang: str) -> bool:
+	return lang is None or bool(LANG_PATTERN.fullmatch(lang))
+
+
+def image_sha256(data: bytes) -> str:
+	return hashlib.sha256(data).hexdigest()
+
+
+def image_fingerprint(data: bytes):
+	"""Return `(dhash, thumbnail)` of an encoded image, or None.
+
+	`dhash` is the 64-bit difference hash used to find near candidates;
+	`thumbnail` is the `THUMB_SIZE` square grayscale image (bytes) used to
+	confirm them.
+	"""
+	try:
+		from PIL import Image
+
+		img = Image.open(io.BytesIO(data))
+		# JPEG can decode straight to a reduced scale image, far cheaper than a full decode
+		img.draft("L", (THUMB_SIZE * 2, THUMB_SIZE * 2))
+		img = img.convert("L")
+		pixels = list(img.resize((9, 8), Image.BILINEAR).getdata())
+		thumb = img.resize((THUMB_SIZE, THUMB_SIZE), Image.BILINEAR).tobytes()
+	except Exception:
+		return None
+	bits = 0
+	for row in range(8):
+		for col in range(8):
+			bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+	return bits, thumb
+
+
+def thumb_distance(a: bytes, b: bytes) -> float:
+	"""Largest mean absolute grey-level difference over the 8x8 blocks of two
+	thumbnails; a change confined to one story still shows up."""
+	n, k = THUMB_SIZE, THUMB_BLOCK
+	worst = 0.0
+	for by in range(0, n, k):
+		for bx in range(0, n, k):
+			total = 0
+			for y in range(by, by + k):
+				row = y * n
+				total += sum(abs(p - q) for p, q in zip(a[row + bx:row + bx + k], b[row + bx:row + bx + k]))
+			worst = max(worst, total / (k * k))
+	return worst
+
+
+class OcrCache:
+	def __init__(self, directory: str = None, max_bytes: int = None, phash_distance: int = None, near_max_diff: float = None):
+		self.directory = directory or os.getenv("OCR_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "newsapp-ocr-cache")
+		self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("OCR_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+		self.phash_distance = phash_distance if phash_distance is not None else int(os.getenv("OCR_CACHE_PHASH_DISTANCE", "0"))
+		self.near_max_diff = near_max_diff if near_max_diff is not None else float(os.getenv("OCR_CACHE_NEAR_MAX_DIFF", "4"))
+		self._lock = threading.Lock()
+		self._index = None  # {(sha, lang): (dhash, filename)}
+		self.hits = 0
+		self.near_hits = 0
+		self.near_rejected = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def _load_index(self):
+		if self._index is not None:
+			return self._index
+		index = {}
+		try:
+			os.makedirs(self.directory, exist_ok=True)
+			names = os.listdir(self.directory)
+		except OSError:
+			names = []
+		for name in names:
+			if not name.endswith(".json"):
+				continue
+			try:
+				sha, lang, dhash = name[:-5].split("-")
+				index[(sha, lang)] = (int(dhash, 16) if dhash != "x" else None, name)
+			except ValueError:
+				continue
+		self._index = index
+		return index
+
+	def lookup(self, data: bytes, lang: str = None):
+		"""Return `(record, sha, fingerprint)`; `record` is None on a miss.
+
+		`sha` and `fingerprint` (see `image_fingerprint`; None when near
+		matching is off) are returned so the caller can `put()` the result
+		later without hashing the image again. A `lang` that is not a valid
+		Tesseract language name is never cached.
+		"""
+		sha = image_sha256(data)
+		if not valid_lang(lang):
+			self.misses += 1
+			return None, sha, None
+		lang = lang or "default"
+		with self._lock:
+			index = self._load_index()
+			hit = index.get((sha, lang))
+		if hit is not None:
+			record = self._read(hit[1])
+			if record is not None:
+				self.hits += 1
+				return record, sha, None
+		fingerprint = image_fingerprint(data) if self.phash_distance > 0 else None
+		if fingerprint is not None:
+			dhash, thumb = fingerprint
+			with self._lock:
+				candidates = sorted(
+					(bin(dhash ^ h).count("1"), name)
+					for (_, l), (h, name) in self._index.items()
+					if l == lang and h is not None
+				)
+			for distance, name in candidates:
+				if distance > self.phash_distance:
+					break
+				record = self._read(name, touch=False)
+				if record is None:
+					continue
+				stored = base64.b64decode(record.get("thumb") or "")
+				if len(stored) != len(thumb) or thumb_distance(thumb, stored) > self.near_max_diff:
+					self.near_rejected += 1
+					continue
+				self._read(name)
+				self.near_hits += 1
+				return record, sha, fingerprint
+		self.misses += 1
+		return None, sha, fingerprint
+
+	def _read(self, name: str, touch: bool = True):
+		path = os.path.join(self.directory, name)
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				record = json.load(f)
+			if touch:
+				os.utime(path, None)
+			return record
+		except (OSError, ValueError):
+			with self._lock:
+				for key in [k for k, v in (self._index or {}).items() if v[1] == name]:
+					del self._index[key]
+			return None
+
+	def put(self, sha: str, fingerprint, lang: str, record: dict):
+		"""Store `record` (text, summary, ...) for the image `sha`.
+
+		`fingerprint` is the one returned by `lookup`, or None.
+		"""
+		if not valid_lang(lang):
+			return
+		lang = lang or "default"
+		dhash = fingerprint[0] if fingerprint else None
+		name = f"{sha}-{lang}-{dhash:016x}.json" if dhash is not None else f"{sha}-{lang}-x.json"
+		record = dict(record, cached_at=time.time())
+		if fingerprint:
+			record["thumb"] = base64.b64encode(fingerprint[1]).decode("ascii")
+		try:
+			os.makedirs(self.directory, exist_ok=True)
+			fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				json.dump(record, f)
+			os.replace(tmp, os.path.join(self.directory, name))
+		except OSError:
+			return
+		with self._lock:
+			self._load_index()[(sha, lang)] = (dhash, name)
+		self._evict()
+
+	def _evict(self):
+		try:
+			files = []
+			for entry in os.scandir(self.directory):
+				if entry.name.endswith(".json"):
+					st = entry.stat()
+					files.append((st.st_mtime, st.st_size, entry.name))
+		except OSError:
+			return
+		total = sum(size for _, size, _ in files)
+		if total <= self.max_bytes:
+			return
+		files.sort()
+		evicted = set()
+		for _, size, name in files:
+			if total <= self.max_bytes:
+				break
+			try:
+				os.remove(os.path.join(self.directory, name))
+			except OSError:
+				continue
+			total -= size
+			evicted.add(name)
+		with self._lock:
+			for key in [k for k, v in self._index.items() if v[1] in evicted]:
+				del self._index[key]
+			self.evictions += len(evicted)
+
+	def stats(self) -> dict:
+		with self._lock:
+			entries = len(self._load_index())
+		lookups = self.hits + self.near_hits + self.misses
+		return {
+			"directory": self.directory,
+			"entries": entries,
+			"max_bytes": self.max_bytes,
+			"hits": self.hits,
+			"near_hits": self.near_hits,
+			"near_rejected": self.near_rejected,
+			"misses": self.misses,
+			"evictions": self.evictions,
+			"hit_ratio": round((self.hits + self.near_hits) / lookups, 4) if lookups else None,
+		}
+
+
+ocr_cache = OcrCache()
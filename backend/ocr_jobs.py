@@ -0,0 +1,249 @@
+"""Background OCR jobs for `/convert`.
+
+Tesseract is slow on full newspaper pages, so `/convert` no longer runs it in
+the request worker. `OcrJobQueue.submit()` returns a job id immediately; a
+bounded process pool runs `helpers._ocr_image`, and a small thread pool then
+summarizes the text. Clients poll `GET /convert/<job_id>` for the result.
+
+Configuration (environment variables):
+  - `OCR_WORKERS` concurrent OCR jobs, one process each (default 2); the
+    remaining cores are used to OCR a page's column tiles in parallel
+  - `OCR_MAX_QUEUE` unfinished jobs before new submissions are
+    rejected with `QueueFull` (default 32)
+  - `OCR_JOB_TTL` seconds finished jobs are kept for polling (default 600)
+
+Jobs live in the memory of the process that accepted them, so with several
+gunicorn workers the status URL must reach the same worker (sticky sessions
+or a single worker process).
+
+A Tesseract crash breaks the whole process pool (`BrokenProcessPool`); the
+pool is then replaced so later jobs run on fresh workers.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+	from .helpers import _ocr_image
+except ImportError:
+	from helpers import _ocr_image
+
+
+class QueueFull(Exception):
+	"""Raised by `OcrJobQueue.submit` when the queue is at capacity."""
+
+
+class OcrUnavailable(Exception):
+	"""Raised by `OcrJobQueue.submit` when the OCR pool can't take the job."""
+
+
+def _run_ocr(path, lang: str = None):
+	"""Process-pool entry point: OCR `path` and report how long each stage took."""
+	started = time.time()
+	stages = {}
+	text, err = _ocr_image(path, lang=lang, timings=stages)
+	return text, err, started, time.time(), stages
+
+
+class OcrJobQueue:
+	def __init__(self, summarize=None, max_workers: int = None, max_queue: int = None, job_ttl: float = None):
+		"""`summarize(text) -> (summary, source)` runs on a thread after OCR."""
+		self.summarize = summarize
+		self.max_workers = max_workers or int(os.getenv("OCR_WORKERS", "2"))
+		self.max_queue = max_queue or int(os.getenv("OCR_MAX_QUEUE", "32"))
+		self.job_ttl = job_ttl or float(os.getenv("OCR_JOB_TTL", "600"))
+		self._ocr_pool = None
+		self._post_pool = None
+		self._jobs = {}
+		self._callbacks = {}
+		self._lock = threading.Lock()
+		self._pool_lock = threading.Lock()
+		self.submitted = 0
+		self.completed = 0
+		self.failed = 0
+		self.rejected = 0
+		self.cached = 0
+		self.pool_restarts = 0
+		self._ocr_seconds = 0.0
+		self._total_seconds = 0.0
+
+	def _pools(self):
+		# created lazily so importing the routes doesn't fork workers
+		with self._pool_lock:
+			if self._ocr_pool is None:
+				self._ocr_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+			if self._post_pool is None:
+				self._post_pool = ThreadPoolExecutor(max_workers=max(2, self.max_workers))
+		return self._ocr_pool, self._post_pool
+
+	def _replace_broken_pool(self, pool):
+		"""Drop `pool` (if it is still current) so `_pools()` starts a new one."""
+		with self._pool_lock:
+			if self._ocr_pool is not pool:
+				return
+			self._ocr_pool = None
+			self.pool_restarts += 1
+		pool.shutdown(wait=False, cancel_futures=True)
+
+	def depth(self) -> int:
+		"""Number of jobs not finished yet (queued/in OCR or summarizing)."""
+		return sum(1 for j in self._jobs.values() if j["status"] in ("queued", "summarizing"))
+
+	def submit(self, image, lang: str = None, cleanup: bool = True, on_done=None) -> str:
+		"""Queue OCR of `image` and return the job id.
+
+		`image` is either the encoded image bytes (sent to the OCR process
+		without touching disk) or a file path. For a path, `cleanup` deletes
+		the file once the job finishes.
+		`on_done(job)` is called after a job completes successfully (used to
+		fill the OCR result cache).
+		Raises `QueueFull` when `OCR_MAX_QUEUE` jobs are already pending and
+		`OcrUnavailable` when the job could not be handed to the OCR pool
+		(it is then recorded as failed and does not count toward the queue).
+		"""
+		with self._lock:
+			self._prune()
+			if self.depth() >= self.max_queue:
+				self.rejected += 1
+				raise QueueFull(f"OCR queue is full ({self.max_queue} jobs)")
+			job_id = uuid.uuid4().hex
+			self._jobs[job_id] = {"id": job_id, "status": "queued", "submitted_at": time.time()}
+			self.submitted += 1
+		if on_done is not None:
+			self._callbacks[job_id] = on_done
+		cleanup_path = image if cleanup and isinstance(image, str) else None
+		future = None
+		# one retry: a pool broken by a crash (or shut down) is replaced first
+		for attempt in range(2):
+			ocr_pool, _ = self._pools()
+			try:
+				future = ocr_pool.submit(_run_ocr, image, lang)
+				break
+			except Exception as e:
+				self._replace_broken_pool(ocr_pool)
+				error = e
+		if future is None:
+			self._finish(self._jobs[job_id], error=f"OCR worker unavailable: {error}")
+			if cleanup_path:
+				try:
+					os.remove(cleanup_path)
+				except OSError:
+					pass
+			raise OcrUnavailable(f"OCR workers are unavailable: {error}")
+		future.add_done_callback(lambda f: self._on_ocr_done(job_id, f, cleanup_path, ocr_pool))
+		return job_id
+
+	def _on_ocr_done(self, job_id, future, cleanup_path, pool=None):
+		if cleanup_path:
+			try:
+				os.remove(cleanup_path)
+			except OSError:
+				pass
+		job = self._jobs.get(job_id)
+		if job is None:
+			return
+		try:
+			text, err, started, finished, stages = future.result()
+		except Exception as e:
+			if isinstance(e, BrokenProcessPool) and pool is not None:
+				self._replace_broken_pool(pool)
+			text, err, started, finished, stages = None, f"OCR worker failed: {e}", job["submitted_at"], time.time(), {}
+		job["timings"] = {
+			"queue_ms": round((started - job["submitted_at"]) * 1000, 1),
+			"ocr_ms": round((finished - started) * 1000, 1),
+			"stages": stages,
+		}
+		self._ocr_seconds += finished - started
+		if text is None:
+			self._finish(job, error=err)
+			return
+		if not text:
+			self._finish(job, error="No text found in image")
+			return
+		job["status"] = "summarizing"
+		job["text"] = text
+		_, post_pool = self._pools()
+		post_pool.submit(self._summarize_job, job)
+
+	def _summarize_job(self, job):
+		t0 = time.time()
+		try:
+			if self.summarize is not None:
+				job["summary"], job["summary_source"] = self.summarize(job["text"])
+		except Exception as e:
+			job["summary_error"] = str(e)
+		job["timings"]["summary_ms"] = round((time.time() - t0) * 1000, 1)
+		self._finish(job)
+
+	def _finish(self, job, error: str = None):
+		now = time.time()
+		job["finished_at"] = now
+		job.setdefault("timings", {})["total_ms"] = round((now - job["submitted_at"]) * 1000, 1)
+		self._total_seconds += now - job["submitted_at"]
+		if error:
+			job["status"] = "error"
+			job["error"] = error
+			self.failed += 1
+		else:
+			job["status"] = "done"
+			self.completed += 1
+		callback = self._callbacks.pop(job["id"], None)
+		if callback is not None and not error:
+			try:
+				callback(job)
+			except Exception:
+				pass
+
+	def add_cached(self, record: dict) -> str:
+		"""Register an already finished job built from a cached result."""
+		now = time.time()
+		job_id = uuid.uuid4().hex
+		job = {
+			"id": job_id,
+			"status": "done",
+			"cached": True,
+			"submitted_at": now,
+			"finished_at": now,
+			"text": record.get("text"),
+			"summary": record.get("summary"),
+			"summary_source": record.get("summary_source"),
+			"timings": {"total_ms": 0.0},
+		}
+		with self._lock:
+			self._prune()
+			self._jobs[job_id] = job
+			self.cached += 1
+		return job_id
+
+	def get(self, job_id: str):
+		"""Return a snapshot of the job, or None if unknown/expired."""
+		job = self._jobs.get(job_id)
+		return dict(job) if job else None
+
+	def _prune(self):
+		cutoff = time.time() - self.job_ttl
+		for job_id in [k for k, j in self._jobs.items() if j.get("finished_at") and j["finished_at"] < cutoff]:
+			del self._jobs[job_id]
+
+	def stats(self) -> dict:
+		with self._lock:
+			queued = sum(1 for j in self._jobs.values() if j["status"] == "queued")
+			summarizing = sum(1 for j in self._jobs.values() if j["status"] == "summarizing")
+		finished = self.completed + self.failed
+		return {
+			"workers": self.max_workers,
+			"max_queue": self.max_queue,
+			"queued": queued,
+			"summarizing": summarizing,
+			"submitted": self.submitted,
+			"completed": self.completed,
+			"failed": self.failed,
+			"rejected": self.rejected,
+			"cached": self.cached,
+			"pool_restarts": self.pool_restarts,
+			"avg_ocr_ms": round(self._ocr_seconds / finished * 1000, 1) if finished else None,
+			"avg_total_ms": round(self._total_seconds / finished * 1000, 1) if finished else None,
+		}
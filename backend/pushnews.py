@@ -6,6 +6,10 @@ This script will:
 - Create a Flask app and initialize `models.db` from the environment.
 - Upsert `Article` rows by `url` and create or update the `Day` and
   `DayArticle` associations for today's date.
+- Cluster near-duplicate articles (the same wire story from several
+  outlets, see `dedupe.py`) so each story is ranked once.
+- Materialize the day's digest (combined summary, per-category top lists and
+  per-article short summaries) so the `/today*` read endpoints are lookups.
 
 Usage:
   - Set `NEWSAPI_KEY` environment variable to your NewsAPI key.
@@ -16,12 +20,17 @@ Usage:
 """
 import os
 import sys
-from datetime import date
-import requests
+from datetime import date, timedelta
 
 from flask import Flask
 
 import models
+import db_ops
+import helpers
+import dedupe
+from categories import CATEGORY_KEYWORDS, primary_category
+from category_index import HeadlineIndex
+from http_client import http_client
 
 
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
@@ -39,7 +48,7 @@ def _fetch_top_headlines(api_key: str, country: str = "us", page_size: int = 20)
     url, publishedAt.
     """
     params = {"apiKey": api_key, "country": country, "pageSize": page_size}
-    resp = requests.get(TOP_HEADLINES_URL, params=params, timeout=10)
+    resp = http_client.get(TOP_HEADLINES_URL, params=params)
     resp.raise_for_status()
     data = resp.json()
     articles = data.get("articles") or []
@@ -57,22 +66,6 @@ def _fetch_top_headlines(api_key: str, country: str = "us", page_size: int = 20)
     return out
 
 
-def _simple_category(title: str, description: str) -> str:
-    """Very small heuristic to classify into a few categories used by the UI.
-
-    Returns one of: 'economy', 'health', 'defense', 'general'.
-    """
-    txt = (title or "") + " " + (description or "")
-    t = txt.lower()
-    if any(k in t for k in ["econom", "market", "inflation", "stocks", "trade", "economy"]):
-        return "economy"
-    if any(k in t for k in ["health", "covid", "vaccine", "hospital", "disease", "mental health"]):
-        return "health"
-    if any(k in t for k in ["defense", "military", "army", "navy", "air force", "war", "troop"]):
-        return "defense"
-    return "general"
-
-
 def _make_app_and_init_db():
     """Create a minimal Flask app configured to initialize `models.db`.
 
@@ -94,6 +87,105 @@ def _make_app_and_init_db():
     return app
 
 
+def _dedupe(session, article_ids, day):
+    """Cluster this run's articles with those ranked in the last
+    `DEDUPE_WINDOW_DAYS` days and store `canonical_id` and signatures.
+
+    `article_ids` are in rank order, so the best-ranked article of a new
+    cluster becomes canonical. Returns `{article_id: cluster root id}` for
+    this run's articles and the recent ones they were compared with.
+    """
+    if not dedupe.available():
+        return {}
+    article_ids = list(dict.fromkeys(article_ids))
+    run = set(article_ids)
+    rows = db_ops.get_dedupe_rows(session=session, since=day - timedelta(days=dedupe.DEDUPE_WINDOW_DAYS), ids=article_ids)
+    sigs = {}
+    changes = []
+    for row in rows:
+        # this run's articles may have new text; older ones reuse their stored signature
+        sig = dedupe.from_bytes(row["minhash"]) if row["id"] not in run else None
+        if sig is None:
+            sig = dedupe.signature(row["title"], row["description"], row["content"], row["source_name"])
+            if sig is not None and row["id"] not in run:
+                changes.append({"id": row["id"], "canonical_id": row["canonical_id"], "minhash": dedupe.to_bytes(sig)})
+        sigs[row["id"]] = sig
+    existing = [(row["id"], row["canonical_id"], sigs[row["id"]]) for row in rows if row["id"] not in run]
+    canonical = dedupe.cluster(existing, [(i, sigs.get(i)) for i in article_ids])
+    for article_id, canonical_id in canonical.items():
+        sig = sigs.get(article_id)
+        changes.append({
+            "id": article_id,
+            "canonical_id": canonical_id,
+            "minhash": dedupe.to_bytes(sig) if sig is not None else None,
+        })
+    db_ops.save_article_clusters(session=session, clusters=changes, commit=False)
+    roots = {row["id"]: row["canonical_id"] or row["id"] for row in rows}
+    roots.update({article_id: canonical_id or article_id for article_id, canonical_id in canonical.items()})
+    return roots
+
+
+def _materialize_digest(session, day, ingest_run_id: int):
+    """Post-ingest stage: build and store the read model for `day`.
+
+    Stores a `DayDigest` (combined headline summary plus per-category top-N
+    lists, stamped with `ingest_run_id`) and fills `Article.summary_short`
+    for articles that don't have one yet, copying it from the canonical
+    article for near-duplicates.
+    """
+    top_n = int(os.getenv("DIGEST_TOP_N", "10"))
+    headlines = db_ops.get_day_headlines(session=session, day=day)
+
+    combined = helpers._headlines_text(headlines, max_articles=10)
+    summary, source = helpers._summarize_long(combined, max_chars=500)
+
+    recent = db_ops.get_day_articles(session=session, day=day, order="recent", as_tuples=True)
+    index = HeadlineIndex(headlines, newest_first=[row[3] for row in recent])
+    categories = {}
+    for cat in CATEGORY_KEYWORDS:
+        categories[cat] = {
+            "top": index.category_top(cat),
+            "top_n": index.category_top_n(cat, limit=top_n),
+        }
+
+    model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    unsummarized = [
+        entry.get("article") or {}
+        for entry in db_ops.get_day_articles(session=session, day=day, include_content=True)
+        if not (entry.get("article") or {}).get("summary_short")
+    ]
+    # a near-duplicate reuses its canonical article's summary
+    reused = db_ops.get_canonical_summaries(session=session, ids=[art.get("id") for art in unsummarized])
+    article_summaries = [dict(reused[art["id"]], id=art["id"]) for art in unsummarized if art.get("id") in reused]
+    pending = []
+    for art in unsummarized:
+        text = art.get("content") or art.get("description") or art.get("title")
+        if text and art.get("id") not in reused:
+            pending.append((art.get("id"), text))
+    batch = helpers._summarize_batch([text for _, text in pending], max_chars=400)
+    article_summaries += [
+        {
+            "id": article_id,
+            "summary_short": art_summary,
+            "summary_model": model if art_source == "openai" else "naive",
+        }
+        for (article_id, _), (art_summary, art_source) in zip(pending, batch)
+    ]
+    db_ops.bulk_save_article_summaries(session=session, summaries=article_summaries, commit=False)
+
+    db_ops.save_day_digest(
+        session=session,
+        day=day,
+        ingest_run_id=ingest_run_id,
+        summary=summary,
+        summary_source=source,
+        article_count=len(headlines),
+        categories=categories,
+        commit=False,
+    )
+    session.commit()
+
+
 def main():
     # Limit headlines to US only per user's request
     country = "us"
@@ -112,65 +204,61 @@ def main():
 
     with app.app_context():
         session = models.db.session
+        today_dt = date.today()
         try:
-            # Upsert articles
-            article_objs = []
-            for a in articles:
-                url = a.get("url")
-                if not url:
-                    continue
-                existing = session.query(models.Article).filter_by(url=url).first()
-                if existing:
-                    # update some useful fields
-                    existing.title = a.get("title") or existing.title
-                    existing.description = a.get("description") or existing.description
-                    existing.source_name = a.get("source") or existing.source_name
-                    existing.author = a.get("author") or existing.author
-                    existing.published_at = a.get("publishedAt") or existing.published_at
-                    existing.url_to_image = a.get("urlToImage") or existing.url_to_image
-                    article_obj = existing
-                else:
-                    article_obj = models.Article(
-                        url=url,
-                        title=a.get("title"),
-                        description=a.get("description"),
-                        source_name=a.get("source"),
-                        author=a.get("author"),
-                        published_at=a.get("publishedAt"),
-                        url_to_image=a.get("urlToImage"),
-                    )
-                    session.add(article_obj)
-                article_objs.append(article_obj)
-
-            # Flush so new Article ids are available
-            session.flush()
+            run = db_ops.start_ingest_run(session=session, day=today_dt, commit=False)
+
+            # Upsert all articles in bulk (one IN lookup, multi-row inserts)
+            items = [
+                {
+                    "url": a.get("url"),
+                    "title": a.get("title"),
+                    "description": a.get("description"),
+                    "source_name": a.get("source"),
+                    "author": a.get("author"),
+                    "published_at": a.get("publishedAt"),
+                    "url_to_image": a.get("urlToImage"),
+                }
+                for a in articles
+                if a.get("url")
+            ]
+            ids = db_ops.bulk_upsert_articles(session=session, items=items, commit=False)
+
+            # Cluster near-duplicates (the same story from several outlets)
+            run_ids = [ids[item["url"]] for item in items if item["url"] in ids]
+            roots = _dedupe(session, run_ids, today_dt)
 
             # Ensure Day for today exists
-            today_dt = date.today()
-            day = session.query(models.Day).filter_by(date=today_dt).first()
-            if not day:
-                day = models.Day(date=today_dt)
-                session.add(day)
-                session.flush()
-
-            # Create or update DayArticle associations (ranked by position from API)
-            for idx, art in enumerate(article_objs, start=1):
-                if art is None or art.id is None:
+            day = db_ops.ensure_day(session=session, day=today_dt, commit=False)
+
+            # Create or update DayArticle associations (ranked by position
+            # from API), keeping only the best-ranked article of each cluster
+            entries = []
+            # stories already ranked today by an earlier run count as ranked
+            earlier = {row[2] for row in db_ops.get_day_articles(session=session, day=today_dt, as_tuples=True)}
+            ranked_roots = {roots.get(i, i) for i in earlier - set(run_ids)}
+            for item in items:
+                if item["url"] not in ids:
+                    continue
+                article_id = ids[item["url"]]
+                root = roots.get(article_id, article_id)
+                if root in ranked_roots:
                     continue
-                # Find or create mapping
-                da = (
-                    session.query(models.DayArticle)
-                    .filter_by(day_id=day.id, article_id=art.id)
-                    .first()
-                )
-                cat = _simple_category(getattr(art, "title", None), getattr(art, "description", None))
-                if da:
-                    da.rank = idx
-                    da.category = cat
-                else:
-                    da = models.DayArticle(day_id=day.id, article_id=art.id, rank=idx, category=cat)
-                    session.add(da)
+                ranked_roots.add(root)
+                entries.append({
+                    "article_id": article_id,
+                    "rank": len(entries) + 1,
+                    "category": primary_category(item.get("title"), item.get("description")),
+                })
+            db_ops.reconcile_day_articles(session=session, day_row=day, entries=entries, commit=False)
+            ranked = {e["article_id"] for e in entries}
+            duplicates = [i for i in set(run_ids) if i not in ranked]
+            # an article may have been ranked by an earlier run before its duplicate was seen
+            db_ops.remove_day_articles(session=session, day_row=day, article_ids=duplicates, commit=False)
+            if duplicates:
+                print(f"Skipped {len(duplicates)} near-duplicate articles.")
 
+            db_ops.finish_ingest_run(session=session, run=run, day_row=day, article_count=len(ids), commit=False)
             session.commit()
         except SQLAlchemyError as e:
             session.rollback()
@@ -181,6 +269,15 @@ def main():
             print("Unexpected error during upsert:", e)
             sys.exit(5)
 
+        # The ingest itself is committed; a failed digest only leaves the
+        # read endpoints computing on the fly until the next run.
+        print("Materializing daily digest...")
+        try:
+            _materialize_digest(session, today_dt, run.id)
+        except Exception as e:
+            session.rollback()
+            print("Failed to materialize digest:", e)
+
     print("Done.")
 
 
@@ -0,0 +1,404 @@
+"""Archive-wide passage retrieval for `/ask`.
+
+Every stored article is split into passages (title and description first,
+then the body, `RETRIEVAL_PASSAGE_TOKENS` tokens each, at most
+`RETRIEVAL_MAX_PASSAGES` per article) and indexed in memory:
+
+- BM25 postings as flat NumPy arrays (CSR by term: passage ids and
+  precomputed BM25 weights, highest weight first), so scoring a query is a
+  concatenation of a few slices plus one `bincount`. At most
+  `RETRIEVAL_MAX_POSTINGS` postings are read per term, which bounds the cost
+  of common words independently of the archive size
+- optionally (`RETRIEVAL_EMBED_DIM`, default 0 = off) a dense matrix of
+  hashed TF-IDF vectors, searched brute force and merged with the BM25
+  ranking by reciprocal rank fusion
+
+Passage text is not kept in memory; the articles behind the top passages are
+re-read and re-split when a query is answered.
+
+The index is built in a background thread on first use and rebuilt whenever
+the ingest generation (latest `ingest_runs` id) moves; the previous index
+keeps serving until the new one is ready. Until the first build finishes
+`retrieve()` returns None and `/ask` uses the day's headlines as before.
+"""
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+from datetime import date
+
+from flask import current_app, has_app_context
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+try:
+	from .chunking import chunk_text, count_tokens
+	from .extractive import STOPWORDS
+except ImportError:
+	from chunking import chunk_text, count_tokens
+	from extractive import STOPWORDS
+
+RETRIEVAL_PASSAGE_TOKENS = int(os.getenv("RETRIEVAL_PASSAGE_TOKENS", "200"))
+RETRIEVAL_MAX_PASSAGES = int(os.getenv("RETRIEVAL_MAX_PASSAGES", "4"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+RETRIEVAL_CONTEXT_TOKENS = int(os.getenv("RETRIEVAL_CONTEXT_TOKENS", "1500"))
+RETRIEVAL_EMBED_DIM = int(os.getenv("RETRIEVAL_EMBED_DIM", "0"))
+# postings read per query term; lists are impact ordered, so only the
+# lowest-weight matches of very common terms are skipped
+RETRIEVAL_MAX_POSTINGS = int(os.getenv("RETRIEVAL_MAX_POSTINGS", "20000"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# reciprocal rank fusion constant and candidates taken from each ranking
+RRF_K = 60
+FUSION_CANDIDATES = 100
+# passages of one article allowed in a single context
+MAX_PASSAGES_PER_ARTICLE = 2
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+
+def _db_ops():
+	try:
+		from . import db_ops
+	except ImportError:
+		import db_ops
+	return db_ops
+
+
+def tokenize(text: str) -> list:
+	"""Lowercased non-stopword terms, cut to 6 letters (the extractive summarizer's stemmer)."""
+	return [w[:6] for w in _WORD.findall((text or "").lower()) if w not in STOPWORDS]
+
+
+def split_passages(title: str, description: str, content: str) -> list:
+	"""The passages indexed for one article; `retrieve()` relies on this being deterministic."""
+	head = ". ".join(p.strip() for p in (title, description) if p and p.strip())
+	text = "\n\n".join(p for p in (head, (content or "").strip()) if p)
+	return chunk_text(text, RETRIEVAL_PASSAGE_TOKENS)[:RETRIEVAL_MAX_PASSAGES]
+
+
+def _day_ordinal(d) -> int:
+	if not d:
+		return 0
+	if isinstance(d, str):
+		d = date.fromisoformat(d)
+	return d.toordinal()
+
+
+class PassageIndex:
+	"""Immutable BM25 index (plus optional hashed embeddings) over passages."""
+
+	def __init__(self, vocab, indptr, post_passages, post_weights, idf, passage_article, passage_no, day_articles,
+			embeddings=None, term_bucket=None, term_sign=None, generation=0):
+		self.vocab = vocab
+		self.indptr = indptr
+		self.post_passages = post_passages
+		self.post_weights = post_weights
+		self.idf = idf
+		self.passage_article = passage_article
+		self.passage_no = passage_no
+		# day ordinal -> sorted ids of the articles ranked that day
+		self.day_articles = day_articles
+		self.embeddings = embeddings
+		self.term_bucket = term_bucket
+		self.term_sign = term_sign
+		self.generation = generation
+
+	@property
+	def size(self) -> int:
+		return len(self.passage_article)
+
+	@classmethod
+	def build(cls, rows, generation: int = 0, embed_dim: int = 0, article_days=None):
+		"""Index `rows` of `(article_id, date, title, description, content)`.
+
+		`article_days` yields `(article_id, date)` for every day an article was
+		ranked on and feeds the `day` filter of `search()`; without it each
+		article counts only for the `date` in its row.
+		"""
+		vocab = {}
+		terms = array("i")
+		passages = array("i")
+		tfs = array("f")
+		lengths = array("i")
+		p_article = array("i")
+		p_no = array("h")
+		row_days = []
+		for article_id, day, title, description, content in rows:
+			title_terms = tokenize(title)
+			if article_days is None:
+				row_days.append((article_id, day))
+			for no, passage in enumerate(split_passages(title, description, content)):
+				# every passage carries its article's title so later passages stay findable
+				toks = tokenize(passage) + (title_terms if no else [])
+				counts = {}
+				for t in toks:
+					counts[t] = counts.get(t, 0) + 1
+				pid = len(p_article)
+				for t, c in counts.items():
+					terms.append(vocab.setdefault(t, len(vocab)))
+					passages.append(pid)
+					tfs.append(c)
+				lengths.append(len(toks))
+				p_article.append(article_id)
+				p_no.append(no)
+
+		day_articles = cls._group_days(row_days if article_days is None else article_days)
+		n = len(p_article)
+		if not n:
+			empty = np.zeros(0, dtype=np.int32)
+			return cls(vocab, np.zeros(1, dtype=np.int64), empty, np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32),
+				empty, empty.astype(np.int16), day_articles, generation=generation)
+		terms = np.frombuffer(terms, dtype=np.int32)
+		passages = np.frombuffer(passages, dtype=np.int32)
+		tfs = np.frombuffer(tfs, dtype=np.float32)
+		lengths = np.frombuffer(lengths, dtype=np.int32).astype(np.float32)
+
+		df = np.bincount(terms, minlength=len(vocab))
+		indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+		np.cumsum(df, out=indptr[1:])
+		idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+		avgdl = float(lengths.mean())
+		norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[passages] / max(avgdl, 1.0))
+		weights = (idf[terms] * tfs * (BM25_K1 + 1.0) / (tfs + norm)).astype(np.float32)
+		# group by term, highest weight first within a term (impact order)
+		order = np.lexsort((-weights, terms))
+		post_passages = passages[order]
+		post_weights = weights[order]
+
+		embeddings = term_bucket = term_sign = None
+		if embed_dim:
+			# signed feature hashing of each term into `embed_dim` buckets
+			hashes = np.fromiter((zlib.crc32(t.encode()) for t in vocab), dtype=np.uint32, count=len(vocab))
+			term_bucket = (hashes % embed_dim).astype(np.int32)
+			term_sign = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+			embeddings = np.zeros((n, embed_dim), dtype=np.float32)
+			np.add.at(embeddings, (passages, term_bucket[terms]), term_sign[terms] * np.log1p(tfs) * idf[terms])
+			norms = np.linalg.norm(embeddings, axis=1)
+			norms[norms == 0] = 1.0
+			embeddings /= norms[:, None]
+
+		return cls(
+			vocab, indptr, post_passages, post_weights, idf,
+			np.frombuffer(p_article, dtype=np.int32), np.frombuffer(p_no, dtype=np.int16), day_articles,
+			embeddings, term_bucket, term_sign, generation,
+		)
+
+	@staticmethod
+	def _group_days(pairs) -> dict:
+		"""`(article_id, date)` pairs -> `{day ordinal: sorted unique article ids}`."""
+		by_day = {}
+		for article_id, day in pairs:
+			if day:
+				by_day.setdefault(_day_ordinal(day), array("i")).append(article_id)
+		return {day: np.unique(np.frombuffer(ids, dtype=np.int32)) for day, ids in by_day.items()}
+
+	def _bm25(self, term_ids, day_ids=None):
+		"""Return `(passage_ids, scores)` for passages matching any term."""
+		slices = [(self.indptr[t], min(self.indptr[t + 1], self.indptr[t] + RETRIEVAL_MAX_POSTINGS)) for t in term_ids]
+		docs = np.concatenate([self.post_passages[a:b] for a, b in slices])
+		weights = np.concatenate([self.post_weights[a:b] for a, b in slices])
+		if len(docs) * 4 < self.size:
+			# few postings: aggregate just the candidates
+			ids, inverse = np.unique(docs, return_inverse=True)
+			scores = np.bincount(inverse, weights=weights)
+		else:
+			scores = np.bincount(docs, weights=weights, minlength=self.size)
+			ids = np.flatnonzero(scores)
+			scores = scores[ids]
+		if day_ids is not None:
+			keep = np.isin(self.passage_article[ids], day_ids)
+			ids, scores = ids[keep], scores[keep]
+		return ids, scores
+
+	def _embedding_scores(self, term_ids, day_ids=None):
+		query = np.zeros(self.embeddings.shape[1], dtype=np.float32)
+		np.add.at(query, self.term_bucket[term_ids], self.term_sign[term_ids] * self.idf[term_ids])
+		scores = self.embeddings @ query
+		if day_ids is not None:
+			scores[~np.isin(self.passage_article, day_ids)] = -np.inf
+		return scores
+
+	@staticmethod
+	def _top(ids, scores, k: int):
+		if len(ids) > k:
+			part = np.argpartition(-scores, k)[:k]
+			ids, scores = ids[part], scores[part]
+		order = np.argsort(-scores, kind="stable")
+		return ids[order], scores[order]
+
+	def search(self, query: str, k: int = RETRIEVAL_TOP_K, day=None) -> list:
+		"""Return up to `k` `(article_id, passage_no, score)`, best first.
+
+		`day` (date or ISO string) keeps only passages of articles ranked on
+		that day, including articles ranked again on later days.
+		"""
+		term_ids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+		if not term_ids or not self.size:
+			return []
+		day_ids = None
+		if day:
+			day_ids = self.day_articles.get(_day_ordinal(day))
+			if day_ids is None:
+				return []
+		ids, scores = self._bm25(term_ids, day_ids)
+		if self.embeddings is not None:
+			fused = {}
+			bm25_ids, _ = self._top(ids, scores, FUSION_CANDIDATES)
+			dense = self._embedding_scores(term_ids, day_ids)
+			dense_ids, dense_scores = self._top(np.arange(self.size), dense, FUSION_CANDIDATES)
+			dense_ids = dense_ids[dense_scores > 0]
+			for ranking in (bm25_ids, dense_ids):
+				for rank, pid in enumerate(ranking.tolist()):
+					fused[pid] = fused.get(pid, 0.0) + 1.0 / (RRF_K + rank + 1)
+			ids = np.fromiter(fused.keys(), dtype=np.int64, count=len(fused))
+			scores = np.fromiter(fused.values(), dtype=np.float64, count=len(fused))
+		ids, scores = self._top(ids, scores, k)
+		return [(int(self.passage_article[i]), int(self.passage_no[i]), float(s)) for i, s in zip(ids, scores)]
+
+	def nbytes(self) -> int:
+		arrays = (self.indptr, self.post_passages, self.post_weights, self.idf, self.passage_article, self.passage_no,
+			self.embeddings)
+		return sum(a.nbytes for a in arrays if a is not None) + sum(ids.nbytes for ids in self.day_articles.values())
+
+
+class Retriever:
+	"""Owns the current `PassageIndex` and rebuilds it after each ingest."""
+
+	def __init__(self, generation_check: float = None, embed_dim: int = None):
+		self.generation_check = generation_check if generation_check is not None else float(os.getenv("RETRIEVAL_GENERATION_CHECK", "30"))
+		self.embed_dim = RETRIEVAL_EMBED_DIM if embed_dim is None else embed_dim
+		self.index = None
+		self._lock = threading.Lock()
+		self._building = False
+		self._checked_at = 0.0
+		self.builds = 0
+		self.build_ms = None
+		self.build_error = None
+		self.queries = 0
+		self.total_ms = 0.0
+
+	def _maybe_rebuild(self):
+		"""Start a background build when the ingest generation moved (needs an app context)."""
+		now = time.monotonic()
+		if self._building or now - self._checked_at < self.generation_check or np is None or not has_app_context():
+			return
+		self._checked_at = now
+		try:
+			generation = _db_ops().get_ingest_generation()
+		except Exception:
+			return
+		if self.index is not None and self.index.generation == generation:
+			return
+		with self._lock:
+			if self._building:
+				return
+			self._building = True
+		app_obj = current_app._get_current_object()
+		threading.Thread(target=self._build, args=(app_obj, generation), daemon=True).start()
+
+	def _build(self, app_obj, generation: int):
+		started = time.monotonic()
+		try:
+			with app_obj.app_context():
+				db_ops = _db_ops()
+				index = PassageIndex.build(db_ops.iter_article_texts(), generation=generation, embed_dim=self.embed_dim,
+					article_days=db_ops.iter_article_days())
+			self.index = index
+			self.builds += 1
+			self.build_ms = round((time.monotonic() - started) * 1000, 1)
+			self.build_error = None
+		except Exception as e:
+			self.build_error = str(e)
+		finally:
+			self._building = False
+
+	def rebuild(self, generation: int = None):
+		"""Build the index synchronously (inside an app context)."""
+		if generation is None:
+			generation = _db_ops().get_ingest_generation()
+		with self._lock:
+			self._building = True
+		self._build(current_app._get_current_object(), generation)
+
+	def retrieve(self, query: str, day=None, k: int = None, max_tokens: int = None):
+		"""Return the best passages for `query` that fit in `max_tokens`.
+
+		Each passage is a dict with `text`, `tokens`, `score` and its
+		article's `url`, `title`, `description` and `date`. Returns None while
+		no index is available (still building, NumPy missing or no DB).
+		"""
+		self._maybe_rebuild()
+		index = self.index
+		if index is None:
+			return None
+		k = k or RETRIEVAL_TOP_K
+		max_tokens = max_tokens or RETRIEVAL_CONTEXT_TOKENS
+		started = time.monotonic()
+		# over-fetch so the per-article cap and the budget still leave k passages
+		hits = index.search(query, k=k * 2, day=day)
+		try:
+			articles = _db_ops().get_articles_by_id(ids={a for a, _, _ in hits}) if hits else {}
+		except Exception:
+			return None
+		out = []
+		used = 0
+		per_article = {}
+		split = {}
+		for article_id, no, score in hits:
+			art = articles.get(article_id)
+			if art is None or per_article.get(article_id, 0) >= MAX_PASSAGES_PER_ARTICLE:
+				continue
+			if article_id not in split:
+				split[article_id] = split_passages(art["title"], art["description"], art["content"])
+			if no >= len(split[article_id]):
+				# the article changed since the index was built
+				continue
+			text = split[article_id][no]
+			tokens = count_tokens(text)
+			if used + tokens > max_tokens:
+				continue
+			used += tokens
+			per_article[article_id] = per_article.get(article_id, 0) + 1
+			day_value = art["date"]
+			out.append({
+				"text": text,
+				"tokens": tokens,
+				"score": round(score, 4),
+				"url": art["url"],
+				"title": art["title"],
+				"description": art["description"],
+				"date": day_value.isoformat() if hasattr(day_value, "isoformat") else day_value,
+			})
+			if len(out) >= k:
+				break
+		self.queries += 1
+		self.total_ms += (time.monotonic() - started) * 1000
+		return out
+
+	def stats(self) -> dict:
+		index = self.index
+		return {
+			"ready": index is not None,
+			"building": self._building,
+			"generation": index.generation if index else None,
+			"passages": index.size if index else 0,
+			"terms": len(index.vocab) if index else 0,
+			"embedding_dim": int(index.embeddings.shape[1]) if index is not None and index.embeddings is not None else 0,
+			"bytes": index.nbytes() if index else 0,
+			"builds": self.builds,
+			"build_ms": self.build_ms,
+			"build_error": self.build_error,
+			"queries": self.queries,
+			"avg_ms": round(self.total_ms / self.queries, 2) if self.queries else None,
+		}
+
+
+retriever = Retriever()
@@ -0,0 +1,140 @@
+"""Process-wide cache of parsed robots.txt files.
+
+`helpers._allowed_by_robots()` used to download `/robots.txt` before every
+article fetch. This module keeps one parsed `RobotFileParser` per
+scheme+netloc so repeat fetches from the same publisher skip that round-trip.
+
+- Entries expire after `ROBOTS_TTL` seconds (default 3600).
+- Hosts whose robots.txt cannot be reached are cached as "allow all" for the
+  shorter `ROBOTS_NEGATIVE_TTL` (default 300) so a dead host isn't retried on
+  every fetch.
+- At most `ROBOTS_CACHE_SIZE` hosts are kept; the least recently used entry is
+  evicted first.
+- Concurrent lookups for the same host share a single download.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib import robotparser
+from urllib.parse import urlparse
+
+try:
+	from .http_client import http_client
+except ImportError:
+	from http_client import http_client
+
+
+class _Entry:
+	__slots__ = ("parser", "expires_at", "negative")
+
+	def __init__(self, parser, expires_at, negative):
+		self.parser = parser
+		self.expires_at = expires_at
+		self.negative = negative
+
+
+class RobotsCache:
+	"""LRU + TTL cache of `RobotFileParser` objects keyed by scheme+netloc."""
+
+	def __init__(self, ttl: float = None, negative_ttl: float = None, max_size: int = None, timeout: float = 5.0,
+			client=None):
+		self.ttl = ttl if ttl is not None else float(os.getenv("ROBOTS_TTL", "3600"))
+		self.negative_ttl = negative_ttl if negative_ttl is not None else float(os.getenv("ROBOTS_NEGATIVE_TTL", "300"))
+		self.max_size = max_size if max_size is not None else int(os.getenv("ROBOTS_CACHE_SIZE", "1024"))
+		self.timeout = timeout
+		self.client = client or http_client
+		self._entries = OrderedDict()
+		self._inflight = {}
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.negative_hits = 0
+		self.evictions = 0
+		self.fetch_seconds = 0.0
+
+	def can_fetch(self, url: str, user_agent: str = "*") -> bool:
+		"""Return True when robots.txt for `url`'s host allows `user_agent`."""
+		parsed = urlparse(url)
+		key = f"{parsed.scheme}://{parsed.netloc}".lower()
+		entry = self._get(key)
+		if entry.negative:
+			return True
+		return entry.parser.can_fetch(user_agent, url)
+
+	def _get(self, key: str) -> _Entry:
+		while True:
+			with self._lock:
+				entry = self._entries.get(key)
+				if entry is not None and entry.expires_at > time.monotonic():
+					self._entries.move_to_end(key)
+					self.hits += 1
+					if entry.negative:
+						self.negative_hits += 1
+					return entry
+				waiter = self._inflight.get(key)
+				if waiter is None:
+					# We are the leader for this host: download outside the lock.
+					waiter = threading.Event()
+					self._inflight[key] = waiter
+					self.misses += 1
+					break
+			# Another thread is already downloading this host's robots.txt.
+			waiter.wait(self.timeout * 2)
+
+		try:
+			entry = self._load(key)
+			with self._lock:
+				self._entries[key] = entry
+				self._entries.move_to_end(key)
+				while len(self._entries) > self.max_size:
+					self._entries.popitem(last=False)
+					self.evictions += 1
+			return entry
+		finally:
+			with self._lock:
+				self._inflight.pop(key, None)
+			waiter.set()
+
+	def _load(self, key: str) -> _Entry:
+		"""Download and parse `<key>/robots.txt`, mirroring `RobotFileParser.read`."""
+		rp = robotparser.RobotFileParser(f"{key}/robots.txt")
+		t0 = time.monotonic()
+		try:
+			resp = self.client.get(rp.url, timeout=self.timeout, max_bytes=512 * 1024)
+			if resp.status_code in (401, 403):
+				rp.disallow_all = True
+			elif 400 <= resp.status_code < 500:
+				rp.allow_all = True
+			elif resp.status_code >= 500:
+				return _Entry(None, time.monotonic() + self.negative_ttl, True)
+			else:
+				rp.parse(resp.content.decode("utf-8", errors="replace").splitlines())
+			rp.modified()
+			return _Entry(rp, time.monotonic() + self.ttl, False)
+		except Exception:
+			# Unreachable host or unparsable file: allow, but retry sooner.
+			return _Entry(None, time.monotonic() + self.negative_ttl, True)
+		finally:
+			self.fetch_seconds += time.monotonic() - t0
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self) -> dict:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"size": len(self._entries),
+				"max_size": self.max_size,
+				"hits": self.hits,
+				"misses": self.misses,
+				"negative_hits": self.negative_hits,
+				"evictions": self.evictions,
+				"hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+				"fetch_seconds": round(self.fetch_seconds, 3),
+			}
+
+
+robots_cache = RobotsCache()
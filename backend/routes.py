@@ -1,15 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, stream_with_context
 from flask_cors import CORS
 import os
-import tempfile
+import time
 from dotenv import load_dotenv
-from .helpers import _openai_available, _summarize_with_openai, _naive_summarize, _ocr_image, _fetch_and_extract, _ask_with_openai, _find_top_match, _parse_published_at, _find_top_matches
-from .db_ops import get_day_articles
+from .helpers import _openai_available, _summarize, SummaryBatcher, _summarize_long, _stream_summary, _stream_answer, _fetch_and_extract, _ask_with_openai, _fetch_many, _headlines_text
+from .robots_cache import robots_cache
+from .http_client import http_client
+from .summary_cache import summary_cache
+from .headline_cache import headline_cache
+from .category_index import HeadlineIndex
+from .ocr_jobs import OcrJobQueue, OcrUnavailable, QueueFull
+from .ocr_cache import ocr_cache, valid_lang
+from .model_client import model_client
+from .uploads import SpooledRequest, read_upload, iter_upload, UPLOAD_MAX_BYTES
+from .stt import transcribe_upload, SttError, SttUnavailable
+from .db_ops import get_day_articles, get_day_headlines, get_day_digest, get_article_content, get_article_summary, save_article_summary
+from .search_index import search_articles, SearchUnavailable
+from .retrieval import retriever
+from .digest_upgrader import digest_upgrader
 import json
 from datetime import date
 # Prefer SQLAlchemy models when available so we can use db.session instead of raw sqlite3.
 try:
-	from .models import db as models_db, Day, DayArticle, Article
+	from .models import db as models_db, Day, DayArticle, Article, iso_utc
 except Exception:
 	models_db = None
 
@@ -18,8 +31,17 @@ DB_PATH = os.getenv("DB_PATH") or os.path.join(os.path.dirname(__file__), "today
 
 load_dotenv()
 app = Flask(__name__)
+app.request_class = SpooledRequest
+app.config["MAX_CONTENT_LENGTH"] = UPLOAD_MAX_BYTES
 CORS(app)  # Enable CORS for all routes
 
+OCR_MAX_IMAGE_BYTES = int(os.getenv("OCR_MAX_IMAGE_BYTES", str(15 * 1024 * 1024)))
+
+
+@app.errorhandler(413)
+def too_large(e):
+	return jsonify({"error": e.description or "Upload too large"}), 413
+
 
 @app.route("/health", methods=["GET"])
 def health():
@@ -31,6 +53,25 @@ def health():
 	return jsonify({"status": "ok"})
 
 
+@app.route("/stats", methods=["GET"])
+def stats():
+	"""Return in-process cache counters for this worker.
+
+	Each gunicorn worker keeps its own caches, so numbers are per process.
+	"""
+	return jsonify({
+		"robots": robots_cache.stats(),
+		"http": http_client.stats(),
+		"summaries": summary_cache.stats(),
+		"headlines": headline_cache.stats(),
+		"ocr": ocr_queue.stats(),
+		"ocr_cache": ocr_cache.stats(),
+		"model": model_client.stats(),
+		"retrieval": retriever.stats(),
+		"digests": digest_upgrader.stats(),
+	})
+
+
 @app.route("/news", methods=["POST"])
 def news():
 	"""Summarize posted news text or accept audio uploads.
@@ -38,27 +79,31 @@ def news():
 	Behavior:
 	- If the request contains JSON with a `text` field, create and return a
 	  short summary (prefers OpenAI when configured).
-	- If the request is a multipart upload with an `audio` file, the file is
-	  saved to a temporary path and a 501 response is returned until server-
-	  side speech-to-text is implemented.
+	- If the request is a multipart upload with an `audio` file, the audio is
+	  transcribed locally (see `stt.py`) and the transcript is summarized.
+	  The response includes `transcript` and `stt` timings with the
+	  real-time factor. Returns 501 when no STT engine or model is installed
+	  and 503 when decoding or transcription fails.
 
 	Accepts form-encoded `text` as well for browser form submission.
 	"""
 	# Handle multipart audio upload
 	if request.content_type and request.content_type.startswith("multipart/") and "audio" in request.files:
-		# Save uploaded audio to a temp file (frontend can send the recorded audio here).
 		audio = request.files["audio"]
-		suffix = os.path.splitext(audio.filename)[1] or ".wav"
-		with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-			audio.save(tmp.name)
-			tmp_path = tmp.name
-		# At the moment we do not run speech-to-text on the server by default.
-		# Implement STT (Whisper or cloud STT) and then call same summarizer flow.
-		return jsonify({
-			"status": "not_implemented",
-			"message": "Audio upload saved but speech-to-text is not configured on the server. Configure STT (Whisper/openai or cloud STT) to transcribe the audio, or send text directly.",
-			"temp_path": tmp_path,
-		}), 501
+		try:
+			result = transcribe_upload(iter_upload(audio), filename=audio.filename)
+		except SttUnavailable as e:
+			return jsonify({
+				"status": "not_implemented",
+				"message": f"Speech-to-text is not available on the server ({e}). Install faster-whisper, its model and ffmpeg, or send text directly.",
+			}), 501
+		except SttError as e:
+			return jsonify({"error": f"Speech-to-text failed: {e}"}), 503
+		transcript = result.pop("text")
+		if not transcript:
+			return jsonify({"error": "No speech found in audio", "stt": result}), 422
+		summary, _ = _summarize_long(transcript)
+		return jsonify({"summary": summary, "transcript": transcript, "stt": result})
 
 	# Try JSON body
 	data = None
@@ -77,23 +122,106 @@ def news():
 		return jsonify({"error": "No text provided. Send JSON {\"text\": ...} or a form field 'text'."}), 400
 
 	# Prefer OpenAI if available, otherwise use naive summarizer
-	summary = None
-	if _openai_available():
-		summary = _summarize_with_openai(text)
-
-	if not summary:
-		summary = _naive_summarize(text)
+	summary, _ = _summarize(text)
 
 	return jsonify({"summary": summary})
 
 
 
+def _summarize_ocr_text(text: str) -> tuple:
+	"""Summarize OCR output on an `ocr_queue` thread (needs its own app context)."""
+	with app.app_context():
+		return _summarize(text)
+
+
+ocr_queue = OcrJobQueue(summarize=_summarize_ocr_text)
+
+
+@app.route("/convert", methods=["POST"])
+def convert():
+	"""Queue OCR + summary of an uploaded photo or scan of a newspaper page.
+
+	Multipart form: `image` file, optional `lang` (Tesseract language, e.g.
+	'eng'). Returns 202 with a `job_id`; poll `GET /convert/<job_id>` for the
+	text and summary. Returns 429 when the OCR queue is full and 503 when
+	the OCR workers can't take the job.
+
+	An image seen before (same bytes, or a near-identical copy; see
+	`ocr_cache`) is answered from the OCR cache with a finished job and 200.
+	Images larger than `OCR_MAX_IMAGE_BYTES` (default 15MB) get 413; a
+	`lang` that is not a Tesseract language name gets 400.
+	"""
+	if "image" not in request.files:
+		return jsonify({"error": "No image uploaded. Send a multipart form with an 'image' file."}), 400
+	image = request.files["image"]
+	lang = request.form.get("lang") or request.args.get("lang")
+	if not valid_lang(lang):
+		return jsonify({"error": "Invalid 'lang': use Tesseract language names such as 'eng', 'chi_sim' or 'eng+deu'"}), 400
+	data = read_upload(image, OCR_MAX_IMAGE_BYTES)
+	cached, sha, fingerprint = ocr_cache.lookup(data, lang)
+	if cached is not None:
+		job_id = ocr_queue.add_cached(cached)
+		return jsonify(dict(ocr_queue.get(job_id), status_url=f"/convert/{job_id}"))
+
+	def _store(job):
+		if job.get("summary_error"):
+			return
+		ocr_cache.put(sha, fingerprint, lang, {k: job.get(k) for k in ("text", "summary", "summary_source")})
+
+	try:
+		# the bytes go to the OCR process over the pool's pipe; no temp file
+		job_id = ocr_queue.submit(data, lang=lang, on_done=_store)
+	except QueueFull as e:
+		resp = jsonify({"error": str(e)})
+		resp.headers["Retry-After"] = "5"
+		return resp, 429
+	except OcrUnavailable as e:
+		resp = jsonify({"error": str(e)})
+		resp.headers["Retry-After"] = "5"
+		return resp, 503
+	return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/convert/{job_id}"}), 202
+
+
+@app.route("/convert/<job_id>", methods=["GET"])
+def convert_status(job_id):
+	"""Return the status of an OCR job; includes `text` and `summary` once done."""
+	job = ocr_queue.get(job_id)
+	if job is None:
+		return jsonify({"error": "Unknown or expired job", "job_id": job_id}), 404
+	return jsonify(job)
+
+
+def _fetch_one(url: str) -> dict:
+	"""Fetch and extract a single URL for the `/fetch` endpoint.
+
+	Runs on a worker thread from `_fetch_many`; records how long the download
+	took so slow publishers are easy to spot.
+	"""
+	entry = {"url": url}
+	t0 = time.monotonic()
+	text, err = _fetch_and_extract(url)
+	entry["fetch_ms"] = round((time.monotonic() - t0) * 1000, 1)
+	if text is None:
+		entry["error"] = err
+	else:
+		entry["text"] = text
+	return entry
+
+
 @app.route("/fetch", methods=["POST"])
 def fetch():
 	"""Fetch a URL (or list of URLs) and return extracted text and summary.
 
 	Request JSON: { "url": "https://..." } or { "urls": ["https://...", ...] }
-	Returns JSON: { "results": [ { "url": ..., "text": ..., "summary": ..., "error": ... }, ... ] }
+	Returns JSON: { "results": [ { "url": ..., "text": ..., "summary": ..., "error": ..., "fetch_ms": ..., "summarize_ms": ..., "elapsed_ms": ... }, ... ], "elapsed_ms": ... }
+
+	URLs are fetched concurrently (see `_fetch_many`). Extracted texts are
+	handed to a `SummaryBatcher` as each download finishes, so one batch is
+	summarized while later URLs are still downloading and N URLs cost a few
+	model calls rather than N. Each result's `summarize_ms` is the time of
+	the model call that summarized it. Everything runs within
+	`FETCH_DEADLINE`; a text whose summary isn't back by then gets the
+	naive summary. Results are returned in request order.
 	"""
 	data = None
 	if request.is_json:
@@ -115,55 +243,79 @@ def fetch():
 	if not urls:
 		return jsonify({"error": "No url(s) provided. Send JSON {\"url\": ...} or {\"urls\": [...] }"}), 400
 
-	results = []
-	for u in urls:
-		entry = {"url": u}
-		text, err = _fetch_and_extract(u)
-		if text is None:
-			entry["error"] = err
-			results.append(entry)
-			continue
+	started = time.monotonic()
+	batcher = SummaryBatcher(len(urls))
+	results = _fetch_many(urls, _fetch_one, on_done=lambda entry: batcher.done(entry["url"], entry.get("text")))
+	summaries = batcher.results()
+	for entry in results:
+		if entry.get("text") and entry["url"] in summaries:
+			entry["summary"], _, entry["summarize_ms"] = summaries[entry["url"]]
+	elapsed_ms = round((time.monotonic() - started) * 1000, 1)
 
-		entry["text"] = text
-		summary = None
-		if _openai_available():
-			summary = _summarize_with_openai(text)
-		if not summary:
-			summary = _naive_summarize(text)
-		entry["summary"] = summary
-		results.append(entry)
-
-	return jsonify({"results": results})
+	return jsonify({"results": results, "elapsed_ms": elapsed_ms})
 
 
 def _read_today_row(db_path: str, target_date: str):
 	"""Read the headlines for `target_date` from the DB.
 
-	Strategy:
-	  - Prefer normalized tables (`days`/`day_articles`/`articles`) when present.
-	  - Fall back to legacy `Today` table that stores a JSON string in `headlines`.
+	Results are memoized for the current request (on `flask.g`) and across
+	requests in `headline_cache`, which is invalidated when `pushnews`
+	ingests the date again. Headlines carry the list fields only; article
+	bodies are loaded by `_article_text` when an article is summarized.
 	Returns (headlines_list_or_text, None) on success or (None, error_message).
 	"""
-	# Use centralized db_ops helper to get day articles, then map to the
-	# legacy shape expected by the routes.
+	kind = "headlines"
+	memo = g.setdefault("headline_memo", {})
+	if (target_date, kind) in memo:
+		headline_cache.request_hits += 1
+		return memo[(target_date, kind)], None
+	# Use centralized db_ops helper to get day articles in the legacy
+	# headline shape expected by the routes.
 	try:
-		items = get_day_articles(day=target_date)
-		if not items:
-			return None, None
-		headlines = []
-		for entry in items:
-			art = entry.get("article") or {}
-			headlines.append({
-				"url": art.get("url"),
-				"title": art.get("title"),
-				"description": art.get("description"),
-				"content": art.get("content"),
-				"source": {"name": art.get("source_name")} if art.get("source_name") else None,
-				"publishedAt": art.get("published_at"),
-			})
-		return headlines, None
+		headlines = headline_cache.get(
+			target_date, kind, lambda: get_day_headlines(day=target_date) or None
+		)
 	except Exception as e:
 		return None, str(e)
+	memo[(target_date, kind)] = headlines
+	return headlines, None
+
+
+def _read_headline_index(target_date: str):
+	"""Return `(HeadlineIndex, None)` for `target_date`, `(None, None)` when the
+	date has no headlines, or `(None, error_message)`.
+
+	The index is built on first read and cached alongside the headlines;
+	its most-recent-first order comes from the database.
+	"""
+	headlines, err = _read_today_row(DB_PATH, target_date)
+	if err or headlines is None:
+		return None, err
+
+	def _build():
+		newest_first = [row[3] for row in get_day_articles(day=target_date, order="recent", as_tuples=True)]
+		return HeadlineIndex(headlines, newest_first=newest_first)
+
+	try:
+		return headline_cache.get(target_date, "index", _build), None
+	except Exception as e:
+		return None, str(e)
+
+
+def _read_digest(target_date: str):
+	"""Return the materialized digest for `target_date` when it is current.
+
+	`pushnews` rebuilds the digest after each ingest; if it is missing or older
+	than the latest ingest (or the DB can't be read) return None so callers
+	compute the answer from the headlines instead.
+	"""
+	try:
+		digest = headline_cache.get(target_date, "digest", lambda: get_day_digest(day=target_date))
+	except Exception:
+		return None
+	if not digest or digest.get("stale"):
+		return None
+	return digest
 
 
 @app.route("/today", methods=["GET"])
@@ -200,14 +352,71 @@ def list_available_dates():
 		return jsonify({"error": str(e)}), 500
 
 
-@app.route("/today/summary", methods=["GET"])
-def summarize_today():
-	"""Return a short, elderly-friendly summary of today's US headlines.
+@app.route("/search", methods=["GET"])
+def search():
+	"""Full-text search over every stored article.
 
-	Optional query params:
-	  - `date=YYYY-MM-DD` to summarize a specific date (defaults to today)
-	  - `max_articles` integer to limit how many headlines to include (default 10)
+	Query params: `q` (required), `page` (default 1), `per_page` (default 20,
+	max 100), `date=YYYY-MM-DD` or a `from`/`to` range, and `category`. The
+	date and category filters match the days (and categories) an article was
+	ranked under. Results are ordered by relevance.
 	"""
+	q = (request.args.get("q") or "").strip()
+	if not q:
+		return jsonify({"error": "Missing 'q' parameter"}), 400
+	try:
+		page = int(request.args.get("page", 1))
+		per_page = int(request.args.get("per_page", 20))
+		date_from = request.args.get("from") or request.args.get("date")
+		date_to = request.args.get("to") or request.args.get("date")
+		date_from = date.fromisoformat(date_from) if date_from else None
+		date_to = date.fromisoformat(date_to) if date_to else None
+	except ValueError as e:
+		return jsonify({"error": f"Invalid parameter: {e}"}), 400
+	if models_db is None:
+		return jsonify({"error": "ORM not initialized; configure SQLAlchemy and call models.db.init_app(app)"}), 500
+
+	started = time.monotonic()
+	try:
+		result = search_articles(q=q, page=page, per_page=per_page, date_from=date_from, date_to=date_to,
+			category=request.args.get("category"))
+	except SearchUnavailable as e:
+		return jsonify({"error": str(e)}), 501
+	except Exception as e:
+		models_db.session.rollback()
+		return jsonify({"error": f"DB error: {e}"}), 500
+	result["query"] = q
+	result["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+	return jsonify(result)
+
+
+def _today_summary_input(requested: str, max_articles: int):
+	"""Shared lookup for `/today/summary` and its streaming variant.
+
+	Returns `(digest, combined, count, None)`: the materialized digest when
+	it covers the request (then `combined` is None), otherwise the headline
+	text to summarize. On failure returns `(None, None, 0, (response, status))`.
+	"""
+	# the digest materialized by pushnews covers the default request
+	digest = _read_digest(requested) if max_articles == 10 else None
+	if digest and digest.get("summary"):
+		# a naive digest is served as stored and upgraded in the background
+		digest_upgrader.request(requested, digest)
+		return digest, None, min(max_articles, digest.get("article_count") or 0), None
+
+	headlines, err = _read_today_row(DB_PATH, requested)
+	if err:
+		return None, None, 0, (jsonify({"error": err}), 500)
+	if headlines is None:
+		return None, None, 0, (jsonify({"error": "No headlines found for date", "date": requested}), 404)
+
+	# headlines is expected to be a list of article dicts (title/description/url);
+	# long blobs are chunked by tokens and summarized map-reduce style
+	combined = _headlines_text(headlines, max_articles=max_articles)
+	return None, combined, len(headlines[:max_articles]) if isinstance(headlines, list) else 1, None
+
+
+def _today_summary_args():
 	requested = request.args.get("date")
 	if not requested:
 		requested = date.today().isoformat()
@@ -216,62 +425,77 @@ def summarize_today():
 		max_articles = int(request.args.get("max_articles", 10))
 	except Exception:
 		max_articles = 10
+	return requested, max_articles
 
-	headlines, err = _read_today_row(DB_PATH, requested)
-	if err:
-		return jsonify({"error": err}), 500
-	if headlines is None:
-		return jsonify({"error": "No headlines found for date", "date": requested}), 404
 
-	# headlines is expected to be a list of article dicts (title/description/url)
-	if isinstance(headlines, list):
-		items = headlines[:max_articles]
-		# build a single text blob from titles + descriptions
-		parts = []
-		for a in items:
-			title = a.get("title") or ""
-			desc = a.get("description") or ""
-			parts.append(f"{title}. {desc}")
-		combined = "\n\n".join(parts)
-	else:
-		# if stored as plain text, summarize it directly
-		combined = str(headlines)
+@app.route("/today/summary", methods=["GET"])
+def summarize_today():
+	"""Return a short, elderly-friendly summary of today's US headlines.
 
-	# limit combined length to avoid sending huge text to the summarizer
-	max_input_chars = 4000
-	if len(combined) > max_input_chars:
-		combined = combined[:max_input_chars].rsplit(" ", 1)[0] + "..."
+	Optional query params:
+	  - `date=YYYY-MM-DD` to summarize a specific date (defaults to today)
+	  - `max_articles` integer to limit how many headlines to include (default 10)
+	"""
+	requested, max_articles = _today_summary_args()
+	digest, combined, count, error = _today_summary_input(requested, max_articles)
+	if error:
+		return error
+	if digest:
+		return jsonify({
+			"date": requested,
+			"summary": digest["summary"],
+			"count": count,
+			"digest_version": digest["ingest_run_id"],
+		})
 
     #hope open ai is available
-	summary = None
-	if _openai_available():
-		summary = _summarize_with_openai(combined)
+	summary, _ = _summarize_long(combined, max_chars=500)
 
-	if not summary:
-		summary = _naive_summarize(combined, max_chars=500)
+	return jsonify({"date": requested, "summary": summary, "count": count})
 
-	return jsonify({"date": requested, "summary": summary, "count": len(items) if isinstance(headlines, list) else 1})
 
+@app.route("/today/summary/stream", methods=["GET"])
+def summarize_today_stream():
+	"""Server-sent events version of `/today/summary` (same query params).
 
+	Events: `meta` (date, count); then either a single `summary` (from the
+	ingest digest) or `naive`/`token` events followed by `summary`; `done`.
+	"""
+	requested, max_articles = _today_summary_args()
+	digest, combined, count, error = _today_summary_input(requested, max_articles)
+	if error:
+		return error
 
-@app.route("/ask", methods=["POST"])
-def ask():
-	"""Answer a user's question from a typed prompt.
+	def _events():
+		yield "meta", {"date": requested, "count": count}
+		if digest:
+			yield "summary", {"summary": digest["summary"], "source": digest.get("summary_source"), "digest_version": digest["ingest_run_id"]}
+			return
+		yield from _stream_summary(combined, max_chars=500)
 
-	JSON body: { "prompt": "...", "date": "YYYY-MM-DD" (optional) }
-	If `date` is provided, headlines for that date (or today) are used as context.
-	Uses OpenAI when `OPENAI_API_KEY` is configured; otherwise falls back to a
-	simple headline-matching response.
+	return _sse(_events())
+
+
+def _ask_context(prompt: str, target_date: str, restrict_date: bool = False):
+	"""Return `(headlines, context_text, sources)` for answering `prompt`.
+
+	The context is the archive passages most relevant to `prompt` (only from
+	`target_date` when `restrict_date`), within `RETRIEVAL_CONTEXT_TOKENS`.
+	While the retrieval index is not ready it falls back to the first 10
+	headlines of `target_date`, and `sources` is None.
 	"""
-	if not request.is_json:
-		return jsonify({"error": "Send JSON with field 'prompt'"}), 400
-	data = request.get_json()
-	prompt = data.get("prompt")
-	if not prompt:
-		return jsonify({"error": "Missing 'prompt' in request body"}), 400
+	try:
+		passages = retriever.retrieve(prompt, day=target_date if restrict_date else None)
+	except Exception:
+		passages = None
+	if passages:
+		context_text = "\n\n".join(f"[{p['date'] or 'undated'}] {p['title'] or ''}\n{p['text']}" for p in passages)
+		sources = []
+		for p in passages:
+			if p["url"] not in {s["url"] for s in sources}:
+				sources.append({"title": p["title"], "url": p["url"], "description": p["description"], "date": p["date"]})
+		return None, context_text, sources
 
-	# Optional date context
-	target_date = data.get("date") or date.today().isoformat()
 	context_headlines, err = _read_today_row(DB_PATH, target_date)
 	context_text = None
 	if err:
@@ -285,6 +509,52 @@ def ask():
 			d = a.get("description") or ""
 			parts.append(f"{t}. {d}")
 		context_text = "\n\n".join(parts)
+	return context_headlines, context_text, None
+
+
+def _ask_fallback(prompt: str, context_headlines, sources):
+	"""Answer without a model: the retrieved articles, else headline keyword matches."""
+	if sources:
+		return {"source": "retrieval_fallback", "matches": sources}
+	reply_parts = _headline_matches(prompt, context_headlines)
+	if reply_parts:
+		return {"source": "headlines_fallback", "matches": reply_parts}
+	return None
+
+
+def _headline_matches(prompt: str, context_headlines) -> list:
+	"""Fallback answer: headlines sharing a longer word with the prompt."""
+	reply_parts = []
+	if isinstance(context_headlines, list):
+		q = prompt.lower()
+		for a in context_headlines:
+			title = (a.get("title") or "").lower()
+			desc = (a.get("description") or "").lower()
+			if any(tok in title or tok in desc for tok in q.split() if len(tok) > 3):
+				reply_parts.append({"title": a.get("title"), "url": a.get("url"), "description": a.get("description")})
+	return reply_parts
+
+
+@app.route("/ask", methods=["POST"])
+def ask():
+	"""Answer a user's question from a typed prompt.
+
+	JSON body: { "prompt": "...", "date": "YYYY-MM-DD" (optional) }
+	Context is retrieved from the whole article archive, or only from `date`
+	when it is given (see `_ask_context`); `sources` lists the articles used.
+	Uses OpenAI when `OPENAI_API_KEY` is configured; otherwise falls back to
+	returning the matching articles.
+	"""
+	if not request.is_json:
+		return jsonify({"error": "Send JSON with field 'prompt'"}), 400
+	data = request.get_json()
+	prompt = data.get("prompt")
+	if not prompt:
+		return jsonify({"error": "Missing 'prompt' in request body"}), 400
+
+	# Optional date context
+	target_date = data.get("date") or date.today().isoformat()
+	context_headlines, context_text, sources = _ask_context(prompt, target_date, restrict_date=bool(data.get("date")))
 
 	answer = None
 	if _openai_available():
@@ -292,158 +562,187 @@ def ask():
 		answer = _ask_with_openai(prompt, context=context_text)
 
 	if not answer:
-		# Fallback: simple headline keyword matching
-		reply_parts = []
-		if isinstance(context_headlines, list):
-			q = prompt.lower()
-			for a in context_headlines:
-				title = (a.get("title") or "").lower()
-				desc = (a.get("description") or "").lower()
-				if any(tok in title or tok in desc for tok in q.split() if len(tok) > 3):
-					reply_parts.append({"title": a.get("title"), "url": a.get("url"), "description": a.get("description")})
-		if reply_parts:
-			return jsonify({"source": "headlines_fallback", "matches": reply_parts})
+		fallback = _ask_fallback(prompt, context_headlines, sources)
+		if fallback:
+			return jsonify(fallback)
 		return jsonify({"error": "No model available to answer this question. Set OPENAI_API_KEY for full answers."}), 503
 
-	return jsonify({"answer": answer, "date_context": target_date if context_text else None})
+	date_context = target_date if context_text and (sources is None or data.get("date")) else None
+	return jsonify({"answer": answer, "date_context": date_context, "sources": sources})
+
+
+@app.route("/ask/stream", methods=["POST"])
+def ask_stream():
+	"""Server-sent events version of `/ask` (same JSON body).
+
+	Events: `meta` (date_context, sources); `token` deltas and a final
+	`answer`; or, without a model (or if it fails before answering),
+	`matches` with the fallback articles or an `error`; then `done`.
+	"""
+	if not request.is_json:
+		return jsonify({"error": "Send JSON with field 'prompt'"}), 400
+	data = request.get_json()
+	prompt = data.get("prompt")
+	if not prompt:
+		return jsonify({"error": "Missing 'prompt' in request body"}), 400
+	target_date = data.get("date") or date.today().isoformat()
+	context_headlines, context_text, sources = _ask_context(prompt, target_date, restrict_date=bool(data.get("date")))
+	date_context = target_date if context_text and (sources is None or data.get("date")) else None
+
+	def _events():
+		yield "meta", {"date_context": date_context, "sources": sources}
+		if _openai_available():
+			answered = False
+			for event, payload in _stream_answer(prompt, context=context_text):
+				if event == "failed" and not payload.get("partial"):
+					break
+				answered = answered or event == "answer"
+				yield event, payload
+			if answered:
+				return
+		fallback = _ask_fallback(prompt, context_headlines, sources)
+		if fallback:
+			yield "matches", fallback
+		else:
+			yield "error", {"error": "No model available to answer this question. Set OPENAI_API_KEY for full answers."}
+
+	return _sse(_events())
+
+
+
+def _requested_keywords():
+	"""Return the optional comma-separated `keywords` query param as a list."""
+	raw = request.args.get("keywords")
+	if not raw:
+		return None
+	return [k.strip() for k in raw.split(",") if k.strip()] or None
+
 
+def _read_category(target_date: str, category: str, order: str, limit: int):
+	"""Return `(headlines, None)` for `category` on `target_date`, ordered and
+	limited in SQL; `(None, None)` when the date has no headlines at all, or
+	`(None, error_message)`."""
+	headlines, err = _read_today_row(DB_PATH, target_date)
+	if err or headlines is None:
+		return None, err
+	try:
+		return headline_cache.get(
+			target_date, f"{category}:{order}:{limit}",
+			lambda: get_day_headlines(day=target_date, category=category, order=order, limit=limit),
+		), None
+	except Exception as e:
+		return None, str(e)
+
+
+def _category_top(category: str):
+	"""Shared body of the `/today/<category>` endpoints.
+
+	Filters on the category stored at ingest; pass `keywords=a,b,c` to match
+	an ad-hoc keyword set through the headline index instead.
+	"""
+	requested = request.args.get("date") or date.today().isoformat()
+	keywords = _requested_keywords()
+	digest = _read_digest(requested) if not keywords else None
+	if digest and category in digest.get("categories", {}):
+		match = digest["categories"][category].get("top")
+	elif not keywords:
+		headlines, err = _read_category(requested, category, "rank", 1)
+		if err:
+			return jsonify({"error": err}), 500
+		if headlines is None:
+			return jsonify({"error": "No headlines found for date", "date": requested}), 404
+		match = headlines[0] if headlines else None
+	else:
+		index, err = _read_headline_index(requested)
+		if err:
+			return jsonify({"error": err}), 500
+		if index is None:
+			return jsonify({"error": "No headlines found for date", "date": requested}), 404
+		match = index.top(keywords)
+	if not match:
+		return jsonify({"error": f"No {category} headline found for date", "date": requested}), 404
+	return jsonify({"date": requested, "category": category, "article": match})
+
+
+def _category_top_n(category: str):
+	"""Shared body of the `/today/<category>/top3` endpoints (see `_category_top`)."""
+	requested = request.args.get("date") or date.today().isoformat()
+	limit = int(request.args.get("limit", 3))
+	keywords = _requested_keywords()
+	digest = _read_digest(requested) if not keywords else None
+	top_n = ((digest or {}).get("categories", {}).get(category) or {}).get("top_n")
+	# the digest keeps up to DIGEST_TOP_N matches; a shorter list is complete
+	if top_n is not None and (limit <= len(top_n) or len(top_n) < int(os.getenv("DIGEST_TOP_N", "10"))):
+		matches = top_n[:limit]
+	elif not keywords:
+		matches, err = _read_category(requested, category, "recent", limit)
+		if err:
+			return jsonify({"error": err}), 500
+		if matches is None:
+			return jsonify({"error": "No headlines found for date", "date": requested}), 404
+	else:
+		index, err = _read_headline_index(requested)
+		if err:
+			return jsonify({"error": err}), 500
+		if index is None:
+			return jsonify({"error": "No headlines found for date", "date": requested}), 404
+		matches = index.top_n(keywords, limit=limit)
+	return jsonify({"date": requested, "category": category, "count": len(matches), "articles": matches})
 
 
 @app.route("/today/economy", methods=["GET"])
 def today_economy_top():
 	"""Return the single top US economic/business headline for today (or date)."""
-	requested = request.args.get("date") or date.today().isoformat()
-	headlines, err = _read_today_row(DB_PATH, requested)
-	if err:
-		return jsonify({"error": err}), 500
-	if headlines is None:
-		return jsonify({"error": "No headlines found for date", "date": requested}), 404
-
-	econ_keywords = [
-		"econom", "inflation", "stock", "market", "dow", "s&p", "jobs", "unemployment",
-		"fed", "interest", "rate", "gdp", "recession", "business", "finance", "bank", "stocks"
-		]
-	match = _find_top_match(headlines, econ_keywords)
-	if not match:
-		return jsonify({"error": "No economy headline found for date", "date": requested}), 404
-	return jsonify({"date": requested, "category": "economy", "article": match})
+	return _category_top("economy")
 
 
 @app.route("/today/health", methods=["GET"])
 def today_health_top():
 	"""Return the single top US health-related headline for today (or date)."""
-	requested = request.args.get("date") or date.today().isoformat()
-	headlines, err = _read_today_row(DB_PATH, requested)
-	if err:
-		return jsonify({"error": err}), 500
-	if headlines is None:
-		return jsonify({"error": "No headlines found for date", "date": requested}), 404
-	health_keywords = [
-	"health", "covid", "vaccine", "hospital", "doctor", "medical", "disease", "illness", "flu", "mental"
-	]
-	match = _find_top_match(headlines, health_keywords)
-	if not match:
-		return jsonify({"error": "No health headline found for date", "date": requested}), 404
-	return jsonify({"date": requested, "category": "health", "article": match})
+	return _category_top("health")
 
 
 @app.route("/today/defense", methods=["GET"])
 def today_defense_top():
 	"""Return the single top US defense/war-related headline for today (or date)."""
-	requested = request.args.get("date") or date.today().isoformat()
-	headlines, err = _read_today_row(DB_PATH, requested)
-	if err:
-		return jsonify({"error": err}), 500
-	if headlines is None:
-		return jsonify({"error": "No headlines found for date", "date": requested}), 404
-
-	defense_keywords = [
-		"war", "attack", "military", "troop", "invasion", "missile", "airstrike", "conflict", "battle", "casualties",
-		"russia", "ukraine", "israel", "gaza", "palestine", "taliban", "afghanistan"
-	]
-	match = _find_top_match(headlines, defense_keywords)
-	if not match:
-		return jsonify({"error": "No defense headline found for date", "date": requested}), 404
-	return jsonify({"date": requested, "category": "defense", "article": match})
-
-
-
+	return _category_top("defense")
 
 
 @app.route("/today/economy/top3", methods=["GET"])
 def today_economy_top3():
-	requested = request.args.get("date") or date.today().isoformat()
-	limit = int(request.args.get("limit", 3))
-	headlines, err = _read_today_row(DB_PATH, requested)
-	if err:
-		return jsonify({"error": err}), 500
-	if headlines is None:
-		return jsonify({"error": "No headlines found for date", "date": requested}), 404
-	econ_keywords = [
-		"econom", "inflation", "stock", "market", "dow", "s&p", "jobs", "unemployment",
-		"fed", "interest", "rate", "gdp", "recession", "business", "finance", "bank", "stocks"
-	]
-	matches = _find_top_matches(headlines, econ_keywords, limit=limit)
-	return jsonify({"date": requested, "category": "economy", "count": len(matches), "articles": matches})
+	return _category_top_n("economy")
 
 
 @app.route("/today/health/top3", methods=["GET"])
 def today_health_top3():
-	requested = request.args.get("date") or date.today().isoformat()
-	limit = int(request.args.get("limit", 3))
-	headlines, err = _read_today_row(DB_PATH, requested)
-	if err:
-		return jsonify({"error": err}), 500
-	if headlines is None:
-		return jsonify({"error": "No headlines found for date", "date": requested}), 404
-	health_keywords = [
-		"health", "covid", "vaccine", "hospital", "doctor", "medical", "disease", "illness", "flu", "mental"
-	]
-	matches = _find_top_matches(headlines, health_keywords, limit=limit)
-	return jsonify({"date": requested, "category": "health", "count": len(matches), "articles": matches})
+	return _category_top_n("health")
 
 
 @app.route("/today/defense/top3", methods=["GET"])
 def today_defense_top3():
-	requested = request.args.get("date") or date.today().isoformat()
-	limit = int(request.args.get("limit", 3))
-	headlines, err = _read_today_row(DB_PATH, requested)
-	if err:
-		return jsonify({"error": err}), 500
-	if headlines is None:
-		return jsonify({"error": "No headlines found for date", "date": requested}), 404
-	defense_keywords = [
-		"war", "attack", "military", "troop", "invasion", "missile", "airstrike", "conflict", "battle", "casualties",
-		"russia", "ukraine", "israel", "gaza", "palestine", "taliban", "afghanistan"
-	]
-	matches = _find_top_matches(headlines, defense_keywords, limit=limit)
-	return jsonify({"date": requested, "category": "defense", "count": len(matches), "articles": matches})
+	return _category_top_n("defense")
 
 
-@app.route("/article/summary", methods=["GET", "POST"])
-def article_summary():
-	"""Summarize a specific article identified by `url`.
+def _article_request():
+	"""Return `(url, date)` from the query string (GET) or JSON body (POST).
 
-	Accepts either GET with query `?url=...&date=YYYY-MM-DD` or POST JSON {"url": "...", "date": "YYYY-MM-DD"}.
-	If `date` is provided the search will be limited to that date; otherwise today's headlines are searched first then all dates.
-	If the stored article lacks full content, the endpoint will attempt to fetch the article URL to extract text.
+	Returns `(None, None)` for a POST without a JSON body.
 	"""
-	# get url from GET or POST JSON
-	url = None
-	requested_date = None
 	if request.method == "GET":
-		url = request.args.get("url")
-		requested_date = request.args.get("date")
-	else:
-		if not request.is_json:
-			return jsonify({"error": "Send JSON with field 'url'"}), 400
-		data = request.get_json()
-		url = data.get("url")
-		requested_date = data.get("date")
+		return request.args.get("url"), request.args.get("date")
+	if not request.is_json:
+		return None, None
+	data = request.get_json()
+	return data.get("url"), data.get("date")
 
-	if not url:
-		return jsonify({"error": "Missing 'url' parameter"}), 400
 
+def _resolve_article(url: str, requested_date: str = None):
+	"""Find the stored article for `url`.
+
+	If `requested_date` is given only that date is searched; otherwise
+	today's headlines are searched first, then every stored article.
+	Returns `(article, search_date, None)` or `(None, None, (response, status))`.
+	"""
 	# helper to search headlines for a date
 	def _search_date_for_url(target_date):
 		headlines, err = _read_today_row(DB_PATH, target_date)
@@ -468,7 +767,7 @@ def article_summary():
 		if not article:
 			# ORM-only: require models_db and attempt to find the article by URL across days
 			if models_db is None:
-				return jsonify({"error": "ORM not initialized; configure SQLAlchemy and call models.db.init_app(app)"}), 500
+				return None, None, (jsonify({"error": "ORM not initialized; configure SQLAlchemy and call models.db.init_app(app)"}), 500)
 			try:
 				session = models_db.session
 				# Find Article by URL
@@ -481,18 +780,40 @@ def article_summary():
 						d_obj = session.query(Day).filter_by(id=da.day_id).first()
 						if d_obj and getattr(d_obj, "date", None):
 							day_date = d_obj.date.isoformat() if hasattr(d_obj.date, "isoformat") else str(d_obj.date)
-					article = {"url": art_row.url, "title": art_row.title, "description": art_row.description, "content": art_row.content, "source": {"name": art_row.source_name} if art_row.source_name else None, "publishedAt": art_row.published_at}
+					article = {"url": art_row.url, "title": art_row.title, "description": art_row.description, "source": {"name": art_row.source_name} if art_row.source_name else None, "publishedAt": iso_utc(art_row.published_at)}
 					search_date = day_date or None
 			except Exception as e:
-				return jsonify({"error": f"DB error: {e}"}), 500
+				return None, None, (jsonify({"error": f"DB error: {e}"}), 500)
 
 	if not article:
-		return jsonify({"error": "Article not found in stored headlines", "url": url}), 404
+		return None, None, (jsonify({"error": "Article not found in stored headlines", "url": url}), 404)
+	return article, search_date, None
+
+
+def _stored_article_summary(url: str):
+	"""Return the model summary materialized at ingest (or by an earlier request), if any."""
+	try:
+		stored = get_article_summary(url=url)
+	except Exception:
+		stored = None
+	if stored and stored.get("summary_model") not in (None, "naive"):
+		return stored["summary_short"]
+	return None
+
 
-	# Determine text to summarize
+def _article_text(article: dict):
+	"""Return the best text to summarize for `article`: its stored body
+	(decompressed only here), else its description or title, fetching the
+	page if the stored text is too short."""
 	text = None
-	if article.get("content"):
-		text = article.get("content")
+	content = article.get("content")
+	if content is None and article.get("url"):
+		try:
+			content = get_article_content(url=article["url"])
+		except Exception:
+			content = None
+	if content:
+		text = content
 	elif article.get("description"):
 		text = article.get("description")
 	elif article.get("title"):
@@ -503,23 +824,101 @@ def article_summary():
 		fetched_text, err = _fetch_and_extract(article.get("url"))
 		if fetched_text:
 			text = fetched_text
+	return text
+
+
+def _remember_article_summary(url: str, summary: str):
+	"""Keep the article's own summary columns in sync with the cache."""
+	try:
+		save_article_summary(url=url, summary_short=summary, summary_model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"))
+	except Exception:
+		if models_db is not None:
+			models_db.session.rollback()
+
+
+@app.route("/article/summary", methods=["GET", "POST"])
+def article_summary():
+	"""Summarize a specific article identified by `url`.
 
+	Accepts either GET with query `?url=...&date=YYYY-MM-DD` or POST JSON {"url": "...", "date": "YYYY-MM-DD"}.
+	If `date` is provided the search will be limited to that date; otherwise today's headlines are searched first then all dates.
+	If the stored article lacks full content, the endpoint will attempt to fetch the article URL to extract text.
+	"""
+	if request.method == "POST" and not request.is_json:
+		return jsonify({"error": "Send JSON with field 'url'"}), 400
+	url, requested_date = _article_request()
+	if not url:
+		return jsonify({"error": "Missing 'url' parameter"}), 400
+
+	article, search_date, error = _resolve_article(url, requested_date)
+	if error:
+		return error
+
+	stored = _stored_article_summary(url)
+	if stored:
+		return jsonify({"date": search_date, "url": url, "summary": stored, "source": "stored", "article": article})
+
+	text = _article_text(article)
 	if not text:
 		return jsonify({"error": "No text available to summarize for this article", "article": article}), 422
 
-	# cap input size
-	max_input = 6000
-	if len(text) > max_input:
-		text = text[:max_input].rsplit(" ", 1)[0] + "..."
+	# long articles are summarized in token-sized chunks, then combined
+	summary, source = _summarize_long(text, max_chars=400)
+	if source == "openai":
+		_remember_article_summary(url, summary)
 
-	summary = None
-	source = "none"
-	if _openai_available():
-		summary = _summarize_with_openai(text)
-		source = "openai" if summary else source
+	return jsonify({"date": search_date, "url": url, "summary": summary, "source": source, "article": article})
 
-	if not summary:
-		summary = _naive_summarize(text, max_chars=400)
-		source = "naive"
 
-	return jsonify({"date": search_date, "url": url, "summary": summary, "source": source, "article": article})
\ No newline at end of file
+def _sse(events):
+	"""Stream `(event, data)` pairs as server-sent events, then a `done` event.
+
+	`events` is consumed lazily inside the request context, so the first
+	event reaches the client as soon as it is yielded.
+	"""
+	def _generate():
+		for event, data in events:
+			yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+		yield "event: done\ndata: {}\n\n"
+
+	return Response(
+		stream_with_context(_generate()),
+		mimetype="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+
+@app.route("/article/summary/stream", methods=["GET", "POST"])
+def article_summary_stream():
+	"""Server-sent events version of `/article/summary`.
+
+	Events: `meta` (date, url, article) right away; `naive` with a lead-
+	sentence summary if the model is slow to start; `token` deltas as the
+	model writes; `summary` with the final `summary` and `source`; `done`.
+	Errors before streaming starts are returned as JSON like `/article/summary`.
+	"""
+	if request.method == "POST" and not request.is_json:
+		return jsonify({"error": "Send JSON with field 'url'"}), 400
+	url, requested_date = _article_request()
+	if not url:
+		return jsonify({"error": "Missing 'url' parameter"}), 400
+	article, search_date, error = _resolve_article(url, requested_date)
+	if error:
+		return error
+
+	def _events():
+		yield "meta", {"date": search_date, "url": url, "article": article}
+		stored = _stored_article_summary(url)
+		if stored:
+			yield "summary", {"summary": stored, "source": "stored"}
+			return
+		text = _article_text(article)
+		if not text:
+			yield "error", {"error": "No text available to summarize for this article"}
+			return
+		for event, data in _stream_summary(text, max_chars=400):
+			if event == "summary" and data.get("source") == "openai" and not data.get("cached"):
+				_remember_article_summary(url, data["summary"])
+			yield event, data
+
+	return _sse(_events())
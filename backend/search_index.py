@@ -0,0 +1,269 @@
+"""Full-text search over stored articles (title, description and content).
+
+The index lives next to the `articles` table and is chosen by dialect:
+
+- SQLite: an FTS5 table `articles_fts` (porter stemming) whose rowid is the
+  article id, ranked with `bm25()`
+- Postgres: a table `article_search(article_id, document tsvector)` with a GIN
+  index, ranked with `ts_rank_cd()`; title, description and content are
+  weighted A, B and C
+
+Neither is a model: FTS5 tables can't be declared with SQLAlchemy, and the
+tsvector is kept out of the wide `articles` row. The index is maintained by
+the application rather than triggers: `db_ops.upsert_article` and
+`db_ops.bulk_upsert_articles` call `index_articles()` with the ids whose text
+changed, in the same transaction. Bodies are stored compressed in
+`article_contents`, so rows are read (and decompressed) in Python and bound
+into the index statements. The Alembic migration creates and backfills
+it; `ensure_search_schema()` does the same for databases built with
+`create_tables.py`.
+
+Other dialects have no index and `search_articles()` raises
+`SearchUnavailable`.
+"""
+import re
+from datetime import date as _date
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, inspect, text
+
+import models
+
+SQLITE_TABLE = "articles_fts"
+POSTGRES_TABLE = "article_search"
+
+# bm25() column weights for (title, description, content)
+SQLITE_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Ids per statement when (re)indexing.
+INDEX_CHUNK_SIZE = 500
+
+MAX_PER_PAGE = 100
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# engine url -> whether the index table exists
+_available = {}
+
+
+class SearchUnavailable(Exception):
+    """The database has no full-text index (unsupported dialect or not migrated)."""
+
+
+def _dialect(session) -> str:
+    return session.get_bind().dialect.name
+
+
+def _has_index(session) -> bool:
+    bind = session.get_bind()
+    key = str(bind.url)
+    if key not in _available:
+        name = {"sqlite": SQLITE_TABLE, "postgresql": POSTGRES_TABLE}.get(bind.dialect.name)
+        # the session's own connection: a separate one would end its
+        # transaction on a single-connection (in-memory SQLite) pool
+        _available[key] = bool(name) and inspect(session.connection()).has_table(name)
+    return _available[key]
+
+
+def _chunks(seq, size: int = INDEX_CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def ensure_search_schema(session=None) -> bool:
+    """Create (and fill) the dialect's search index if it is missing.
+
+    Returns True when the index was created. Used by `create_tables.py`;
+    migrated databases get the index from Alembic.
+    """
+    if session is None:
+        session = models.db.session
+    dialect = _dialect(session)
+    if dialect not in ("sqlite", "postgresql"):
+        return False
+    _available.pop(str(session.get_bind().url), None)
+    if _has_index(session):
+        return False
+    if dialect == "sqlite":
+        session.execute(text(
+            f"CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5("
+            "title, description, content, tokenize='porter unicode61')"
+        ))
+    else:
+        session.execute(text(
+            f"CREATE TABLE {POSTGRES_TABLE} ("
+            "article_id INTEGER PRIMARY KEY REFERENCES articles (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        session.execute(text(f"CREATE INDEX ix_{POSTGRES_TABLE}_document ON {POSTGRES_TABLE} USING GIN (document)"))
+    _available[str(session.get_bind().url)] = True
+    rebuild_search_index(session=session, commit=False)
+    session.commit()
+    return True
+
+
+def index_articles(session=None, article_ids: List[int] = None) -> int:
+    """(Re)index the given articles from their stored columns.
+
+    Does not commit; callers run it inside their upsert transaction. Returns
+    the number of ids indexed (0 when the database has no search index).
+    """
+    if session is None:
+        session = models.db.session
+    ids = sorted(set(article_ids or []))
+    if not ids or not _has_index(session):
+        return 0
+    if _dialect(session) == "sqlite":
+        delete = text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True))
+        write = text(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, title, description, content) "
+            "VALUES (:id, :title, :description, :content)"
+        )
+    else:
+        delete = None
+        write = text(
+            f"INSERT INTO {POSTGRES_TABLE} (article_id, document) VALUES (:id, "
+            "setweight(to_tsvector('english', :title), 'A') || "
+            "setweight(to_tsvector('english', :description), 'B') || "
+            "setweight(to_tsvector('english', :content), 'C')) "
+            "ON CONFLICT (article_id) DO UPDATE SET document = excluded.document"
+        )
+    for chunk in _chunks(ids):
+        rows = (
+            session.query(models.Article.id, models.Article.title, models.Article.description, models.ArticleContent.content)
+            .outerjoin(models.ArticleContent, models.ArticleContent.article_id == models.Article.id)
+            .filter(models.Article.id.in_(chunk))
+        )
+        params = [
+            {"id": id_, "title": title or "", "description": description or "", "content": content or ""}
+            for id_, title, description, content in rows
+        ]
+        if delete is not None:
+            session.execute(delete, {"ids": chunk})
+        if params:
+            session.execute(write, params)
+    return len(ids)
+
+
+def rebuild_search_index(session=None, commit: bool = True) -> int:
+    """Reindex every stored article; returns the number of articles indexed."""
+    if session is None:
+        session = models.db.session
+    if not _has_index(session):
+        return 0
+    if _dialect(session) == "sqlite":
+        session.execute(text(f"DELETE FROM {SQLITE_TABLE}"))
+    ids = [r[0] for r in session.query(models.Article.id)]
+    index_articles(session=session, article_ids=ids)
+    if commit:
+        session.commit()
+    return len(ids)
+
+
+def _sqlite_query(q: str) -> str:
+    """Turn free text into an FTS5 query where every word must match.
+
+    Words are quoted so FTS5 operators in user input are matched literally.
+    No prefix matching: it expands to every indexed term sharing the prefix
+    and porter stemming already matches inflections.
+    """
+    return " ".join(f'"{t}"' for t in _TOKEN.findall(q))
+
+
+def _filters(date_from: Optional[_date], date_to: Optional[_date], category: Optional[str]):
+    """SQL fragment restricting to articles ranked on a day in range / in a category."""
+    clauses = []
+    params = {}
+    if date_from:
+        clauses.append("d.date >= :date_from")
+        params["date_from"] = date_from
+    if date_to:
+        clauses.append("d.date <= :date_to")
+        params["date_to"] = date_to
+    if category:
+        clauses.append("da.category = :category")
+        params["category"] = category
+    if not clauses:
+        return "", params
+    sql = (
+        " AND EXISTS (SELECT 1 FROM day_articles da JOIN days d ON d.id = da.day_id "
+        "WHERE da.article_id = a.id AND " + " AND ".join(clauses) + ")"
+    )
+    return sql, params
+
+
+def search_articles(
+    session=None,
+    q: str = None,
+    page: int = 1,
+    per_page: int = 20,
+    date_from: Optional[_date] = None,
+    date_to: Optional[_date] = None,
+    category: Optional[str] = None,
+) -> Dict:
+    """Return one page of articles matching `q`, best match first.
+
+    Near-duplicates (articles with a `canonical_id`) are left out.
+    `date_from`/`date_to`/`category` keep articles that were ranked on a day
+    in that range (and in that category). The result is
+    `{"results": [...], "page", "per_page", "has_more"}`; each result has the
+    article's list fields, `score` (higher is better) and a `snippet` with
+    matches wrapped in `<b>`.
+
+    Raises `SearchUnavailable` when the database has no search index.
+    """
+    if session is None:
+        session = models.db.session
+    page = max(1, int(page or 1))
+    per_page = min(MAX_PER_PAGE, max(1, int(per_page or 20)))
+    out = {"results": [], "page": page, "per_page": per_page, "has_more": False}
+    if not _has_index(session):
+        raise SearchUnavailable(f"no full-text index for dialect {_dialect(session)!r}")
+
+    where, params = _filters(date_from, date_to, category)
+    # one extra row tells whether there is a next page without counting all matches
+    params.update({"limit": per_page + 1, "offset": (page - 1) * per_page})
+    if _dialect(session) == "sqlite":
+        params["q"] = _sqlite_query(q or "")
+        if not params["q"]:
+            return out
+        w = SQLITE_WEIGHTS
+        sql = (
+            f"SELECT a.id, a.url, a.title, a.description, a.source_name, a.published_at, "
+            f"-bm25({SQLITE_TABLE}, {w[0]}, {w[1]}, {w[2]}) AS score, "
+            f"snippet({SQLITE_TABLE}, -1, '<b>', '</b>', '...', 16) AS snippet "
+            f"FROM {SQLITE_TABLE} JOIN articles a ON a.id = {SQLITE_TABLE}.rowid "
+            f"WHERE {SQLITE_TABLE} MATCH :q AND a.canonical_id IS NULL{where} "
+            "ORDER BY score DESC, a.id DESC LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params["q"] = (q or "").strip()
+        if not params["q"]:
+            return out
+        # rank in the inner query so ts_headline only runs for the page's rows
+        sql = (
+            "SELECT a.id, a.url, a.title, a.description, a.source_name, a.published_at, hit.score, "
+            "ts_headline('english', coalesce(a.description, a.title, ''), hit.query, 'MaxFragments=1') AS snippet "
+            "FROM ("
+            f"SELECT s.article_id, ts_rank_cd(s.document, query) AS score, query "
+            f"FROM {POSTGRES_TABLE} s JOIN articles a ON a.id = s.article_id, "
+            "websearch_to_tsquery('english', :q) query "
+            f"WHERE s.document @@ query AND a.canonical_id IS NULL{where} "
+            "ORDER BY score DESC, s.article_id DESC LIMIT :limit OFFSET :offset"
+            ") hit JOIN articles a ON a.id = hit.article_id "
+            "ORDER BY hit.score DESC, a.id DESC"
+        )
+    rows = session.execute(text(sql), params).fetchall()
+    out["has_more"] = len(rows) > per_page
+    for r in rows[:per_page]:
+        out["results"].append({
+            "id": r[0],
+            "url": r[1],
+            "title": r[2],
+            "description": r[3],
+            "source": {"name": r[4]} if r[4] else None,
+            "publishedAt": models.iso_utc(r[5]),
+            "score": round(float(r[6]), 4),
+            "snippet": r[7],
+        })
+    return out
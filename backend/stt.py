@@ -0,0 +1,295 @@
+"""Server-side speech-to-text for `/news` audio uploads.
+
+The upload is decoded into 16 kHz mono PCM while it is still being read and
+cut into `STT_CHUNK_SECONDS` windows (default 30). Each window goes to a
+shared worker pool (`STT_WORKERS`, default 2) as soon as it is decoded, so a
+long recording is transcribed while the rest of it is still decoding and the
+request latency grows with the audio length instead of waiting for the whole
+file first. Windows start `STT_CHUNK_OVERLAP_SECONDS` (default 1) before the
+previous one ends so words on a boundary are heard whole; the words the two
+transcripts share are dropped when they are joined. A window that takes
+longer than `STT_CHUNK_TIMEOUT` seconds (default 120) fails the request.
+
+Decoding:
+  - 16-bit PCM WAV at 16 kHz is read with the `wave` module, no subprocess
+  - anything else (other rates, webm/ogg/mp3 from browser recorders) is piped
+    through `ffmpeg` (stdin -> s16le on stdout); the binary must be on PATH
+
+Engines are pluggable (`STT_ENGINE`, default "faster-whisper"):
+  - "faster-whisper": offline CPU Whisper through CTranslate2; `STT_MODEL`
+    (default "base.en") and `STT_COMPUTE_TYPE` (default "int8"). The model is
+    never downloaded at request time: `STT_MODEL` must be a local model
+    directory or a model already in the cache (`STT_MODEL_DIR`, default the
+    Hugging Face cache), e.g. fetched at build time with
+    `faster_whisper.download_model("base.en", output_dir=...)`
+  - "vosk": offline Kaldi models; `STT_VOSK_MODEL` is the model directory
+Add more with `register_engine(name, factory)`; an engine only needs
+`transcribe(pcm: bytes, sample_rate: int) -> str`.
+"""
+import io
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+SAMPLE_RATE = 16000
+_SAMPLE_WIDTH = 2  # s16le
+
+
+class SttError(Exception):
+	"""Transcription failed (undecodable audio, engine error or timeout)."""
+
+
+class SttUnavailable(SttError):
+	"""The configured engine, its model or the decoder is not installed."""
+
+
+class FasterWhisperEngine:
+	name = "faster-whisper"
+
+	def __init__(self):
+		try:
+			from faster_whisper import WhisperModel
+		except Exception as e:
+			raise SttUnavailable(f"faster-whisper not available: {e}")
+		workers = int(os.getenv("STT_WORKERS", "2"))
+		model = os.getenv("STT_MODEL", "base.en")
+		try:
+			self.model = WhisperModel(
+				model,
+				device="cpu",
+				compute_type=os.getenv("STT_COMPUTE_TYPE", "int8"),
+				cpu_threads=max(1, (os.cpu_count() or 1) // workers),
+				num_workers=workers,
+				download_root=os.getenv("STT_MODEL_DIR") or None,
+				# offline only: a missing model is an install problem, not a download
+				local_files_only=True,
+			)
+		except Exception as e:
+			raise SttUnavailable(f"Whisper model {model!r} is not available locally: {e}")
+		self.language = os.getenv("STT_LANGUAGE") or None
+
+	def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+		import numpy as np
+
+		audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+		segments, _ = self.model.transcribe(audio, language=self.language, beam_size=1, vad_filter=True)
+		return " ".join(seg.text.strip() for seg in segments).strip()
+
+
+class VoskEngine:
+	name = "vosk"
+
+	def __init__(self):
+		try:
+			import vosk
+		except Exception as e:
+			raise SttUnavailable(f"vosk not available: {e}")
+		model_path = os.getenv("STT_VOSK_MODEL")
+		if not model_path:
+			raise SttUnavailable("STT_VOSK_MODEL is not set")
+		vosk.SetLogLevel(-1)
+		self._vosk = vosk
+		try:
+			self.model = vosk.Model(model_path)
+		except Exception as e:
+			raise SttUnavailable(f"Vosk model {model_path!r} could not be loaded: {e}")
+
+	def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+		import json
+
+		rec = self._vosk.KaldiRecognizer(self.model, sample_rate)
+		rec.AcceptWaveform(pcm)
+		return json.loads(rec.FinalResult()).get("text", "")
+
+
+ENGINES = {
+	FasterWhisperEngine.name: FasterWhisperEngine,
+	VoskEngine.name: VoskEngine,
+}
+
+
+def register_engine(name: str, factory):
+	"""Make `factory()` available as `STT_ENGINE=name`."""
+	ENGINES[name] = factory
+
+
+_engine = None
+_pool = None
+_init_lock = threading.Lock()
+
+
+def _get_engine():
+	# models take seconds to load: load once per process, on first use
+	global _engine, _pool
+	with _init_lock:
+		if _engine is None:
+			name = os.getenv("STT_ENGINE", FasterWhisperEngine.name)
+			factory = ENGINES.get(name)
+			if factory is None:
+				raise SttUnavailable(f"Unknown STT engine: {name}")
+			try:
+				_engine = factory()
+			except SttError:
+				raise
+			except Exception as e:
+				raise SttUnavailable(f"STT engine {name!r} failed to load: {e}")
+			_pool = ThreadPoolExecutor(max_workers=int(os.getenv("STT_WORKERS", "2")))
+	return _engine, _pool
+
+
+def _wav_pcm_blocks(data: bytes, block_bytes: int):
+	"""Split a 16 kHz mono s16 WAV into raw PCM blocks, or None if it isn't one."""
+	try:
+		w = wave.open(io.BytesIO(data), "rb")
+	except (wave.Error, EOFError):
+		return None
+	with w:
+		if w.getframerate() != SAMPLE_RATE or w.getnchannels() != 1 or w.getsampwidth() != _SAMPLE_WIDTH:
+			return None
+		frames = block_bytes // _SAMPLE_WIDTH
+		blocks = []
+		while True:
+			block = w.readframes(frames)
+			if not block:
+				break
+			blocks.append(block)
+	return blocks
+
+
+def _ffmpeg_pcm_blocks(chunks, block_bytes: int):
+	"""Pipe encoded audio `chunks` through ffmpeg, yielding PCM blocks as they decode."""
+	if shutil.which("ffmpeg") is None:
+		raise SttUnavailable("ffmpeg is required to decode this audio format")
+	proc = subprocess.Popen(
+		["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+		stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+	)
+	feed_error = []
+
+	def _feed():
+		try:
+			for chunk in chunks:
+				proc.stdin.write(chunk)
+		except BrokenPipeError:
+			pass
+		except Exception as e:
+			# e.g. the upload exceeded its size limit mid-stream
+			feed_error.append(e)
+			proc.kill()
+		finally:
+			try:
+				proc.stdin.close()
+			except OSError:
+				pass
+
+	feeder = threading.Thread(target=_feed, daemon=True)
+	feeder.start()
+	decoded = 0
+	try:
+		while True:
+			block = proc.stdout.read(block_bytes)
+			if not block:
+				break
+			decoded += len(block)
+			yield block
+	finally:
+		proc.stdout.close()
+		proc.wait()
+		feeder.join()
+	if feed_error:
+		raise feed_error[0]
+	if proc.returncode != 0 and not decoded:
+		raise SttError(f"ffmpeg could not decode the audio (exit code {proc.returncode})")
+
+
+_WORD = re.compile(r"\w+")
+
+
+def _merge_transcripts(texts, max_words: int = 12) -> str:
+	"""Join window transcripts, dropping the words repeated by the overlap.
+
+	The longest run (up to `max_words`) ending one transcript and starting
+	the next, compared without case or punctuation, is kept once.
+	"""
+	out = []
+	for text in texts:
+		words = text.split()
+		if not words:
+			continue
+		if out:
+			key = lambda w: "".join(_WORD.findall(w.lower()))
+			tail = [key(w) for w in out[-max_words:]]
+			head = [key(w) for w in words[:max_words]]
+			for n in range(min(len(tail), len(head)), 0, -1):
+				if tail[-n:] == head[:n]:
+					words = words[n:]
+					break
+		out.extend(words)
+	return " ".join(out)
+
+
+def _transcribe_window(engine, pcm: bytes) -> str:
+	try:
+		return engine.transcribe(pcm, SAMPLE_RATE)
+	except Exception as e:
+		raise SttError(f"transcription failed: {e}")
+
+
+def transcribe_upload(chunks, filename: str = None) -> dict:
+	"""Transcribe an uploaded recording given as an iterable of byte chunks.
+
+	Returns `{"text", "engine", "audio_seconds", "elapsed_ms", "rtf",
+	"chunks"}` where `rtf` (real-time factor) is processing time divided by
+	audio duration. Raises `SttUnavailable` when no engine/decoder is usable
+	and `SttError` when decoding or transcribing fails.
+	"""
+	t0 = time.perf_counter()
+	engine, pool = _get_engine()
+	chunk_seconds = float(os.getenv("STT_CHUNK_SECONDS", "30"))
+	block_bytes = int(chunk_seconds * SAMPLE_RATE) * _SAMPLE_WIDTH
+	overlap_seconds = min(float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", "1")), chunk_seconds / 2)
+	overlap_bytes = int(overlap_seconds * SAMPLE_RATE) * _SAMPLE_WIDTH
+	timeout = float(os.getenv("STT_CHUNK_TIMEOUT", "120"))
+
+	blocks = None
+	if (filename or "").lower().endswith(".wav"):
+		# WAV needs a seekable header read, so this one format is buffered
+		chunks = b"".join(chunks)
+		blocks = _wav_pcm_blocks(chunks, block_bytes)
+		if blocks is None:
+			chunks = [chunks]
+	if blocks is None:
+		blocks = _ffmpeg_pcm_blocks(chunks, block_bytes)
+
+	futures = []
+	audio_bytes = 0
+	tail = b""
+	try:
+		for block in blocks:
+			audio_bytes += len(block)
+			# repeat the end of the previous window so boundary words are heard whole
+			futures.append(pool.submit(_transcribe_window, engine, tail + block))
+			tail = block[-overlap_bytes:] if overlap_bytes else b""
+		texts = [f.result(timeout=timeout) for f in futures]
+	except FutureTimeout:
+		raise SttError(f"transcription took longer than {timeout:g}s for one {chunk_seconds:g}s window")
+	finally:
+		for f in futures:
+			f.cancel()
+	text = _merge_transcripts(texts)
+
+	elapsed = time.perf_counter() - t0
+	audio_seconds = audio_bytes / float(SAMPLE_RATE * _SAMPLE_WIDTH)
+	return {
+		"text": text,
+		"engine": getattr(engine, "name", type(engine).__name__),
+		"audio_seconds": round(audio_seconds, 2),
+		"elapsed_ms": round(elapsed * 1000, 1),
+		"rtf": round(elapsed / audio_seconds, 3) if audio_seconds else None,
+		"chunks": len(futures),
+	}
@@ -0,0 +1,112 @@
+"""Two-tier cache for generated summaries.
+
+Summaries are keyed by a SHA-256 of the whitespace-normalized input text plus
+the model that produced them, so the same article or headline blob is only
+sent to the remote summarizer once. Because the key is derived from the
+content, edited text naturally misses the cache.
+
+Tier 1 is an in-process LRU (`SUMMARY_CACHE_SIZE` entries, default 2048).
+Tier 2 is the `summary_cache` table, reached through `db_ops`; it is only
+used for model summaries (the naive fallback is cheap to recompute) and any
+DB error simply degrades to a cache miss.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+_WS = re.compile(r"\s+")
+
+
+def summary_key(text: str, model: str) -> str:
+	"""Return the cache key for summarizing `text` with `model`."""
+	normalized = _WS.sub(" ", text or "").strip()
+	return hashlib.sha256(f"{model}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+def _db_ops():
+	try:
+		from . import db_ops
+	except ImportError:
+		import db_ops
+	return db_ops
+
+
+class SummaryCache:
+	def __init__(self, max_size: int = None):
+		self.max_size = max_size if max_size is not None else int(os.getenv("SUMMARY_CACHE_SIZE", "2048"))
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.db_hits = 0
+		self.misses = 0
+
+	def get(self, key: str, persistent: bool = True):
+		"""Look `key` up in memory, then (when `persistent`) in the DB."""
+		with self._lock:
+			summary = self._entries.get(key)
+			if summary is not None:
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return summary
+		if persistent:
+			summary = self._db_get(key)
+			if summary is not None:
+				self.db_hits += 1
+				self._remember(key, summary)
+				return summary
+		self.misses += 1
+		return None
+
+	def put(self, key: str, summary: str, model: str = None, input_chars: int = None, persistent: bool = True):
+		if not summary:
+			return
+		self._remember(key, summary)
+		if persistent:
+			self._db_put(key, model, summary, input_chars)
+
+	def _remember(self, key, summary):
+		with self._lock:
+			self._entries[key] = summary
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+
+	def _db_get(self, key):
+		try:
+			return _db_ops().get_cached_summary(key=key)
+		except Exception:
+			return None
+
+	def _db_put(self, key, model, summary, input_chars):
+		try:
+			db_ops = _db_ops()
+		except Exception:
+			return
+		try:
+			db_ops.save_cached_summary(key=key, model=model, summary=summary, input_chars=input_chars)
+		except Exception:
+			try:
+				db_ops.models.db.session.rollback()
+			except Exception:
+				pass
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self) -> dict:
+		with self._lock:
+			lookups = self.hits + self.db_hits + self.misses
+			return {
+				"size": len(self._entries),
+				"max_size": self.max_size,
+				"hits": self.hits,
+				"db_hits": self.db_hits,
+				"misses": self.misses,
+				"hit_ratio": round((self.hits + self.db_hits) / lookups, 4) if lookups else None,
+			}
+
+
+summary_cache = SummaryCache()
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# the backend modules import each other as top-level modules (like the scripts)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench
+from model_client import CircuitBreaker, model_client
+from summary_cache import summary_cache
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    server = bench.start_stub_model_server(port=0, latency_ms=0)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def stub_model(stub_server, monkeypatch):
+    """Point the model client at the stub server with a fresh breaker and empty caches."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_API_BASE", f"http://127.0.0.1:{stub_server.server_address[1]}/v1")
+    monkeypatch.setattr(model_client, "breaker", CircuitBreaker())
+    monkeypatch.setattr(bench._StubModelHandler, "batch_reply", "ok")
+    monkeypatch.setattr(bench._StubModelHandler, "fail_rate", 0.0)
+    monkeypatch.setattr(bench._StubModelHandler, "fail_status", 500)
+    monkeypatch.setattr(bench._StubModelHandler, "calls", 0)
+    monkeypatch.setattr(bench._StubModelHandler, "prompts", [])
+    summary_cache.clear()
+    yield bench._StubModelHandler
+    summary_cache.clear()
@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import Counter
+
+import helpers
+
+
+def _worker(url):
+    time.sleep(0.3 if "slow" in url else 0.01)
+    return {"text": url}
+
+
+def test_slow_host_does_not_block_other_hosts():
+    urls = [f"http://slow.example/{i}" for i in range(12)] + ["http://fast.example/a", "http://fast.example/b"]
+
+    results = helpers._fetch_many(urls, _worker, max_workers=8, per_host=2, deadline=0.75)
+
+    assert [r["url"] for r in results] == urls
+    assert [r.get("error") for r in results[-2:]] == [None, None]
+    assert all(r["elapsed_ms"] < 200 for r in results[-2:])
+    assert Counter(r.get("error") for r in results[:12]) == Counter({None: 4, "Deadline exceeded": 8})
+
+
+def test_per_host_limit():
+    running, peak, lock = Counter(), Counter(), threading.Lock()
+
+    def worker(url):
+        host = helpers._url_host(url)
+        with lock:
+            running[host] += 1
+            peak[host] = max(peak[host], running[host])
+        time.sleep(0.02)
+        with lock:
+            running[host] -= 1
+        return {}
+
+    urls = [f"http://a.example/{i}" for i in range(6)] + [f"http://b.example/{i}" for i in range(6)]
+    results = helpers._fetch_many(urls, worker, max_workers=8, per_host=2, deadline=5)
+
+    assert all("error" not in r for r in results)
+    assert peak == {"a.example": 2, "b.example": 2}
+
+
+def test_invalid_urls_get_an_error_entry():
+    done = []
+
+    results = helpers._fetch_many(["http://x.example/", 123, "http://[::1"], _worker, deadline=5, on_done=done.append)
+
+    assert [r.get("error") for r in results] == [None, "Invalid URL", "Invalid URL"]
+    assert results[1]["url"] == 123
+    assert len(done) == 3
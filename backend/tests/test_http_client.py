@@ -0,0 +1,109 @@
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import HttpClient, ResponseTooLarge
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """`/ok`, `/flaky/<status>` (fails twice, then 200), `/big` and `/stream`
+    (a body with no Content-Length). Counts hits per path and remembers the
+    client port of every request."""
+
+    protocol_version = "HTTP/1.1"
+    hits = Counter()
+    ports = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        _Handler.hits[self.path] += 1
+        _Handler.ports.append(self.client_address[1])
+        if self.path.startswith("/flaky/") and _Handler.hits[self.path] <= 2:
+            self._send(int(self.path.rsplit("/", 1)[1]), b"try again")
+        elif self.path == "/big":
+            self._send(200, b"x" * 4096)
+        elif self.path == "/stream":
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for _ in range(8):
+                    self.wfile.write(b"y" * 1024)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client stopped reading at its cap
+        else:
+            self._send(200, b"hello")
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def client():
+    _Handler.hits.clear()
+    _Handler.ports.clear()
+    return HttpClient(retries=2, backoff=0, timeout=5, max_bytes=2048)
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_retries_then_succeeds(server, client, status):
+    resp = client.get(f"{server}/flaky/{status}")
+
+    assert resp.status_code == 200
+    assert _Handler.hits[f"/flaky/{status}"] == 3
+    assert client.stats()["requests"] == 1
+    assert client.stats()["errors"] == 0
+
+
+def test_declared_length_over_cap(server, client):
+    with pytest.raises(ResponseTooLarge, match="4096 bytes"):
+        client.get(f"{server}/big")
+    assert client.stats()["errors"] == 1
+
+
+def test_streamed_body_over_cap(server, client):
+    with pytest.raises(ResponseTooLarge, match="exceeded 2048 bytes"):
+        client.get(f"{server}/stream")
+    assert client.get(f"{server}/stream", max_bytes=16 * 1024).content == b"y" * 8192
+
+
+def test_keep_alive_reuses_the_connection(server, client):
+    for _ in range(5):
+        assert client.get(f"{server}/ok").text == "hello"
+
+    assert _Handler.hits["/ok"] == 5
+    assert len(set(_Handler.ports)) == 1
+    assert client.stats()["bytes_read"] == 25
+
+
+def test_counters_under_concurrency(server, client):
+    def fetch():
+        for _ in range(25):
+            client.get(f"{server}/ok")
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = client.stats()
+    assert stats["requests"] == 200
+    assert stats["bytes_read"] == 200 * len(b"hello")
+    assert len(set(_Handler.ports)) <= client.pool_maxsize
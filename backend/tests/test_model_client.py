@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from model_client import CircuitBreaker, ModelUnavailable, model_client
+
+MESSAGES = [{"role": "user", "content": "Say hi."}]
+
+
+@pytest.fixture
+def breaker(stub_model, monkeypatch):
+    breaker = CircuitBreaker(threshold=0.5, window=4, min_calls=4, cooldown=0.2)
+    monkeypatch.setattr(model_client, "breaker", breaker)
+    return breaker
+
+
+def _failing_calls(stub_model, status, n):
+    stub_model.fail_rate, stub_model.fail_status = 1.0, status
+    for _ in range(n):
+        with pytest.raises(Exception) as exc_info:
+            model_client.chat(MESSAGES)
+        assert not isinstance(exc_info.value, ModelUnavailable)
+    stub_model.fail_rate = 0.0
+
+
+def test_rejected_requests_do_not_open_the_breaker(stub_model, breaker):
+    _failing_calls(stub_model, 400, 6)
+    _failing_calls(stub_model, 413, 2)
+
+    assert breaker.state == "closed"
+    assert model_client.available()
+
+
+def test_breaker_opens_probes_and_closes(stub_model, breaker, monkeypatch):
+    # closed -> open on server errors
+    _failing_calls(stub_model, 500, 4)
+    assert breaker.state == "open"
+    calls = stub_model.calls
+    with pytest.raises(ModelUnavailable):
+        model_client.chat(MESSAGES)
+    assert stub_model.calls == calls
+    assert not model_client.available()
+
+    # half_open: a rate-limited trial call opens it again
+    time.sleep(0.25)
+    _failing_calls(stub_model, 429, 1)
+    assert breaker.state == "open"
+    assert breaker.opens == 2
+
+    # half_open: only the trial call gets through, and its success closes it
+    time.sleep(0.25)
+    monkeypatch.setattr(stub_model, "latency_ms", 300.0)
+    trial = threading.Thread(target=model_client.chat, args=(MESSAGES,))
+    trial.start()
+    time.sleep(0.1)
+    assert breaker.state == "half_open"
+    with pytest.raises(ModelUnavailable):
+        model_client.chat(MESSAGES)
+    trial.join()
+
+    assert breaker.state == "closed"
+    assert model_client.chat(MESSAGES)
+
+
+def test_timeouts_count_as_failures(stub_model, breaker, monkeypatch):
+    monkeypatch.setattr(stub_model, "latency_ms", 300.0)
+    for _ in range(4):
+        with pytest.raises(Exception) as exc_info:
+            model_client.chat(MESSAGES, timeout=0.05)
+        assert model_client._is_timeout(exc_info.value)
+
+    assert breaker.state == "open"
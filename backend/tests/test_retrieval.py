@@ -0,0 +1,37 @@
+from datetime import date
+
+import pytest
+
+import retrieval
+
+np = pytest.importorskip("numpy")
+
+ROWS = [
+    # (id, latest ranked day, title, description, content)
+    (1, date(2025, 1, 3), "Council approves harbour budget", "The city council voted.", "Harbour works start in spring."),
+    (2, date(2025, 1, 2), "Harbour ferry strike ends", "Ferry crews return.", "Services resume on the harbour line."),
+    (3, date(2025, 1, 3), "School lunch prices rise", "Parents react.", "The school board set new prices."),
+]
+# article 1 was ranked on the 1st and again on the 3rd
+ARTICLE_DAYS = [(1, date(2025, 1, 1)), (2, date(2025, 1, 2)), (1, date(2025, 1, 3)), (3, date(2025, 1, 3))]
+
+
+@pytest.mark.parametrize("embed_dim", [0, 16])
+def test_day_filter_uses_every_ranked_day(embed_dim):
+    index = retrieval.PassageIndex.build(ROWS, embed_dim=embed_dim, article_days=ARTICLE_DAYS)
+
+    def articles(day):
+        return {article_id for article_id, _, _ in index.search("harbour", k=10, day=day)}
+
+    # hashed embeddings may add weak matches, but never from another day
+    assert {1} <= articles("2025-01-01") <= {1}
+    assert {2} <= articles(date(2025, 1, 2)) <= {2}
+    assert {1} <= articles("2025-01-03") <= {1, 3}
+    assert articles("2025-01-04") == set()
+
+
+def test_day_filter_falls_back_to_row_dates():
+    index = retrieval.PassageIndex.build(ROWS)
+
+    assert {a for a, _, _ in index.search("harbour", day="2025-01-03")} == {1}
+    assert index.search("harbour", day="2025-01-01") == []
@@ -0,0 +1,106 @@
+import re
+
+import bench
+import helpers
+
+
+def _articles_per_call(prompts):
+    sizes = []
+    for prompt in prompts:
+        m = re.search(r"JSON array of (\d+) strings", prompt)
+        sizes.append(int(m.group(1)) if m else 1)
+    return sizes
+
+
+def test_pack_batches_respects_token_and_item_limits():
+    items = [(i, "word " * 400) for i in range(5)]
+    per_item = helpers.count_tokens(items[0][1])
+    assert [len(b) for b in helpers._pack_batches(items, max_tokens=per_item * 5 // 2, max_items=8)] == [2, 2, 1]
+    assert [len(b) for b in helpers._pack_batches(items, max_tokens=10_000, max_items=3)] == [3, 2]
+    # an article over the budget still gets a batch of its own
+    assert [len(b) for b in helpers._pack_batches([(0, "word " * 2000)], max_tokens=100, max_items=8)] == [1]
+
+
+def test_batches_limited_by_size(stub_model, monkeypatch):
+    monkeypatch.setattr(helpers, "SUMMARY_BATCH_SIZE", 3)
+    texts = bench._fake_articles(7, seed=1, sentences=3)
+
+    results = helpers._summarize_batch(texts)
+
+    assert _articles_per_call(stub_model.prompts) == [3, 3, 1]
+    assert [source for _, source in results] == ["openai"] * 7
+    # the JSON array is mapped back in prompt order
+    assert [summary for summary, _ in results[:6]] == [f"Stub summary {i}." for i in (1, 2, 3, 1, 2, 3)]
+
+
+def test_batches_limited_by_tokens(stub_model, monkeypatch):
+    texts = [f"Story {i}. " + "word " * 400 for i in range(5)]
+    monkeypatch.setattr(helpers, "SUMMARY_BATCH_TOKENS", helpers.count_tokens(texts[0]) * 5 // 2)
+
+    helpers._summarize_batch(texts)
+
+    assert _articles_per_call(stub_model.prompts) == [2, 2, 1]
+
+
+def test_articles_are_capped_in_the_prompt(stub_model, monkeypatch):
+    monkeypatch.setattr(helpers, "SUMMARY_BATCH_ARTICLE_CHARS", 100)
+    texts = ["a" * 99 + "TAIL-ONE", "b" * 99 + "TAIL-TWO"]
+
+    helpers._summarize_batch(texts)
+
+    assert len(stub_model.prompts) == 1
+    assert "TAIL" not in stub_model.prompts[0]
+
+
+def test_cached_summaries_skip_the_model(stub_model):
+    texts = bench._fake_articles(4, seed=2, sentences=3)
+    first = helpers._summarize_batch(texts)
+    calls = stub_model.calls
+
+    assert helpers._summarize_batch(texts) == first
+    assert stub_model.calls == calls
+
+
+def test_short_array_falls_back_to_naive(stub_model):
+    stub_model.batch_reply = "short"
+    texts = bench._fake_articles(3, seed=3, sentences=12)
+
+    results = helpers._summarize_batch(texts)
+
+    assert stub_model.calls == 1
+    assert results == [(helpers._naive_summarize(t), "naive") for t in texts]
+
+
+def test_malformed_reply_falls_back_to_naive(stub_model):
+    stub_model.batch_reply = "malformed"
+    texts = bench._fake_articles(3, seed=4, sentences=12)
+
+    results = helpers._summarize_batch(texts)
+
+    assert stub_model.calls == 1
+    assert results == [(helpers._naive_summarize(t), "naive") for t in texts]
+
+
+def test_naive_without_model(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    texts = bench._fake_articles(2, seed=5, sentences=12)
+
+    assert helpers._summarize_batch(texts) == [(helpers._naive_summarize(t), "naive") for t in texts]
+
+
+def test_summary_batcher_flushes_full_batches_and_leaves_the_rest_naive(stub_model, monkeypatch):
+    monkeypatch.setattr(helpers, "SUMMARY_BATCH_SIZE", 2)
+    texts = bench._fake_articles(3, seed=6, sentences=12)
+    batcher = helpers.SummaryBatcher(expected=4)
+
+    batcher.done("a", texts[0])
+    assert stub_model.calls == 0
+    batcher.done("b", texts[1])
+    assert stub_model.calls == 1
+    batcher.done("c", texts[2])
+    results = batcher.results()  # "d" never arrived
+
+    assert stub_model.calls == 1
+    assert results["a"][:2] == ("Stub summary 1.", "openai")
+    assert results["b"][:2] == ("Stub summary 2.", "openai")
+    assert results["c"][:2] == (helpers._naive_summarize(texts[2]), "naive")
@@ -0,0 +1,66 @@
+"""Upload handling without named temp files.
+
+Werkzeug parses multipart file parts into `SpooledRequest._get_file_stream()`:
+a `SpooledTemporaryFile` that stays in memory up to `UPLOAD_SPOOL_BYTES`
+(default 1MB) and only then rolls over to an anonymous temp file. That file
+has no name on disk and is closed with the request, so nothing is left behind
+in `/tmp` even when a handler fails.
+
+Size limits are enforced while the body streams in:
+  - `UPLOAD_MAX_BYTES` (default 20MB) becomes Flask's `MAX_CONTENT_LENGTH`,
+    so oversized bodies are rejected with 413 before they are fully read
+  - `read_upload()` caps a single file part at a per-endpoint limit
+"""
+import os
+import tempfile
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+
+_CHUNK = 64 * 1024
+
+
+class SpooledRequest(Request):
+	def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+		return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="rb+")
+
+
+def read_upload(file_storage, max_bytes: int = None) -> bytes:
+	"""Read an uploaded file into memory, raising 413 past `max_bytes`."""
+	max_bytes = max_bytes or UPLOAD_MAX_BYTES
+	stream = file_storage.stream
+	stream.seek(0)
+	chunks = []
+	size = 0
+	while True:
+		chunk = stream.read(_CHUNK)
+		if not chunk:
+			break
+		size += len(chunk)
+		if size > max_bytes:
+			raise RequestEntityTooLarge(f"Upload exceeds {max_bytes} bytes")
+		chunks.append(chunk)
+	return b"".join(chunks)
+
+
+def iter_upload(file_storage, max_bytes: int = None, chunk_size: int = _CHUNK):
+	"""Yield an uploaded file in chunks, raising 413 past `max_bytes`.
+
+	For consumers that can decode incrementally (e.g. piping audio into a
+	decoder) so the whole upload never has to sit in one buffer.
+	"""
+	max_bytes = max_bytes or UPLOAD_MAX_BYTES
+	stream = file_storage.stream
+	stream.seek(0)
+	size = 0
+	while True:
+		chunk = stream.read(chunk_size)
+		if not chunk:
+			return
+		size += len(chunk)
+		if size > max_bytes:
+			raise RequestEntityTooLarge(f"Upload exceeds {max_bytes} bytes")
+		yield chunk